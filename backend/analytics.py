@@ -0,0 +1,229 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import quote
+import httpx
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import SessionLocal, LinkedInPost, PostMetric, PostTopic, Topic, Cluster
+from clients import clients
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def poll_interval(age: timedelta) -> timedelta:
+    """Time between polls for a post of this age: a share of its age, within the configured bounds."""
+    seconds = age.total_seconds() * settings.analytics_age_fraction
+    return timedelta(seconds=min(max(seconds, settings.analytics_min_interval), settings.analytics_max_interval))
+
+
+def _counts(metric: Optional[PostMetric]) -> Dict:
+    if metric is None:
+        return {"reactions": 0, "comments": 0, "impressions": None, "collected_at": None}
+    return {
+        "reactions": metric.reactions,
+        "comments": metric.comments,
+        "impressions": metric.impressions,
+        "collected_at": metric.collected_at
+    }
+
+
+class AnalyticsPoller:
+    """Collects reactions, comments and impressions for published posts.
+
+    Posts are polled on a decaying schedule: the gap between polls is
+    analytics_age_fraction of the post's age, so a fresh post is checked
+    every few minutes and a week old one about once a day, until
+    analytics_max_age_days. Due posts are fetched analytics_batch_size at a
+    time through one socialActions batch request, and post_metrics only
+    gets a row when the counts changed.
+    """
+    
+    def __init__(self, http: Optional[httpx.AsyncClient] = None, session_factory=None):
+        self.http = http  # Defaults to the shared linkedin pool
+        self.session_factory = session_factory or SessionLocal
+        self.access_token = settings.linkedin_access_token
+        self.api_url = settings.linkedin_api_url
+        self._task = None
+    
+    def next_poll_at(self, post: LinkedInPost) -> Optional[datetime]:
+        """When the post is due, None once it is too old to track."""
+        if post.metrics_checked_at is None:
+            return post.posted_at
+        if post.metrics_checked_at - post.posted_at > timedelta(days=settings.analytics_max_age_days):
+            return None
+        return post.metrics_checked_at + poll_interval(post.metrics_checked_at - post.posted_at)
+    
+    def due_posts(self, db: Session, now: Optional[datetime] = None) -> List[LinkedInPost]:
+        now = now or datetime.utcnow()
+        posts = db.query(LinkedInPost).filter(
+            LinkedInPost.status == "posted",
+            LinkedInPost.linkedin_post_id.isnot(None),
+            LinkedInPost.posted_at >= now - timedelta(days=settings.analytics_max_age_days + 1)
+        ).all()
+        due = [post for post in posts if (self.next_poll_at(post) or datetime.max) <= now]
+        # Never polled first, then the longest waiting
+        return sorted(due, key=lambda post: post.metrics_checked_at or datetime.min)
+    
+    async def fetch_batch(self, urns: List[str]) -> Dict[str, Dict]:
+        """Counts per share URN from one socialActions batch request. Missing URNs had errors."""
+        ids = ",".join(quote(urn, safe="") for urn in urns)
+        client = self.http or clients.http("linkedin")
+        response = await client.get(
+            f"{self.api_url}/socialActions?ids=List({ids})",
+            headers={
+                "Authorization": f"Bearer {self.access_token}",
+                "X-Restli-Protocol-Version": "2.0.0"
+            }
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"LinkedIn API error: {response.status_code} - {response.text}")
+        
+        counts = {}
+        for urn, result in response.json().get("results", {}).items():
+            counts[urn] = {
+                "reactions": result.get("likesSummary", {}).get("totalLikes", 0),
+                "comments": result.get("commentsSummary", {}).get("aggregatedTotalComments", 0),
+                "impressions": result.get("impressionCount")
+            }
+        return counts
+    
+    def record(self, db: Session, post: LinkedInPost, counts: Dict, now: datetime) -> bool:
+        """Store the counts if they changed since the last row. Returns whether a row was written."""
+        post.metrics_checked_at = now
+        latest = db.query(PostMetric).filter(PostMetric.post_id == post.id).order_by(PostMetric.id.desc()).first()
+        if latest and (latest.reactions, latest.comments, latest.impressions) == (
+            counts["reactions"], counts["comments"], counts["impressions"]
+        ):
+            return False
+        db.add(PostMetric(post_id=post.id, collected_at=now, **counts))
+        return True
+    
+    async def poll_once(self) -> int:
+        """Poll every due post. Returns the number of posts checked."""
+        db = self.session_factory()
+        checked = 0
+        try:
+            due = self.due_posts(db)
+            for start in range(0, len(due), settings.analytics_batch_size):
+                batch = due[start:start + settings.analytics_batch_size]
+                try:
+                    results = await self.fetch_batch([post.linkedin_post_id for post in batch])
+                except Exception as e:
+                    metrics.incr("analytics.errors")
+                    logger.error(f"Error fetching post analytics: {str(e)}")
+                    continue
+                
+                now = datetime.utcnow()
+                for post in batch:
+                    if post.linkedin_post_id not in results:
+                        # Deleted on LinkedIn or not visible, back off like any other poll
+                        post.metrics_checked_at = now
+                        logger.warning(f"No analytics for post {post.id} ({post.linkedin_post_id})")
+                        continue
+                    if self.record(db, post, results[post.linkedin_post_id], now):
+                        metrics.incr("analytics.changes")
+                    checked += 1
+                db.commit()
+                metrics.incr("analytics.requests")
+            
+            metrics.incr("analytics.polled", checked)
+            return checked
+        finally:
+            db.close()
+    
+    async def run_forever(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Error in analytics loop: {str(e)}")
+            await asyncio.sleep(settings.analytics_poll_interval)
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self.run_forever())
+            logger.info("Analytics poller started")
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            logger.info("Analytics poller stopped")
+    
+    def _latest_ids(self, db: Session):
+        return db.query(func.max(PostMetric.id)).group_by(PostMetric.post_id)
+    
+    def post_performance(self, db: Session, post_id: int) -> Optional[Dict]:
+        post = db.query(LinkedInPost).filter(LinkedInPost.id == post_id).first()
+        if not post:
+            return None
+        history = db.query(PostMetric).filter(PostMetric.post_id == post_id).order_by(PostMetric.id).all()
+        next_poll = self.next_poll_at(post) if post.status == "posted" and post.linkedin_post_id else None
+        return {
+            "post_id": post.id,
+            "linkedin_post_id": post.linkedin_post_id,
+            "posted_at": post.posted_at,
+            "latest": _counts(history[-1] if history else None),
+            "history": [_counts(metric) for metric in history],
+            "checked_at": post.metrics_checked_at,
+            "next_poll_at": next_poll
+        }
+    
+    def top_posts(self, db: Session, limit: int = 20) -> List[Dict]:
+        """Posts with metrics, most engaging first."""
+        rows = db.query(PostMetric, LinkedInPost).join(
+            LinkedInPost, LinkedInPost.id == PostMetric.post_id
+        ).filter(PostMetric.id.in_(self._latest_ids(db))).order_by(
+            (PostMetric.reactions + PostMetric.comments).desc()
+        ).limit(limit).all()
+        return [
+            {
+                "post_id": post.id,
+                "posted_at": post.posted_at,
+                "preview": post.content[:120],
+                **_counts(metric)
+            }
+            for metric, post in rows
+        ]
+    
+    def cluster_performance(self, db: Session) -> List[Dict]:
+        """Latest counts summed per topic cluster. A post counts once per cluster it drew topics from."""
+        rows = db.query(PostMetric, Topic.cluster_id).join(
+            PostTopic, PostTopic.post_id == PostMetric.post_id
+        ).join(
+            Topic, Topic.id == PostTopic.topic_id
+        ).filter(
+            PostMetric.id.in_(self._latest_ids(db)),
+            Topic.cluster_id.isnot(None)
+        ).distinct().all()
+        
+        rollups = {}
+        for metric, cluster_id in rows:
+            rollup = rollups.setdefault(cluster_id, {"cluster_id": cluster_id, "posts": 0, "reactions": 0, "comments": 0, "impressions": 0})
+            rollup["posts"] += 1
+            rollup["reactions"] += metric.reactions
+            rollup["comments"] += metric.comments
+            rollup["impressions"] += metric.impressions or 0
+        
+        terms = dict(db.query(Cluster.id, Cluster.top_terms).filter(Cluster.id.in_(list(rollups))).all()) if rollups else {}
+        for rollup in rollups.values():
+            rollup["top_terms"] = terms.get(rollup["cluster_id"]) or []
+            rollup["avg_engagement"] = round((rollup["reactions"] + rollup["comments"]) / rollup["posts"], 2)
+        return sorted(rollups.values(), key=lambda rollup: rollup["avg_engagement"], reverse=True)
+    
+    def stats(self, db: Session) -> Dict:
+        return {
+            "tracked_posts": db.query(func.count(func.distinct(PostMetric.post_id))).scalar(),
+            "rows": db.query(func.count(PostMetric.id)).scalar(),
+            "due": len(self.due_posts(db)),
+            "requests": int(metrics.get("analytics.requests")),
+            "errors": int(metrics.get("analytics.errors"))
+        }
+
+
+# Global analytics poller instance
+analytics_poller = AnalyticsPoller()
\ No newline at end of file
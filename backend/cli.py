@@ -70,11 +70,12 @@ def generate_now(topic_ids):
         generator = LinkedInPostGenerator()
         
         if not topic_ids:
-            # Get top ranked topics
-            from .database import Topic
+            # Get top ranked unused topics
+            from .database import Topic, unused_topic
             top_topics = db.query(Topic).filter(
                 Topic.processed == True,
-                Topic.rank_score.isnot(None)
+                Topic.rank_score.isnot(None),
+                unused_topic()
             ).order_by(Topic.rank_score.desc()).limit(3).all()
             
             if not top_topics:
@@ -0,0 +1,160 @@
+import logging
+import threading
+from typing import Dict
+import httpx
+import openai
+import praw
+from llm_provider import LLMProvider, get_provider
+from config import settings
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+
+def _upstream_options(upstream: str) -> Dict:
+    if upstream == "linkedin":
+        return {
+            "timeout": settings.linkedin_http_timeout,
+            "max_connections": settings.linkedin_http_max_connections,
+            "keepalive": settings.linkedin_http_keepalive,
+            "http2": settings.linkedin_http2
+        }
+    if upstream == "x":
+        return {
+            "timeout": settings.x_http_timeout,
+            "max_connections": settings.x_http_max_connections,
+            "keepalive": settings.x_http_keepalive,
+            "http2": settings.x_http2
+        }
+    if upstream == "llm":
+        return {
+            "timeout": settings.llm_timeout,
+            "max_connections": settings.llm_http_max_connections,
+            "keepalive": settings.llm_http_keepalive,
+            "http2": settings.llm_http2
+        }
+    raise ValueError(f"Unknown upstream '{upstream}', expected linkedin, x or llm")
+
+
+class ClientRegistry:
+    """Long-lived, connection-pooled clients shared by the whole process.
+
+    Each upstream (linkedin, x, llm) gets one httpx pool, so TCP and TLS
+    connections are reused across calls instead of being set up per
+    request. The OpenAI clients run on the llm pool and PRAW is built once.
+    Clients are created on first use or by startup() and closed by
+    shutdown(); a later use builds fresh ones.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._async_http = {}
+        self._sync_http = {}
+        self._provider = None
+        self._llm_client = None
+        self._async_llm_client = None
+        self._reddit = None
+    
+    def _http_options(self, upstream: str) -> Dict:
+        options = _upstream_options(upstream)
+        http2 = options["http2"]
+        if http2 and h2 is None:
+            logger.warning(f"HTTP/2 requested for {upstream} but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+        return {
+            "timeout": options["timeout"],
+            "limits": httpx.Limits(
+                max_connections=options["max_connections"],
+                max_keepalive_connections=options["max_connections"],
+                keepalive_expiry=options["keepalive"]
+            ),
+            "http2": http2
+        }
+    
+    def http(self, upstream: str) -> httpx.AsyncClient:
+        with self._lock:
+            client = self._async_http.get(upstream)
+            if client is None or client.is_closed:
+                client = self._async_http[upstream] = httpx.AsyncClient(**self._http_options(upstream))
+            return client
+    
+    def sync_http(self, upstream: str) -> httpx.Client:
+        with self._lock:
+            client = self._sync_http.get(upstream)
+            if client is None or client.is_closed:
+                client = self._sync_http[upstream] = httpx.Client(**self._http_options(upstream))
+            return client
+    
+    def llm_provider(self) -> LLMProvider:
+        with self._lock:
+            if self._provider is None:
+                self._provider = get_provider()
+            return self._provider
+    
+    def llm_client(self) -> openai.OpenAI:
+        with self._lock:
+            if self._llm_client is None or self._sync_http.get("llm") is None or self._sync_http["llm"].is_closed:
+                self._llm_client = self.llm_provider().client(http_client=self.sync_http("llm"))
+            return self._llm_client
+    
+    def async_llm_client(self) -> openai.AsyncOpenAI:
+        with self._lock:
+            if self._async_llm_client is None or self._async_http.get("llm") is None or self._async_http["llm"].is_closed:
+                self._async_llm_client = self.llm_provider().async_client(http_client=self.http("llm"))
+            return self._async_llm_client
+    
+    def reddit(self) -> praw.Reddit:
+        with self._lock:
+            if self._reddit is None:
+                self._reddit = praw.Reddit(
+                    client_id=settings.reddit_client_id,
+                    client_secret=settings.reddit_client_secret,
+                    user_agent=settings.reddit_user_agent
+                )
+            return self._reddit
+    
+    def startup(self):
+        """Open the pools up front so the first request does not pay for it."""
+        for upstream in ("linkedin", "x"):
+            self.http(upstream)
+        try:
+            self.llm_client()
+            self.async_llm_client()
+        except Exception as e:
+            logger.error(f"Error creating LLM clients: {str(e)}")
+        logger.info("Shared clients ready")
+    
+    async def shutdown(self):
+        with self._lock:
+            async_clients = list(self._async_http.values())
+            sync_clients = list(self._sync_http.values())
+            self._async_http, self._sync_http = {}, {}
+            self._provider = self._llm_client = self._async_llm_client = None
+        
+        for client in async_clients:
+            await client.aclose()
+        for client in sync_clients:
+            client.close()
+        logger.info("Shared clients closed")
+    
+    def describe(self) -> Dict:
+        with self._lock:
+            return {
+                "http": sorted(upstream for upstream, client in self._async_http.items() if not client.is_closed),
+                "sync_http": sorted(upstream for upstream, client in self._sync_http.items() if not client.is_closed),
+                "llm": self._provider.describe() if self._provider else None,
+                "reddit": self._reddit is not None
+            }
+
+
+# Global client registry instance
+clients = ClientRegistry()
+
+
+def get_clients() -> ClientRegistry:
+    """FastAPI dependency for the shared client registry."""
+    return clients
\ No newline at end of file
@@ -0,0 +1,168 @@
+import math
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import Cluster, Topic
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+    norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+    return dot / norm if norm else 0.0
+
+
+class ClusterRegistry:
+    """Keeps stable cluster identities across clustering runs.
+
+    Centroids are stored as sparse {term: weight} maps so they stay comparable
+    even though each run refits its own vocabulary.
+    """
+
+    def __init__(self, match_threshold: Optional[float] = None, window_hours: Optional[int] = None):
+        self.match_threshold = settings.cluster_match_threshold if match_threshold is None else match_threshold
+        self.window_hours = settings.cluster_registry_window_hours if window_hours is None else window_hours
+
+    def describe_run(
+        self,
+        term_centers: np.ndarray,
+        feature_names,
+        labels,
+        engagement: List[float]
+    ) -> List[Dict]:
+        """Summarise each run cluster as a term-space centroid plus size and engagement."""
+        labels = np.asarray(labels)
+        engagement = np.asarray(engagement, dtype=float)
+        run_clusters = []
+
+        for label, center in enumerate(term_centers):
+            members = labels == label
+            if not members.any():
+                continue
+
+            top = np.argsort(center)[::-1][:settings.cluster_centroid_terms]
+            centroid = {str(feature_names[i]): float(center[i]) for i in top if center[i] > 0}
+
+            run_clusters.append({
+                "label": label,
+                "centroid": centroid,
+                "size": int(members.sum()),
+                "engagement": float(engagement[members].sum())
+            })
+
+        return run_clusters
+
+    def reconcile(self, db: Session, run_clusters: List[Dict]) -> Dict[int, int]:
+        """Match run clusters to registry clusters, creating new ones as needed.
+
+        Returns a mapping of run label -> registry cluster id. Changes are
+        flushed but not committed; the caller owns the transaction.
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(hours=self.window_hours)
+        existing = db.query(Cluster).filter(Cluster.last_seen >= cutoff).all()
+
+        # Greedy one-to-one matching, most similar pairs first
+        pairs = []
+        for run_index, run in enumerate(run_clusters):
+            for cluster in existing:
+                similarity = _cosine(run["centroid"], cluster.centroid or {})
+                if similarity >= self.match_threshold:
+                    pairs.append((similarity, run_index, cluster))
+        pairs.sort(key=lambda pair: pair[0], reverse=True)
+
+        matched: Dict[int, Cluster] = {}
+        claimed = set()
+        for similarity, run_index, cluster in pairs:
+            if run_index in matched or cluster.id in claimed:
+                continue
+            matched[run_index] = cluster
+            claimed.add(cluster.id)
+
+        label_to_cluster = {}
+        for run_index, run in enumerate(run_clusters):
+            cluster = matched.get(run_index)
+            if cluster is None:
+                cluster = Cluster(
+                    centroid=run["centroid"],
+                    size=0,
+                    total_engagement=0.0,
+                    run_count=0,
+                    first_seen=now
+                )
+                db.add(cluster)
+            else:
+                cluster.centroid = self._merge_centroids(cluster.centroid or {}, run["centroid"])
+
+            cluster.top_terms = self._top_terms(cluster.centroid)
+            cluster.size = (cluster.size or 0) + run["size"]
+            cluster.total_engagement = (cluster.total_engagement or 0.0) + run["engagement"]
+            cluster.run_count = (cluster.run_count or 0) + 1
+            cluster.last_seen = now
+
+            label_to_cluster[run["label"]] = cluster
+
+        # Assign ids to new clusters without committing
+        db.flush()
+
+        logger.info(
+            f"Cluster registry: {len(matched)} matched, "
+            f"{len(run_clusters) - len(matched)} new, {len(existing)} active"
+        )
+
+        return {label: cluster.id for label, cluster in label_to_cluster.items()}
+
+    def active_clusters(self, db: Session, window_hours: Optional[int] = None, limit: int = 20) -> List[Dict]:
+        """Clusters seen within the window, ranked by engagement of their topics in that window."""
+        cutoff = datetime.utcnow() - timedelta(hours=window_hours or self.window_hours)
+
+        window_stats = dict(
+            (cluster_id, (count, engagement))
+            for cluster_id, count, engagement in db.query(
+                Topic.cluster_id,
+                func.count(Topic.id),
+                func.coalesce(func.sum(Topic.score + Topic.engagement), 0)
+            ).filter(
+                Topic.fetched_at >= cutoff,
+                Topic.cluster_id.isnot(None)
+            ).group_by(Topic.cluster_id).all()
+        )
+
+        clusters = db.query(Cluster).filter(Cluster.last_seen >= cutoff).all()
+
+        results = []
+        for cluster in clusters:
+            window_topics, window_engagement = window_stats.get(cluster.id, (0, 0))
+            results.append({
+                "id": cluster.id,
+                "top_terms": cluster.top_terms or [],
+                "size": cluster.size or 0,
+                "total_engagement": cluster.total_engagement or 0.0,
+                "run_count": cluster.run_count or 0,
+                "first_seen": cluster.first_seen,
+                "last_seen": cluster.last_seen,
+                "window_topics": int(window_topics),
+                "window_engagement": float(window_engagement)
+            })
+
+        results.sort(key=lambda c: c["window_engagement"], reverse=True)
+        return results[:limit]
+
+    def _merge_centroids(self, history: Dict[str, float], run: Dict[str, float]) -> Dict[str, float]:
+        decay = settings.cluster_centroid_decay
+        merged = {term: weight * decay for term, weight in history.items()}
+        for term, weight in run.items():
+            merged[term] = merged.get(term, 0.0) + weight * (1 - decay)
+
+        top = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:settings.cluster_centroid_terms]
+        return dict(top)
+
+    def _top_terms(self, centroid: Dict[str, float], n: int = 5) -> List[str]:
+        return [term for term, _ in sorted(centroid.items(), key=lambda item: item[1], reverse=True)[:n]]
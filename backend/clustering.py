@@ -1,83 +1,172 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+from sklearn.metrics import silhouette_score, davies_bouldin_score
 from sklearn.metrics.pairwise import cosine_similarity
+from joblib import Parallel, delayed, effective_n_jobs
 import numpy as np
-from typing import List, Dict, Tuple
+import scipy.sparse as sp
+import time
+from typing import List, Dict, Tuple, Optional
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from database import Topic
+from database import Topic, unused_topic
+from config import settings
+from cluster_registry import ClusterRegistry
+from summarizer import summarizer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Chosen k per (window hours, corpus size bucket) -> (k, chosen_at monotonic time).
+# Shared by all clusterer instances so the scheduler and manual runs reuse it.
+_k_cache: Dict[Tuple[int, int], Tuple[int, float]] = {}
+
+
+def _score_k(sample, n_clusters: int, metric: str) -> Tuple[int, float]:
+    """Fit KMeans on the sample and score it. Higher is always better."""
+    labels = KMeans(n_clusters=n_clusters, random_state=42, n_init=3).fit_predict(sample)
+    
+    if len(np.unique(labels)) < 2:
+        return n_clusters, float("-inf")
+    
+    if metric == "davies_bouldin":
+        dense = sample.toarray() if sp.issparse(sample) else sample
+        # Lower Davies-Bouldin is better, negate so callers can maximise
+        return n_clusters, -float(davies_bouldin_score(dense, labels))
+    
+    return n_clusters, float(silhouette_score(sample, labels, metric="cosine"))
+
 
 class TopicClusterer:
-    def __init__(self):
+    def __init__(
+        self,
+        k_selection: Optional[str] = None,
+        reduce_dimensions: Optional[bool] = None,
+        registry: Optional[ClusterRegistry] = None
+    ):
+        self.reduce_dimensions = settings.cluster_lsa_enabled if reduce_dimensions is None else reduce_dimensions
+        
+        # With the LSA stage the SVD keeps KMeans cheap, so the vocabulary can grow
         self.vectorizer = TfidfVectorizer(
-            max_features=100,
+            max_features=settings.cluster_lsa_max_features if self.reduce_dimensions else 100,
             stop_words='english',
             ngram_range=(1, 2)
         )
+        self.svd = None
+        self.k_selection = k_selection or settings.cluster_k_selection
+        self.registry = registry or ClusterRegistry()
     
-    def cluster_and_rank_topics(self, db: Session) -> List[Dict]:
-        # Get unprocessed topics from last 24 hours
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        topics = db.query(Topic).filter(
-            Topic.fetched_at >= cutoff_time,
-            Topic.processed == False
-        ).all()
+    def cluster_and_rank_topics(self, db: Session, window_hours: int = 24) -> List[Dict]:
+        topics = self._load_topics(db, window_hours)
         
         if len(topics) < 3:
             logger.info("Not enough topics to cluster")
             return []
         
         # Prepare text data
-        texts = []
-        for topic in topics:
-            text = f"{topic.title} {topic.content or ''}"
-            texts.append(text)
+        texts = [f"{topic.title} {topic.content or ''}" for topic in topics]
         
         # Vectorize texts
         try:
-            tfidf_matrix = self.vectorizer.fit_transform(texts)
+            matrix = self._vectorize(texts)
         except Exception as e:
             logger.error(f"Error vectorizing topics: {str(e)}")
             return []
         
-        # Determine optimal number of clusters
-        n_clusters = min(max(3, len(topics) // 5), 10)
+        kmeans, cluster_labels = self._fit(matrix, window_hours)
+        rank_scores = self._score(topics, matrix, kmeans, cluster_labels)
+        clustered_topics = self._write_back(db, topics, kmeans, cluster_labels, rank_scores)
+        
+        # Return top topics from each cluster
+        top_topics = self._get_top_topics_per_cluster(clustered_topics, top_n=2)
+        return top_topics
+    
+    def plan_post_groups(self, db: Session, count: int, window_hours: int = 24, per_cluster: int = 3) -> List[List[int]]:
+        """Topic id groups for up to `count` posts, one cluster each, strongest clusters first.
+        
+        Topics already used by a post are skipped so a day's batch doesn't
+        repeat yesterday's material.
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=window_hours)
+        topics = db.query(Topic).filter(
+            Topic.processed == True,
+            Topic.rank_score.isnot(None),
+            Topic.cluster_id.isnot(None),
+            Topic.fetched_at >= cutoff,
+            unused_topic()
+        ).all()
+        
+        ranked = self._get_top_topics_per_cluster(
+            [
+                {"id": t.id, "cluster_id": t.cluster_id, "rank_score": t.rank_score}
+                for t in topics
+            ],
+            top_n=per_cluster
+        )
+        
+        # Ranked best first, so clusters are inserted in order of their best topic
+        groups = {}
+        for topic in ranked:
+            groups.setdefault(topic["cluster_id"], []).append(topic["id"])
+        
+        return list(groups.values())[:count]
+    
+    def _load_topics(self, db: Session, window_hours: int) -> List[Topic]:
+        # Get unprocessed topics from the window
+        cutoff_time = datetime.utcnow() - timedelta(hours=window_hours)
+        return db.query(Topic).filter(
+            Topic.fetched_at >= cutoff_time,
+            Topic.processed == False
+        ).all()
+    
+    def _fit(self, matrix, window_hours: int = 24):
+        # Determine number of clusters
+        n_clusters = self._select_n_clusters(matrix, window_hours)
         
         # Perform clustering
         kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        cluster_labels = kmeans.fit_predict(tfidf_matrix)
+        cluster_labels = kmeans.fit_predict(matrix)
+        
+        return kmeans, cluster_labels
+    
+    def _score(self, topics: List[Topic], matrix, kmeans, cluster_labels) -> np.ndarray:
+        # Similarity of every topic to its own cluster center
+        similarities = cosine_similarity(matrix, kmeans.cluster_centers_)
+        similarity = similarities[np.arange(len(topics)), cluster_labels]
+        
+        # Recency and engagement for all topics at once
+        now = datetime.utcnow()
+        age_hours = np.array([(now - topic.fetched_at).total_seconds() / 3600 for topic in topics])
+        recency_score = 1.0 / (1.0 + age_hours)
+        engagement_score = np.log1p(np.array([topic.score + topic.engagement for topic in topics], dtype=float))
         
-        # Calculate cluster centers and topic distances
-        cluster_centers = kmeans.cluster_centers_
+        # Combined rank score
+        return (
+            similarity * 0.3 +  # Relevance to cluster
+            recency_score * 0.3 +  # Recency
+            np.minimum(engagement_score / 10, 1.0) * 0.4  # Engagement (capped)
+        )
+    
+    def _write_back(self, db: Session, topics: List[Topic], kmeans, cluster_labels, rank_scores) -> List[Dict]:
+        # Map this run's labels onto stable cluster identities
+        label_to_cluster = self.registry.reconcile(db, self.registry.describe_run(
+            self._term_space_centers(kmeans.cluster_centers_),
+            self.vectorizer.get_feature_names_out(),
+            cluster_labels,
+            [topic.score + topic.engagement for topic in topics]
+        ))
         
-        # Assign cluster IDs and calculate rank scores
+        # Assign cluster IDs and rank scores
         clustered_topics = []
         
         for i, topic in enumerate(topics):
-            cluster_id = int(cluster_labels[i])
-            
-            # Calculate distance to cluster center
-            topic_vector = tfidf_matrix[i].toarray()
-            center_vector = cluster_centers[cluster_id].reshape(1, -1)
-            similarity = cosine_similarity(topic_vector, center_vector)[0][0]
-            
-            # Calculate rank score based on multiple factors
-            recency_score = 1.0 / (1.0 + (datetime.utcnow() - topic.fetched_at).total_seconds() / 3600)
-            engagement_score = np.log1p(topic.score + topic.engagement)
-            
-            # Combined rank score
-            rank_score = (
-                similarity * 0.3 +  # Relevance to cluster
-                recency_score * 0.3 +  # Recency
-                min(engagement_score / 10, 1.0) * 0.4  # Engagement (capped)
-            )
+            cluster_id = label_to_cluster.get(int(cluster_labels[i]))
+            rank_score = float(rank_scores[i])
             
             topic.cluster_id = cluster_id
-            topic.rank_score = float(rank_score)
+            topic.rank_score = rank_score
             topic.processed = True
             
             clustered_topics.append({
@@ -89,17 +178,115 @@ class TopicClusterer:
                 "url": topic.url
             })
         
+        # Cache prompt summaries while this run's TF-IDF weights are at hand
+        summaries = summarizer.summarize_many([topic.content for topic in topics], self.vectorizer)
+        for topic, summary in zip(topics, summaries):
+            topic.summary = summary
+        
         try:
             db.commit()
-            logger.info(f"Successfully clustered {len(topics)} topics into {n_clusters} clusters")
+            logger.info(f"Successfully clustered {len(topics)} topics into {kmeans.n_clusters} clusters")
         except Exception as e:
             db.rollback()
             logger.error(f"Error saving clustered topics: {str(e)}")
             raise
         
-        # Return top topics from each cluster
-        top_topics = self._get_top_topics_per_cluster(clustered_topics, top_n=2)
-        return top_topics
+        return clustered_topics
+    
+    def _vectorize(self, texts: List[str]):
+        tfidf_matrix = self.vectorizer.fit_transform(texts)
+        self.svd = None
+        
+        if not self.reduce_dimensions:
+            return tfidf_matrix
+        
+        # TruncatedSVD needs fewer components than both samples and features
+        n_components = min(
+            settings.cluster_lsa_components,
+            tfidf_matrix.shape[0] - 1,
+            tfidf_matrix.shape[1] - 1
+        )
+        if n_components < 2:
+            return tfidf_matrix
+        
+        self.svd = TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=42)
+        reduced = self.svd.fit_transform(tfidf_matrix)
+        
+        # Unit-length rows so Euclidean KMeans tracks cosine similarity, as on TF-IDF
+        return normalize(reduced)
+    
+    def _term_space_centers(self, centers: np.ndarray) -> np.ndarray:
+        # LSA centers live in SVD space; project them back onto the vocabulary
+        if self.svd is not None:
+            return self.svd.inverse_transform(centers)
+        return centers
+    
+    def _heuristic_n_clusters(self, n_topics: int) -> int:
+        return min(max(3, n_topics // 5), 10)
+    
+    def _select_n_clusters(self, matrix, window_hours: int = 24) -> int:
+        n_topics = matrix.shape[0]
+        
+        if self.k_selection != "auto":
+            return self._heuristic_n_clusters(n_topics)
+        
+        # Silhouette needs at least one sample more than clusters
+        sample_size = min(n_topics, settings.cluster_k_sample_size)
+        k_min = max(2, settings.cluster_k_min)
+        k_max = min(settings.cluster_k_max, sample_size - 1)
+        if k_max < k_min:
+            return self._heuristic_n_clusters(n_topics)
+        
+        # Corpus sizes within the same power of two share a cached k
+        cache_key = (window_hours, n_topics.bit_length())
+        cached = _k_cache.get(cache_key)
+        if cached and time.monotonic() - cached[1] < settings.cluster_k_cache_ttl:
+            return min(cached[0], n_topics)
+        
+        # Score candidates on a bounded random sample so cost doesn't grow with the corpus
+        rng = np.random.default_rng(42)
+        if sample_size < n_topics:
+            sample = matrix[np.sort(rng.choice(n_topics, sample_size, replace=False))]
+        else:
+            sample = matrix
+        
+        scores = self._evaluate_candidates(sample, range(k_min, k_max + 1))
+        
+        if not scores:
+            logger.warning("Automatic k selection produced no scores in time, using heuristic")
+            return self._heuristic_n_clusters(n_topics)
+        
+        best_k = max(scores, key=scores.get)
+        _k_cache[cache_key] = (best_k, time.monotonic())
+        logger.info(
+            f"Selected k={best_k} from {len(scores)} candidates "
+            f"({settings.cluster_k_metric}={scores[best_k]:.3f}, sample={sample.shape[0]})"
+        )
+        return best_k
+    
+    def _evaluate_candidates(self, sample, candidates) -> Dict[int, float]:
+        """Score each candidate k in parallel, keeping whatever finished within the time budget."""
+        scores = {}
+        deadline = time.monotonic() + settings.cluster_k_time_budget
+        n_jobs = effective_n_jobs(settings.cluster_k_n_jobs)
+        parallel = Parallel(
+            n_jobs=n_jobs,
+            # Sequential runs can't be interrupted, the deadline check below still applies
+            timeout=settings.cluster_k_time_budget if n_jobs > 1 else None,
+            return_as="generator_unordered"
+        )
+        
+        try:
+            for n_clusters, score in parallel(
+                delayed(_score_k)(sample, k, settings.cluster_k_metric) for k in candidates
+            ):
+                scores[n_clusters] = score
+                if time.monotonic() >= deadline:
+                    break
+        except Exception as e:
+            logger.warning(f"k selection stopped early: {type(e).__name__} {str(e)}")
+        
+        return {k: s for k, s in scores.items() if np.isfinite(s)}
     
     def _get_top_topics_per_cluster(self, topics: List[Dict], top_n: int = 2) -> List[Dict]:
         # Group by cluster
@@ -18,10 +18,28 @@ class Settings(BaseSettings):
     # LinkedIn
     linkedin_access_token: Optional[str] = os.getenv("LINKEDIN_ACCESS_TOKEN")
     linkedin_person_urn: Optional[str] = os.getenv("LINKEDIN_PERSON_URN")
+    linkedin_api_url: str = os.getenv("LINKEDIN_API_URL", "https://api.linkedin.com/v2")  # point at linkedin_stub.py for offline runs
     
     # OpenAI
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     
+    # LLM backend
+    llm_provider: str = os.getenv("LLM_PROVIDER", "openai")  # openai, compatible or stub
+    llm_model: str = os.getenv("LLM_MODEL", "gpt-4-turbo-preview")
+    llm_base_url: str = os.getenv("LLM_BASE_URL", "")  # OpenAI-compatible endpoint, e.g. http://localhost:8080/v1
+    llm_api_key: str = os.getenv("LLM_API_KEY", "")  # compatible endpoints, defaults to OPENAI_API_KEY
+    llm_timeout: float = float(os.getenv("LLM_TIMEOUT", "60"))  # seconds per request
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "2"))  # client retries on 429 and 5xx
+    
+    # Offline stub LLM server
+    llm_stub_url: str = os.getenv("LLM_STUB_URL", "http://127.0.0.1:8100/v1")
+    llm_stub_latency_ms: int = int(os.getenv("LLM_STUB_LATENCY_MS", "200"))  # before the first token
+    llm_stub_ms_per_token: float = float(os.getenv("LLM_STUB_MS_PER_TOKEN", "10"))
+    llm_stub_completion_tokens: int = int(os.getenv("LLM_STUB_COMPLETION_TOKENS", "300"))
+    llm_stub_rate_limit_rate: float = float(os.getenv("LLM_STUB_RATE_LIMIT_RATE", "0"))  # share of requests answered 429
+    llm_stub_malformed_rate: float = float(os.getenv("LLM_STUB_MALFORMED_RATE", "0"))  # share of replies that are not valid JSON
+    llm_stub_seed: int = int(os.getenv("LLM_STUB_SEED", "42"))
+    
     # Schedule
     fetch_interval: int = int(os.getenv("FETCH_INTERVAL", "43200"))  # 12 hours
     post_interval: int = int(os.getenv("POST_INTERVAL", "3600"))  # 1 hour
@@ -39,9 +57,114 @@ class Settings(BaseSettings):
     x_rate_limit: int = 300  # requests per 15 minutes
     linkedin_rate_limit: int = 100  # posts per day
     
+    # Pooled upstream HTTP clients (HTTP/2 needs the h2 package)
+    linkedin_http_timeout: float = float(os.getenv("LINKEDIN_HTTP_TIMEOUT", "30"))  # seconds per request
+    linkedin_http_max_connections: int = int(os.getenv("LINKEDIN_HTTP_MAX_CONNECTIONS", "10"))
+    linkedin_http_keepalive: float = float(os.getenv("LINKEDIN_HTTP_KEEPALIVE", "60"))  # seconds an idle connection stays open
+    linkedin_http2: bool = os.getenv("LINKEDIN_HTTP2", "False").lower() == "true"
+    x_http_timeout: float = float(os.getenv("X_HTTP_TIMEOUT", "30"))
+    x_http_max_connections: int = int(os.getenv("X_HTTP_MAX_CONNECTIONS", "10"))
+    x_http_keepalive: float = float(os.getenv("X_HTTP_KEEPALIVE", "60"))
+    x_http2: bool = os.getenv("X_HTTP2", "False").lower() == "true"
+    llm_http_max_connections: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))  # timeout is LLM_TIMEOUT
+    llm_http_keepalive: float = float(os.getenv("LLM_HTTP_KEEPALIVE", "60"))
+    llm_http2: bool = os.getenv("LLM_HTTP2", "False").lower() == "true"
+    
+    # Credential health checks behind /api/status
+    health_check_ttl: int = int(os.getenv("HEALTH_CHECK_TTL", "300"))  # seconds results are reused
+    health_check_timeout: float = float(os.getenv("HEALTH_CHECK_TIMEOUT", "10"))  # seconds per integration
+    
+    # Image uploads for media posts
+    media_dir: str = os.getenv("MEDIA_DIR", "./media")  # where attached images are stored
+    media_upload_chunk_size: int = int(os.getenv("MEDIA_UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # bytes read from disk at a time
+    media_upload_concurrency: int = int(os.getenv("MEDIA_UPLOAD_CONCURRENCY", "4"))  # parts in flight for multipart uploads
+    media_multipart_threshold: int = int(os.getenv("MEDIA_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))  # offer multipart from this size
+    
+    # Publish outbox
+    publisher_enabled: bool = os.getenv("PUBLISHER_ENABLED", "True").lower() == "true"
+    publisher_poll_interval: int = int(os.getenv("PUBLISHER_POLL_INTERVAL", "30"))  # seconds between idle polls
+    publisher_concurrency: int = int(os.getenv("PUBLISHER_CONCURRENCY", "2"))  # LinkedIn calls in flight
+    publisher_max_attempts: int = int(os.getenv("PUBLISHER_MAX_ATTEMPTS", "6"))
+    publisher_backoff_base: float = float(os.getenv("PUBLISHER_BACKOFF_BASE", "30"))  # seconds, doubled per attempt
+    publisher_backoff_max: float = float(os.getenv("PUBLISHER_BACKOFF_MAX", "3600"))
+    publisher_lease_seconds: int = int(os.getenv("PUBLISHER_LEASE_SECONDS", "120"))
+    
+    # Post analytics poller
+    analytics_enabled: bool = os.getenv("ANALYTICS_ENABLED", "True").lower() == "true"
+    analytics_poll_interval: int = int(os.getenv("ANALYTICS_POLL_INTERVAL", "300"))  # seconds between passes
+    analytics_batch_size: int = int(os.getenv("ANALYTICS_BATCH_SIZE", "20"))  # posts per socialActions request
+    analytics_age_fraction: float = float(os.getenv("ANALYTICS_AGE_FRACTION", "0.25"))  # re-poll after this share of the post's age
+    analytics_min_interval: int = int(os.getenv("ANALYTICS_MIN_INTERVAL", "900"))  # seconds
+    analytics_max_interval: int = int(os.getenv("ANALYTICS_MAX_INTERVAL", "86400"))
+    analytics_max_age_days: int = int(os.getenv("ANALYTICS_MAX_AGE_DAYS", "30"))  # stop polling older posts
+    
+    # Draft buffer: publish ticks take pre-generated drafts instead of calling the LLM
+    draft_buffer_enabled: bool = os.getenv("DRAFT_BUFFER_ENABLED", "True").lower() == "true"
+    draft_buffer_target: int = int(os.getenv("DRAFT_BUFFER_TARGET", "3"))  # drafts kept ready
+    draft_buffer_low_water: int = int(os.getenv("DRAFT_BUFFER_LOW_WATER", "2"))  # refill below this many
+    draft_buffer_check_interval: int = int(os.getenv("DRAFT_BUFFER_CHECK_INTERVAL", "600"))  # seconds, doubled while generation fails
+    draft_buffer_max_topic_age_hours: int = int(os.getenv("DRAFT_BUFFER_MAX_TOPIC_AGE_HOURS", "72"))  # expire drafts on older topics
+    
+    # Slot dispatcher (slot times and daily cap live in the settings table)
+    slot_dispatcher_refresh_seconds: int = int(os.getenv("SLOT_DISPATCHER_REFRESH_SECONDS", "900"))  # resync with the database
+    
+    # Clustering
+    cluster_k_selection: str = os.getenv("CLUSTER_K_SELECTION", "heuristic")  # heuristic or auto
+    cluster_k_min: int = int(os.getenv("CLUSTER_K_MIN", "2"))
+    cluster_k_max: int = int(os.getenv("CLUSTER_K_MAX", "30"))
+    cluster_k_metric: str = os.getenv("CLUSTER_K_METRIC", "silhouette")  # silhouette or davies_bouldin
+    cluster_k_sample_size: int = int(os.getenv("CLUSTER_K_SAMPLE_SIZE", "2000"))
+    cluster_k_time_budget: float = float(os.getenv("CLUSTER_K_TIME_BUDGET", "10"))  # seconds
+    cluster_k_n_jobs: int = int(os.getenv("CLUSTER_K_N_JOBS", "-1"))  # -1 = all cores
+    cluster_k_cache_ttl: int = int(os.getenv("CLUSTER_K_CACHE_TTL", "21600"))  # 6 hours
+    cluster_lsa_enabled: bool = os.getenv("CLUSTER_LSA_ENABLED", "False").lower() == "true"
+    cluster_lsa_max_features: int = int(os.getenv("CLUSTER_LSA_MAX_FEATURES", "5000"))
+    cluster_lsa_components: int = int(os.getenv("CLUSTER_LSA_COMPONENTS", "100"))
+    cluster_registry_window_hours: int = int(os.getenv("CLUSTER_REGISTRY_WINDOW_HOURS", "168"))  # 7 days
+    cluster_match_threshold: float = float(os.getenv("CLUSTER_MATCH_THRESHOLD", "0.3"))
+    cluster_centroid_terms: int = 50  # Terms kept per stored centroid
+    cluster_centroid_decay: float = 0.7  # Weight of history when merging a run into a cluster
+    
+    # Related topics index
+    related_index_path: str = os.getenv("RELATED_INDEX_PATH", "./related_index.npz")
+    related_index_tables: int = int(os.getenv("RELATED_INDEX_TABLES", "16"))
+    related_index_bits: int = int(os.getenv("RELATED_INDEX_BITS", "16"))
+    
+    # LLM response cache
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    llm_cache_path: str = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    llm_cache_max_bytes: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+    llm_cache_ttl: int = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # 7 days, 0 = no expiry
+    
+    # Request coalescing for expensive endpoints
+    singleflight_result_ttl: float = float(os.getenv("SINGLEFLIGHT_RESULT_TTL", "5"))  # seconds a finished result is shared, 0 = in-flight only
+    
+    # Duplicate post check
+    post_dedup_enabled: bool = os.getenv("POST_DEDUP_ENABLED", "True").lower() == "true"
+    post_dedup_threshold: float = float(os.getenv("POST_DEDUP_THRESHOLD", "0.6"))  # cosine or topic Jaccard
+    post_dedup_window_days: int = int(os.getenv("POST_DEDUP_WINDOW_DAYS", "14"))
+    
+    # Batch generation
+    batch_generation_enabled: bool = os.getenv("BATCH_GENERATION_ENABLED", "False").lower() == "true"
+    batch_generation_interval: int = int(os.getenv("BATCH_GENERATION_INTERVAL", "86400"))  # 1 day
+    batch_posts_per_run: int = int(os.getenv("BATCH_POSTS_PER_RUN", "8"))
+    batch_topics_per_post: int = 3
+    batch_generation_concurrency: int = int(os.getenv("BATCH_GENERATION_CONCURRENCY", "4"))  # posts in flight
+    
     # Content settings
     min_post_length: int = 900
     max_post_length: int = 1500
+    post_generation_max_attempts: int = int(os.getenv("POST_GENERATION_MAX_ATTEMPTS", "3"))  # LLM calls per post
+    post_generation_token_budget: int = int(os.getenv("POST_GENERATION_TOKEN_BUDGET", "0"))  # prompt + completion tokens per post, 0 = sized for every attempt
+    daily_token_budget: int = int(os.getenv("DAILY_TOKEN_BUDGET", "100000"))  # all generation per UTC day, 0 = unlimited
+    post_context_token_limit: int = int(os.getenv("POST_CONTEXT_TOKEN_LIMIT", "600"))  # topic context in the prompt
+    post_completion_max_tokens: int = int(os.getenv("POST_COMPLETION_MAX_TOKENS", "500"))
+    topic_summary_max_chars: int = int(os.getenv("TOPIC_SUMMARY_MAX_CHARS", "300"))  # extractive summary per topic
+    post_generation_candidates: int = int(os.getenv("POST_GENERATION_CANDIDATES", "1"))  # drafts scored per attempt, each one a full completion
+    post_generation_candidate_mode: str = os.getenv("POST_GENERATION_CANDIDATE_MODE", "n")  # n (one request) or parallel
+    post_quality_gate_enabled: bool = os.getenv("POST_QUALITY_GATE_ENABLED", "True").lower() == "true"  # hold drafts under min_quality_score
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # in-flight LLM requests per generator
     
     # Subreddits and hashtags
     subreddits: list = ["androiddev", "android", "Kotlin", "JetpackCompose"]
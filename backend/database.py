@@ -1,6 +1,6 @@
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Integer, Boolean, Float, JSON
+from sqlalchemy import create_engine, inspect, text, exists, Column, String, Text, DateTime, Integer, Boolean, Float, JSON, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -22,6 +22,7 @@ class Topic(Base):
     source_id = Column(String(255), unique=True)
     title = Column(Text)
     content = Column(Text, nullable=True)
+    summary = Column(Text, nullable=True)  # Extractive summary of content used in prompts
     url = Column(Text)
     author = Column(String(255))
     score = Column(Float, default=0)
@@ -29,8 +30,22 @@ class Topic(Base):
     hashtags = Column(JSON, nullable=True)
     fetched_at = Column(DateTime, default=datetime.utcnow)
     cluster_id = Column(Integer, nullable=True)
-    rank_score = Column(Float, nullable=True)
+    rank_score = Column(Float, nullable=True, index=True)
     processed = Column(Boolean, default=False)
+    used_at = Column(DateTime, nullable=True, index=True)  # When a post first used the topic
+
+
+class Cluster(Base):
+    __tablename__ = "clusters"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    centroid = Column(JSON)  # {term: weight} for the strongest centroid terms
+    top_terms = Column(JSON)  # List of the most representative terms
+    size = Column(Integer, default=0)  # Topics assigned across all runs
+    total_engagement = Column(Float, default=0)  # Sum of score + comments of assigned topics
+    run_count = Column(Integer, default=0)  # Clustering runs this cluster appeared in
+    first_seen = Column(DateTime, default=datetime.utcnow)
+    last_seen = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 class LinkedInPost(Base):
@@ -46,10 +61,71 @@ class LinkedInPost(Base):
     sources = Column(JSON)  # List of source URLs
     created_at = Column(DateTime, default=datetime.utcnow)
     scheduled_at = Column(DateTime, nullable=True)
-    posted_at = Column(DateTime, nullable=True)
-    status = Column(String(50), default="queued")  # queued, posted, failed, edited
+    posted_at = Column(DateTime, nullable=True, index=True)
+    status = Column(String(50), default="queued")  # ready, queued, scheduled, publishing, posted, failed, edited, expired, low_quality
     linkedin_post_id = Column(String(255), nullable=True)
     error_message = Column(Text, nullable=True)
+    prompt_tokens = Column(Integer, default=0)  # Prompt tokens across all generation attempts
+    completion_tokens = Column(Integer, default=0)
+    media_paths = Column(JSON, nullable=True)  # Image files attached when publishing
+    metrics_checked_at = Column(DateTime, nullable=True)  # Last analytics poll
+    quality_score = Column(Float, nullable=True)  # Local 1-10 score, see quality.py
+
+
+class PostTopic(Base):
+    __tablename__ = "post_topics"
+    
+    post_id = Column(Integer, ForeignKey("linkedin_posts.id"), primary_key=True)
+    topic_id = Column(Integer, ForeignKey("topics.id"), primary_key=True, index=True)
+
+
+class PublishOutbox(Base):
+    __tablename__ = "publish_outbox"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("linkedin_posts.id"), unique=True, index=True)
+    idempotency_key = Column(String(64), unique=True)  # Sent with every attempt for this post
+    status = Column(String(20), default="pending", index=True)  # pending, publishing, done, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)
+    lease_owner = Column(String(100), nullable=True)  # Worker holding the row while it publishes
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    published_at = Column(DateTime, nullable=True, index=True)
+
+
+class MediaAsset(Base):
+    __tablename__ = "media_assets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True)  # SHA-256 of the file
+    asset_urn = Column(String(255))  # urn:li:digitalmediaAsset:...
+    filename = Column(String(255))
+    size_bytes = Column(Integer)
+    uploaded_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PostMetric(Base):
+    __tablename__ = "post_metrics"
+    
+    # One row per change, polls that find the same counts only touch metrics_checked_at
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("linkedin_posts.id"), index=True)
+    collected_at = Column(DateTime, default=datetime.utcnow)
+    reactions = Column(Integer, default=0)
+    comments = Column(Integer, default=0)
+    impressions = Column(Integer, nullable=True)  # Only when LinkedIn reports it
+
+
+class TokenUsage(Base):
+    __tablename__ = "token_usage"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(String(10), unique=True, index=True)  # UTC date, YYYY-MM-DD
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    generations = Column(Integer, default=0)  # Generation runs, including ones that produced no post
 
 
 class SystemLog(Base):
@@ -72,12 +148,97 @@ class Settings(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+def _add_missing_columns():
+    # create_all only creates missing tables, so add columns introduced since
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def _add_missing_indexes():
+    # Indexes declared on tables that already existed
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+
+def backfill_post_topics(db: Session) -> int:
+    """Fill post_topics from LinkedInPost.topic_ids for posts created before the link table.
+    
+    Only runs while the table is empty. Sets Topic.used_at to the first post
+    that used each topic. Returns the number of links written.
+    """
+    if db.query(PostTopic).first() is not None:
+        return 0
+    
+    first_used = {}
+    links = []
+    for post_id, topic_ids, created_at in db.query(LinkedInPost.id, LinkedInPost.topic_ids, LinkedInPost.created_at):
+        for topic_id in set(topic_ids or []):
+            links.append((post_id, topic_id))
+            if topic_id not in first_used or (created_at and created_at < first_used[topic_id]):
+                first_used[topic_id] = created_at
+    
+    # Skip links to topics that have been deleted since
+    existing = set()
+    ids = list(first_used)
+    for offset in range(0, len(ids), 500):
+        existing.update(topic_id for (topic_id,) in db.query(Topic.id).filter(Topic.id.in_(ids[offset:offset + 500])))
+    
+    db.bulk_insert_mappings(PostTopic, [
+        {"post_id": post_id, "topic_id": topic_id} for post_id, topic_id in links if topic_id in existing
+    ])
+    db.bulk_update_mappings(Topic, [
+        {"id": topic_id, "used_at": first_used[topic_id] or datetime.utcnow()} for topic_id in existing
+    ])
+    db.commit()
+    return sum(1 for _, topic_id in links if topic_id in existing)
+
+
+def unused_topic():
+    """Anti-join condition for topics no post has used, probed through the post_topics topic_id index."""
+    return ~exists().where(PostTopic.topic_id == Topic.id)
+
+
+def link_post_topics(db: Session, post: LinkedInPost, topics: list):
+    """Record the topics a post consumed. Written with the caller's commit."""
+    db.flush()  # Assigns post.id
+    now = datetime.utcnow()
+    for topic in topics:
+        db.add(PostTopic(post_id=post.id, topic_id=topic.id))
+        if topic.used_at is None:
+            topic.used_at = now
+
+
+def unlink_post_topics(db: Session, post_id: int):
+    """Drop a deleted post's links and free the topics no other post uses."""
+    topic_ids = [topic_id for (topic_id,) in db.query(PostTopic.topic_id).filter(PostTopic.post_id == post_id)]
+    db.query(PostTopic).filter(PostTopic.post_id == post_id).delete(synchronize_session=False)
+    if topic_ids:
+        db.query(Topic).filter(Topic.id.in_(topic_ids), unused_topic()).update(
+            {Topic.used_at: None}, synchronize_session=False
+        )
+
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _add_missing_indexes()
     
     # Initialize default settings
     db = SessionLocal()
     try:
+        # Databases from before the link table keep their consumption history
+        backfill_post_topics(db)
+        
         default_settings = [
             ("fetch_interval", str(12 * 3600)),  # 12 hours
             ("post_interval", str(3600)),  # 1 hour
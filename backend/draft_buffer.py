@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import SessionLocal, LinkedInPost, PostTopic, Topic
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Longest the producer waits between refill attempts while generation keeps failing
+MAX_BACKOFF_FACTOR = 16
+
+
+class DraftBuffer:
+    """Validated drafts generated ahead of time, so publish ticks never wait on the LLM.
+
+    Drafts wait in the "ready" status. Once fewer than draft_buffer_low_water
+    are ready, the producer generates them one at a time, up to
+    draft_buffer_target, and backs off while generation comes back empty.
+    take() hands out the oldest ready draft and wakes the producer.
+    Drafts whose source topics were all fetched more than
+    draft_buffer_max_topic_age_hours ago expire.
+    """
+    
+    def __init__(self, generate: Callable[..., Awaitable[Optional[Dict]]], session_factory=None):
+        self.generate = generate
+        self.session_factory = session_factory or SessionLocal
+        self._wake = asyncio.Event()
+        self._task = None
+        self._paused = False
+        self._starved = 0  # Refills in a row that could not reach the target
+    
+    def ready(self, db: Session) -> List[LinkedInPost]:
+        return db.query(LinkedInPost).filter(
+            LinkedInPost.status == "ready"
+        ).order_by(LinkedInPost.created_at, LinkedInPost.id).all()
+    
+    def expire_stale(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Expire ready drafts whose newest source topic is past the age limit."""
+        cutoff = (now or datetime.utcnow()) - timedelta(hours=settings.draft_buffer_max_topic_age_hours)
+        stale_ids = [post_id for (post_id,) in db.query(PostTopic.post_id).join(
+            Topic, Topic.id == PostTopic.topic_id
+        ).join(
+            LinkedInPost, LinkedInPost.id == PostTopic.post_id
+        ).filter(
+            LinkedInPost.status == "ready"
+        ).group_by(PostTopic.post_id).having(func.max(Topic.fetched_at) < cutoff)]
+        if not stale_ids:
+            return 0
+        
+        # The topics stay consumed so the same stale material is not drafted again
+        db.query(LinkedInPost).filter(LinkedInPost.id.in_(stale_ids)).update(
+            {LinkedInPost.status: "expired"}, synchronize_session=False
+        )
+        db.commit()
+        metrics.incr("draft_buffer.expired", len(stale_ids))
+        logger.info(f"Expired {len(stale_ids)} drafts with aged out topics")
+        return len(stale_ids)
+    
+    def take(self, db: Session) -> Optional[LinkedInPost]:
+        """The oldest ready draft, moved back to "queued" for publishing."""
+        self.expire_stale(db)
+        ready = self.ready(db)
+        if not ready:
+            metrics.incr("draft_buffer.empty")
+            self._wake.set()
+            return None
+        
+        post = ready[0]
+        post.status = "queued"
+        db.commit()
+        metrics.incr("draft_buffer.taken")
+        if len(ready) - 1 < settings.draft_buffer_low_water:
+            self._wake.set()
+        return post
+    
+    async def refill(self, force: bool = False) -> int:
+        """Generate drafts up to the target once the buffer is below its low-water mark. Returns drafts made."""
+        db = self.session_factory()
+        try:
+            self.expire_stale(db)
+            have = len(self.ready(db))
+            if have >= settings.draft_buffer_low_water and not force:
+                self._starved = 0
+                return 0
+            
+            made = 0
+            for _ in range(settings.draft_buffer_target - have):
+                # Saved straight into the buffer, never visible as a queued post
+                post_data = await self.generate(db, status="ready")
+                if not post_data:
+                    break
+                if post_data.get("status") == "low_quality":
+                    # Held for review, not something to hand to the publish tick
+                    continue
+                made += 1
+            
+            self._starved = self._starved + 1 if have + made < settings.draft_buffer_target else 0
+            metrics.incr("draft_buffer.generated", made)
+            if made:
+                logger.info(f"Draft buffer refilled with {made} drafts, {have + made} ready")
+            return made
+        finally:
+            db.close()
+    
+    def _idle_seconds(self) -> float:
+        return settings.draft_buffer_check_interval * min(2 ** self._starved, MAX_BACKOFF_FACTOR)
+    
+    async def run_forever(self):
+        while True:
+            self._wake.clear()
+            if not self._paused:
+                try:
+                    await self.refill()
+                except Exception as e:
+                    self._starved += 1
+                    logger.error(f"Error refilling draft buffer: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._idle_seconds())
+            except asyncio.TimeoutError:
+                pass
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self.run_forever())
+            logger.info("Draft buffer started")
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            logger.info("Draft buffer stopped")
+    
+    def pause(self):
+        self._paused = True
+    
+    def resume(self):
+        self._paused = False
+        self._wake.set()
+    
+    def stats(self, db: Session) -> Dict:
+        ready = self.ready(db)
+        return {
+            "ready": len(ready),
+            "target": settings.draft_buffer_target,
+            "low_water": settings.draft_buffer_low_water,
+            "oldest_ready_at": ready[0].created_at if ready else None,
+            "expired": db.query(LinkedInPost).filter(LinkedInPost.status == "expired").count(),
+            "generated": int(metrics.get("draft_buffer.generated")),
+            "taken": int(metrics.get("draft_buffer.taken")),
+            "empty_ticks": int(metrics.get("draft_buffer.empty"))
+        }
\ No newline at end of file
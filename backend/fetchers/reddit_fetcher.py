@@ -1,4 +1,3 @@
-import praw
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict
@@ -8,6 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import Topic
 from config import settings
+from clients import clients
 import time
 
 logger = logging.getLogger(__name__)
@@ -21,11 +21,7 @@ class RedditFetcher:
         
     def _init_reddit(self):
         if not self.reddit:
-            self.reddit = praw.Reddit(
-                client_id=settings.reddit_client_id,
-                client_secret=settings.reddit_client_secret,
-                user_agent=settings.reddit_user_agent
-            )
+            self.reddit = clients.reddit()
     
     def _check_rate_limit(self):
         if datetime.now() > self.rate_limit_reset:
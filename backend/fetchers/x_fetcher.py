@@ -1,4 +1,3 @@
-import httpx
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict
@@ -8,6 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import Topic
 from config import settings
+from clients import clients
 import time
 import json
 
@@ -46,76 +46,77 @@ class XFetcher:
         
         topics_data = []
         
-        async with httpx.AsyncClient() as client:
-            for hashtag in settings.x_hashtags:
-                try:
-                    self._check_rate_limit()
+        # Shared keep-alive pool, connections are reused across fetch runs
+        client = clients.http("x")
+        for hashtag in settings.x_hashtags:
+            try:
+                self._check_rate_limit()
+                
+                # Search for recent tweets with the hashtag
+                params = {
+                    "query": f"{hashtag} -is:retweet lang:en",
+                    "max_results": 20,
+                    "tweet.fields": "created_at,author_id,public_metrics,entities",
+                    "expansions": "author_id",
+                    "user.fields": "username"
+                }
+                
+                response = await client.get(
+                    f"{self.base_url}/tweets/search/recent",
+                    headers=self._get_headers(),
+                    params=params
+                )
+                
+                self.requests_made += 1
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    tweets = data.get("data", [])
+                    users = {u["id"]: u["username"] for u in data.get("includes", {}).get("users", [])}
                     
-                    # Search for recent tweets with the hashtag
-                    params = {
-                        "query": f"{hashtag} -is:retweet lang:en",
-                        "max_results": 20,
-                        "tweet.fields": "created_at,author_id,public_metrics,entities",
-                        "expansions": "author_id",
-                        "user.fields": "username"
-                    }
-                    
-                    response = await client.get(
-                        f"{self.base_url}/tweets/search/recent",
-                        headers=self._get_headers(),
-                        params=params
-                    )
-                    
-                    self.requests_made += 1
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        tweets = data.get("data", [])
-                        users = {u["id"]: u["username"] for u in data.get("includes", {}).get("users", [])}
+                    for tweet in tweets:
+                        # Skip if already exists
+                        existing = db.query(Topic).filter(
+                            Topic.source_id == f"x_{tweet['id']}"
+                        ).first()
                         
-                        for tweet in tweets:
-                            # Skip if already exists
-                            existing = db.query(Topic).filter(
-                                Topic.source_id == f"x_{tweet['id']}"
-                            ).first()
-                            
-                            if existing:
-                                continue
-                            
-                            metrics = tweet.get("public_metrics", {})
-                            
-                            topic = Topic(
-                                source="x",
-                                source_id=f"x_{tweet['id']}",
-                                title=tweet["text"][:200],
-                                content=tweet["text"],
-                                url=f"https://twitter.com/{users.get(tweet['author_id'], 'user')}/status/{tweet['id']}",
-                                author=users.get(tweet["author_id"], "unknown"),
-                                score=float(metrics.get("like_count", 0) + metrics.get("retweet_count", 0) * 2),
-                                engagement=metrics.get("reply_count", 0) + metrics.get("quote_count", 0),
-                                hashtags=[hashtag] + self._extract_hashtags(tweet),
-                                fetched_at=datetime.utcnow()
-                            )
-                            
-                            db.add(topic)
-                            topics_data.append({
-                                "title": topic.title,
-                                "url": topic.url,
-                                "score": topic.score
-                            })
-                            
-                            logger.info(f"Fetched X post: {tweet['text'][:50]}...")
-                    
-                    elif response.status_code == 429:
-                        logger.warning("X API rate limit hit. Waiting...")
-                        self.rate_limit_reset = datetime.now() + timedelta(minutes=15)
-                        break
-                    else:
-                        logger.error(f"X API error: {response.status_code} - {response.text}")
+                        if existing:
+                            continue
                         
-                except Exception as e:
-                    logger.error(f"Error fetching X posts for {hashtag}: {str(e)}")
-                    continue
+                        metrics = tweet.get("public_metrics", {})
+                        
+                        topic = Topic(
+                            source="x",
+                            source_id=f"x_{tweet['id']}",
+                            title=tweet["text"][:200],
+                            content=tweet["text"],
+                            url=f"https://twitter.com/{users.get(tweet['author_id'], 'user')}/status/{tweet['id']}",
+                            author=users.get(tweet["author_id"], "unknown"),
+                            score=float(metrics.get("like_count", 0) + metrics.get("retweet_count", 0) * 2),
+                            engagement=metrics.get("reply_count", 0) + metrics.get("quote_count", 0),
+                            hashtags=[hashtag] + self._extract_hashtags(tweet),
+                            fetched_at=datetime.utcnow()
+                        )
+                        
+                        db.add(topic)
+                        topics_data.append({
+                            "title": topic.title,
+                            "url": topic.url,
+                            "score": topic.score
+                        })
+                        
+                        logger.info(f"Fetched X post: {tweet['text'][:50]}...")
+                
+                elif response.status_code == 429:
+                    logger.warning("X API rate limit hit. Waiting...")
+                    self.rate_limit_reset = datetime.now() + timedelta(minutes=15)
+                    break
+                else:
+                    logger.error(f"X API error: {response.status_code} - {response.text}")
+                    
+            except Exception as e:
+                logger.error(f"Error fetching X posts for {hashtag}: {str(e)}")
+                continue
         
         try:
             db.commit()
@@ -0,0 +1,147 @@
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+from linkedin_poster import LinkedInPoster
+from clients import clients, ClientRegistry
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+INTEGRATIONS = ("linkedin", "openai", "reddit", "x")
+
+
+class Unconfigured(Exception):
+    """The integration has no credentials to check."""
+
+
+class CredentialHealth:
+    """Cached reachability of each integration's credentials.
+
+    The LinkedIn, LLM, Reddit and X checks run concurrently, each bounded by
+    health_check_timeout, and their results are kept for health_check_ttl
+    seconds. snapshot() never waits on the network: it returns the cached
+    results and starts a refresh in the background once they are stale.
+    """
+    
+    def __init__(self, poster: Optional[LinkedInPoster] = None, registry: Optional[ClientRegistry] = None):
+        self.poster = poster or LinkedInPoster()
+        self.clients = registry or clients
+        self._results = {name: {"status": "unknown", "message": None, "latency_ms": None} for name in INTEGRATIONS}
+        self._checked_at = None  # datetime of the last completed refresh
+        self._checked_monotonic = None
+        self._refreshing = None
+        self._task = None
+    
+    async def refresh(self) -> Dict:
+        """Run every check now. Concurrent callers share one run."""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._run_checks())
+        return await asyncio.shield(self._refreshing)
+    
+    async def _run_checks(self) -> Dict:
+        checks = {
+            "linkedin": self._check_linkedin,
+            "openai": self._check_llm,
+            "reddit": self._check_reddit,
+            "x": self._check_x
+        }
+        results = await asyncio.gather(*[self._check(name, check) for name, check in checks.items()])
+        # Swap in the whole dict so readers never see a half-updated set
+        self._results = dict(zip(checks, results))
+        self._checked_at = datetime.utcnow()
+        self._checked_monotonic = time.monotonic()
+        return self._results
+    
+    async def _check(self, name: str, check: Callable[[], Awaitable[Optional[str]]]) -> Dict:
+        start = time.perf_counter()
+        try:
+            message = await asyncio.wait_for(check(), timeout=settings.health_check_timeout)
+            status = "ok"
+        except Unconfigured:
+            return {"status": "unconfigured", "message": None, "latency_ms": None}
+        except asyncio.TimeoutError:
+            status, message = "failed", f"No answer within {settings.health_check_timeout:g}s"
+        except Exception as e:
+            status, message = "failed", str(e)
+        
+        metrics.incr(f"health.{name}.checks")
+        if status != "ok":
+            metrics.incr(f"health.{name}.failures")
+            logger.warning(f"{name} credential check failed: {message}")
+        return {"status": status, "message": message, "latency_ms": round((time.perf_counter() - start) * 1000)}
+    
+    async def _check_linkedin(self) -> Optional[str]:
+        if not self.poster.has_credentials():
+            raise Unconfigured()
+        if not await self.poster.validate_credentials(timeout=settings.health_check_timeout):
+            raise RuntimeError("LinkedIn rejected the access token")
+        return None
+    
+    async def _check_llm(self) -> Optional[str]:
+        provider = self.clients.llm_provider()
+        if provider.name == "openai" and not settings.openai_api_key:
+            raise Unconfigured()
+        await self.clients.async_llm_client().models.list()
+        return f"{provider.name}: {provider.model}"
+    
+    async def _check_reddit(self) -> Optional[str]:
+        if not settings.reddit_client_id:
+            raise Unconfigured()
+        
+        # PRAW is synchronous, keep it off the event loop
+        def probe():
+            next(iter(self.clients.reddit().subreddit("androiddev").hot(limit=1)), None)
+        
+        await asyncio.to_thread(probe)
+        return None
+    
+    async def _check_x(self) -> Optional[str]:
+        if not settings.x_bearer_token:
+            raise Unconfigured()
+        response = await self.clients.http("x").get(
+            "https://api.twitter.com/2/users/by/username/XDevelopers",
+            headers={"Authorization": f"Bearer {settings.x_bearer_token}"}
+        )
+        # A rate limited token was still accepted
+        if response.status_code == 429:
+            return "Rate limited"
+        if response.status_code != 200:
+            raise RuntimeError(f"X API error: {response.status_code}")
+        return None
+    
+    def is_stale(self) -> bool:
+        return self._checked_monotonic is None or time.monotonic() - self._checked_monotonic > settings.health_check_ttl
+    
+    def snapshot(self) -> Dict:
+        """The cached results, refreshed in the background when stale."""
+        stale = self.is_stale()
+        if stale and (self._refreshing is None or self._refreshing.done()):
+            try:
+                self._refreshing = asyncio.get_running_loop().create_task(self._run_checks())
+            except RuntimeError:
+                pass  # No event loop, e.g. called from a script
+        return {"integrations": self._results, "checked_at": self._checked_at, "stale": stale}
+    
+    async def run_forever(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error checking credentials: {str(e)}")
+            await asyncio.sleep(settings.health_check_ttl)
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self.run_forever())
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Global credential health instance
+credential_health = CredentialHealth()
\ No newline at end of file
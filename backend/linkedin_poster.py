@@ -1,19 +1,23 @@
 import httpx
 import logging
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from sqlalchemy.orm import Session
 from database import LinkedInPost
 from config import settings
+from clients import clients
+from media_upload import MediaUploader, MediaUploadError
 
 logger = logging.getLogger(__name__)
 
 
 class LinkedInPoster:
-    def __init__(self):
+    def __init__(self, http: Optional[httpx.AsyncClient] = None):
+        self.http = http  # Defaults to the shared linkedin pool
         self.access_token = settings.linkedin_access_token
         self.person_urn = settings.linkedin_person_urn
-        self.api_url = "https://api.linkedin.com/v2"
+        self.api_url = settings.linkedin_api_url
+        self.uploader = MediaUploader(http=http)
         
     def has_credentials(self) -> bool:
         return bool(self.access_token and self.person_urn)
@@ -35,88 +39,127 @@ class LinkedInPoster:
         if post.status == "posted":
             return {"success": False, "message": "Post already published"}
         
+        result = await self.upload_media(db, post.media_paths or [])
+        if result["success"]:
+            result = await self.publish(post.content, media=result["assets"])
+        
+        if result["success"]:
+            post.status = "posted"
+            post.posted_at = datetime.utcnow()
+            post.linkedin_post_id = result["post_id"]
+            db.commit()
+            
+            logger.info(f"Successfully posted to LinkedIn: {result['post_id']}")
+            
+            return {
+                "success": True,
+                "message": "Successfully posted to LinkedIn",
+                "post_id": result["post_id"],
+                "url": self._get_post_url(result["post_id"])
+            }
+        
+        logger.error(result["message"])
+        
+        post.status = "failed"
+        post.error_message = result["message"]
+        db.commit()
+        
+        return {
+            "success": False,
+            "message": result["message"]
+        }
+    
+    async def upload_media(self, db: Session, paths: List[str]) -> Dict:
+        """Upload a post's images, shaped like a publish() result with the asset URNs."""
         try:
-            # Prepare LinkedIn API request
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json",
-                "X-Restli-Protocol-Version": "2.0.0"
+            assets = await self.uploader.upload_all(db, paths)
+        except MediaUploadError as e:
+            return {
+                "success": False,
+                "status_code": e.status_code,
+                "post_id": None,
+                "retry_after": None,
+                "retryable": e.retryable,
+                "message": str(e)
             }
-            
-            payload = {
-                "author": f"urn:li:person:{self.person_urn}",
-                "lifecycleState": "PUBLISHED",
-                "specificContent": {
-                    "com.linkedin.ugc.ShareContent": {
-                        "shareCommentary": {
-                            "text": post.content
-                        },
-                        "shareMediaCategory": "NONE"
-                    }
-                },
-                "visibility": {
-                    "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
+        return {"success": True, "assets": assets}
+    
+    async def publish(self, content: str, idempotency_key: Optional[str] = None, media: Optional[List[str]] = None) -> Dict:
+        """One ugcPosts call, without touching the database.
+        
+        Returns success, the share URN as post_id, the HTTP status_code (None
+        when no response arrived), retry_after seconds from the response and
+        an error message. media is a list of uploaded image asset URNs.
+        """
+        # Prepare LinkedIn API request
+        headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+            "X-Restli-Protocol-Version": "2.0.0"
+        }
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        
+        payload = {
+            "author": f"urn:li:person:{self.person_urn}",
+            "lifecycleState": "PUBLISHED",
+            "specificContent": {
+                "com.linkedin.ugc.ShareContent": {
+                    "shareCommentary": {
+                        "text": content
+                    },
+                    "shareMediaCategory": "NONE"
                 }
+            },
+            "visibility": {
+                "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
             }
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.api_url}/ugcPosts",
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 201:
-                    # Successfully posted
-                    response_data = response.json()
-                    post_urn = response_data.get("id", "")
-                    
-                    post.status = "posted"
-                    post.posted_at = datetime.utcnow()
-                    post.linkedin_post_id = post_urn
-                    db.commit()
-                    
-                    logger.info(f"Successfully posted to LinkedIn: {post_urn}")
-                    
-                    return {
-                        "success": True,
-                        "message": "Successfully posted to LinkedIn",
-                        "post_id": post_urn,
-                        "url": self._get_post_url(post_urn)
-                    }
-                else:
-                    error_msg = f"LinkedIn API error: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    
-                    post.status = "failed"
-                    post.error_message = error_msg
-                    db.commit()
-                    
-                    return {
-                        "success": False,
-                        "message": error_msg
-                    }
-                    
+        }
+        if media:
+            share = payload["specificContent"]["com.linkedin.ugc.ShareContent"]
+            share["shareMediaCategory"] = "IMAGE"
+            share["media"] = [{"status": "READY", "media": urn} for urn in media]
+        
+        try:
+            client = self.http or clients.http("linkedin")
+            response = await client.post(
+                f"{self.api_url}/ugcPosts",
+                headers=headers,
+                json=payload
+            )
+        
         except Exception as e:
-            error_msg = f"Error posting to LinkedIn: {str(e)}"
-            logger.error(error_msg)
-            
-            post.status = "failed"
-            post.error_message = error_msg
-            db.commit()
-            
             return {
                 "success": False,
-                "message": error_msg
+                "status_code": None,
+                "post_id": None,
+                "retry_after": None,
+                "message": f"Error posting to LinkedIn: {str(e)}"
             }
+        
+        if response.status_code == 201:
+            return {
+                "success": True,
+                "status_code": 201,
+                "post_id": response.json().get("id", ""),
+                "retry_after": None,
+                "message": "Successfully posted to LinkedIn"
+            }
+        
+        return {
+            "success": False,
+            "status_code": response.status_code,
+            "post_id": None,
+            "retry_after": _retry_after(response),
+            "message": f"LinkedIn API error: {response.status_code} - {response.text}"
+        }
     
     def _get_post_url(self, post_urn: str) -> str:
         # Convert URN to URL (approximate - LinkedIn doesn't provide direct URLs)
         post_id = post_urn.split(":")[-1] if post_urn else ""
         return f"https://www.linkedin.com/feed/update/{post_urn}"
     
-    def validate_credentials(self) -> bool:
+    async def validate_credentials(self, timeout: float = 10) -> bool:
         if not self.has_credentials():
             return False
         
@@ -127,15 +170,22 @@ class LinkedInPoster:
                 "X-Restli-Protocol-Version": "2.0.0"
             }
             
-            with httpx.Client() as client:
-                response = client.get(
-                    f"{self.api_url}/me",
-                    headers=headers,
-                    timeout=10
-                )
-                
-                return response.status_code == 200
+            client = self.http or clients.http("linkedin")
+            response = await client.get(
+                f"{self.api_url}/me",
+                headers=headers,
+                timeout=timeout
+            )
+            
+            return response.status_code == 200
                 
         except Exception as e:
             logger.error(f"Error validating LinkedIn credentials: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError, AttributeError):
+        return None
\ No newline at end of file
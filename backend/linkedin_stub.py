@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the LinkedIn v2 API pieces the poster uses.
+
+Serves /v2/me, /v2/ugcPosts, batched /v2/socialActions counts and the
+assets upload flow (registerUpload, single or multipart byte-range PUTs,
+completeMultiPartUpload), checking that uploads arrive complete and that
+posts only reference uploaded assets, so publishing, media and analytics
+can be exercised without network access:
+
+    python backend/linkedin_stub.py --port 8200 --part-size 1048576
+    LINKEDIN_API_URL=http://127.0.0.1:8200/v2 python backend/main.py
+"""
+import hashlib
+import argparse
+import threading
+from typing import Dict, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+SINGLE_UPLOAD = "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"
+MULTIPART_UPLOAD = "com.linkedin.digitalmedia.uploading.MultipartUpload"
+
+
+class StubLinkedIn:
+    """In-memory asset and share store. Uploaded bytes are hashed, not kept."""
+    
+    def __init__(self, part_size: int = 1024 * 1024):
+        self.part_size = part_size
+        self._lock = threading.Lock()
+        self.assets = {}  # asset id -> {"size", "parts", "received", "status"}
+        self.posts = []
+        self.social = {}  # share URN -> {"likes", "comments"}
+        self.stats = {"registrations": 0, "uploads": 0, "parts": 0, "bytes": 0, "posts": 0, "social_requests": 0}
+    
+    def register(self, size: int, multipart: bool) -> str:
+        with self._lock:
+            self.stats["registrations"] += 1
+            asset_id = f"C5622AQ{len(self.assets) + 1:06d}"
+            parts = []
+            if multipart:
+                parts = [(first, min(first + self.part_size, size) - 1) for first in range(0, size, self.part_size)]
+            self.assets[asset_id] = {"size": size, "parts": parts, "received": {}, "status": "WAITING_UPLOAD"}
+            return asset_id
+    
+    def receive(self, asset_id: str, data: bytes, part: Optional[int] = None) -> str:
+        """Record an upload or part, returning its ETag."""
+        etag = hashlib.md5(data).hexdigest()
+        with self._lock:
+            asset = self.assets[asset_id]
+            self.stats["bytes"] += len(data)
+            if part is None:
+                self.stats["uploads"] += 1
+                if len(data) != asset["size"]:
+                    raise ValueError(f"Expected {asset['size']} bytes, got {len(data)}")
+                asset["status"] = "AVAILABLE"
+            else:
+                self.stats["parts"] += 1
+                first, last = asset["parts"][part]
+                if len(data) != last - first + 1:
+                    raise ValueError(f"Part {part} expected {last - first + 1} bytes, got {len(data)}")
+                asset["received"][part] = etag
+        return etag
+    
+    def complete(self, asset_id: str, etags: list) -> None:
+        with self._lock:
+            asset = self.assets[asset_id]
+            expected = [asset["received"].get(i) for i in range(len(asset["parts"]))]
+            if None in expected or sorted(expected) != sorted(etags):
+                raise ValueError("Missing or unknown parts")
+            asset["status"] = "AVAILABLE"
+    
+    def post(self, payload: Dict) -> str:
+        share = payload["specificContent"]["com.linkedin.ugc.ShareContent"]
+        with self._lock:
+            for media in share.get("media", []):
+                asset_id = media["media"].split(":")[-1]
+                if self.assets.get(asset_id, {}).get("status") != "AVAILABLE":
+                    raise ValueError(f"Asset {media['media']} is not uploaded")
+            self.posts.append(payload)
+            self.stats["posts"] += 1
+            urn = f"urn:li:share:{len(self.posts)}"
+            self.social[urn] = {"likes": 0, "comments": 0}
+            return urn
+
+    def social_actions(self, urns: list) -> Dict:
+        with self._lock:
+            self.stats["social_requests"] += 1
+            return {
+                urn: {
+                    "urn": urn,
+                    "likesSummary": {"totalLikes": self.social[urn]["likes"]},
+                    "commentsSummary": {"aggregatedTotalComments": self.social[urn]["comments"]}
+                }
+                for urn in urns if urn in self.social
+            }
+
+
+def create_app(stub: Optional[StubLinkedIn] = None) -> FastAPI:
+    stub = stub or StubLinkedIn()
+    app = FastAPI(title="LinkedIn stub")
+    app.state.stub = stub
+    
+    def error(status_code: int, message: str) -> JSONResponse:
+        return JSONResponse(status_code=status_code, content={"status": status_code, "message": message})
+    
+    @app.get("/stats")
+    async def stats():
+        return stub.stats
+    
+    @app.get("/v2/me")
+    async def me():
+        return {"id": "stub-person", "localizedFirstName": "Stub"}
+    
+    @app.get("/v2/socialActions")
+    async def social_actions(ids: str):
+        # Rest.li batch syntax: ids=List(urn1,urn2) with URL-encoded URNs
+        if not (ids.startswith("List(") and ids.endswith(")")):
+            return error(400, "Expected ids=List(...)")
+        urns = [urn for urn in ids[5:-1].split(",") if urn]
+        results = stub.social_actions(urns)
+        return {
+            "results": results,
+            "statuses": {urn: 200 if urn in results else 404 for urn in urns},
+            "errors": {urn: {"status": 404, "message": "Not found"} for urn in urns if urn not in results}
+        }
+
+    @app.post("/v2/assets")
+    async def assets(request: Request, action: str):
+        body = await request.json()
+        
+        if action == "registerUpload":
+            upload = body["registerUploadRequest"]
+            size = upload.get("fileSize", 0)
+            multipart = "MULTIPART_UPLOAD" in upload.get("supportedUploadMechanism", []) and size > stub.part_size
+            asset_id = stub.register(size, multipart)
+            base = str(request.base_url).rstrip("/")
+            if multipart:
+                mechanism = {MULTIPART_UPLOAD: {
+                    "metadata": asset_id,
+                    "partUploadRequests": [
+                        {"url": f"{base}/upload/{asset_id}/parts/{i}", "byteRange": {"firstByte": first, "lastByte": last}, "headers": {}}
+                        for i, (first, last) in enumerate(stub.assets[asset_id]["parts"])
+                    ]
+                }}
+            else:
+                mechanism = {SINGLE_UPLOAD: {"uploadUrl": f"{base}/upload/{asset_id}", "headers": {}}}
+            return {"value": {
+                "asset": f"urn:li:digitalmediaAsset:{asset_id}",
+                "mediaArtifact": f"urn:li:digitalmediaMediaArtifact:(urn:li:digitalmediaAsset:{asset_id},urn:li:digitalmediaMediaArtifactClass:feedshare-uploadedImage)",
+                "uploadMechanism": mechanism
+            }}
+        
+        if action == "completeMultiPartUpload":
+            complete = body["completeMultipartUploadRequest"]
+            etags = [part["headers"]["ETag"] for part in complete["partUploadResponses"]]
+            try:
+                stub.complete(complete["metadata"], etags)
+            except (KeyError, ValueError) as e:
+                return error(400, str(e))
+            return {}
+        
+        return error(400, f"Unknown action {action}")
+    
+    async def receive(request: Request, asset_id: str, part: Optional[int] = None):
+        if asset_id not in stub.assets:
+            return error(404, f"Unknown asset {asset_id}")
+        data = b"".join([chunk async for chunk in request.stream()])
+        try:
+            etag = stub.receive(asset_id, data, part)
+        except (IndexError, ValueError) as e:
+            return error(400, str(e))
+        return JSONResponse(status_code=201, content={}, headers={"ETag": etag})
+    
+    @app.put("/upload/{asset_id}")
+    async def upload(request: Request, asset_id: str):
+        return await receive(request, asset_id)
+    
+    @app.put("/upload/{asset_id}/parts/{part}")
+    async def upload_part(request: Request, asset_id: str, part: int):
+        return await receive(request, asset_id, part)
+    
+    @app.post("/v2/ugcPosts")
+    async def ugc_posts(request: Request):
+        try:
+            urn = stub.post(await request.json())
+        except (KeyError, ValueError) as e:
+            return error(422, str(e))
+        return JSONResponse(status_code=201, content={"id": urn}, headers={"x-restli-id": urn})
+    
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Offline LinkedIn API stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--part-size", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+    
+    uvicorn.run(create_app(StubLinkedIn(part_size=args.part_size)), host=args.host, port=args.port, log_level="warning")
\ No newline at end of file
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, List, Optional
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Content-addressed cache of LLM completions on disk.
+
+    Entries are keyed by a hash of everything that determines the completion
+    (model, messages and sampling parameters), expire after a TTL and are
+    evicted least-recently-used once the entry or byte budget is exceeded.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[int] = None
+    ):
+        self.path = path or settings.llm_cache_path
+        self.max_entries = max_entries or settings.llm_cache_max_entries
+        self.max_bytes = max_bytes or settings.llm_cache_max_bytes
+        self.ttl = settings.llm_cache_ttl if ttl is None else ttl
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connection(self) -> sqlite3.Connection:
+        # Opened lazily so importing the generator never touches the disk
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+            self._conn.commit()
+        return self._conn
+    
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], **params) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        if not settings.llm_cache_enabled:
+            return None
+        
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            
+            if row and self.ttl and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                metrics.incr("llm_cache.expired")
+                row = None
+            
+            if not row:
+                metrics.incr("llm_cache.misses")
+                return None
+            
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+        
+        metrics.incr("llm_cache.hits")
+        return json.loads(row[0])
+    
+    def put(self, key: str, value: Dict):
+        if not settings.llm_cache_enabled:
+            return
+        
+        try:
+            data = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            # A reply the cache can't store is still a valid reply for the caller
+            logger.warning(f"Skipping cache write for {key}: {str(e)}")
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+    
+    def _evict(self, conn: sqlite3.Connection):
+        entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        
+        # Least recently used entries to drop until both budgets are met
+        evict = max(entries - self.max_entries, 0)
+        excess_bytes = total_bytes - self.max_bytes
+        if excess_bytes > 0:
+            # Entries whose older neighbours alone don't free enough bytes yet
+            (needed,) = conn.execute(
+                "SELECT COUNT(*) FROM (SELECT COALESCE(SUM(size) OVER ("
+                "ORDER BY accessed_at, key ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS freed "
+                "FROM responses) WHERE freed < ?",
+                (excess_bytes,)
+            ).fetchone()
+            evict = max(evict, needed)
+        
+        conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at, key LIMIT ?)",
+            (evict,)
+        )
+        metrics.incr("llm_cache.evictions", evict)
+    
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, total_bytes = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        
+        hits = metrics.get("llm_cache.hits")
+        misses = metrics.get("llm_cache.misses")
+        return {
+            "enabled": settings.llm_cache_enabled,
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": int(hits),
+            "misses": int(misses),
+            "bypassed": int(metrics.get("llm_cache.bypassed")),
+            "evictions": int(metrics.get("llm_cache.evictions")),
+            "expired": int(metrics.get("llm_cache.expired")),
+            "hit_rate": hits / (hits + misses) if hits + misses else None
+        }
+
+
+# Global cache instance
+response_cache = ResponseCache()
\ No newline at end of file
@@ -0,0 +1,96 @@
+import logging
+from typing import Dict, Optional
+import httpx
+import openai
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider:
+    """Where chat completions come from: the client pair and the model to ask for.
+
+    Every backend speaks the OpenAI chat completions API, so providers only
+    differ in the endpoint and credentials handed to the OpenAI SDK.
+    """
+    name = "openai"
+    
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.model = model or settings.llm_model
+        self.base_url = base_url or self.default_base_url()
+        self.api_key = api_key or self.default_api_key()
+        self.timeout = settings.llm_timeout if timeout is None else timeout
+        self.max_retries = settings.llm_max_retries if max_retries is None else max_retries
+    
+    def default_base_url(self) -> Optional[str]:
+        return None
+    
+    def default_api_key(self) -> str:
+        return settings.openai_api_key
+    
+    def _client_options(self) -> Dict:
+        options = {"api_key": self.api_key, "timeout": self.timeout, "max_retries": self.max_retries}
+        if self.base_url:
+            options["base_url"] = self.base_url
+        return options
+    
+    def client(self, http_client: Optional[httpx.Client] = None) -> openai.OpenAI:
+        options = self._client_options()
+        if http_client is not None:
+            options["http_client"] = http_client
+        return openai.OpenAI(**options)
+    
+    def async_client(self, http_client: Optional[httpx.AsyncClient] = None) -> openai.AsyncOpenAI:
+        options = self._client_options()
+        if http_client is not None:
+            options["http_client"] = http_client
+        return openai.AsyncOpenAI(**options)
+    
+    def describe(self) -> Dict:
+        return {"provider": self.name, "model": self.model, "base_url": self.base_url}
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+
+class CompatibleProvider(LLMProvider):
+    """Any server implementing the OpenAI chat API (vLLM, llama.cpp, Ollama, LocalAI)."""
+    name = "compatible"
+    
+    def default_base_url(self) -> Optional[str]:
+        if not settings.llm_base_url:
+            raise ValueError("LLM_BASE_URL must be set for the compatible provider")
+        return settings.llm_base_url
+    
+    def default_api_key(self) -> str:
+        # Local servers usually ignore the key, but the SDK requires one
+        return settings.llm_api_key or settings.openai_api_key or "not-needed"
+
+
+class StubProvider(CompatibleProvider):
+    """The offline stub server from llm_stub.py."""
+    name = "stub"
+    
+    def default_base_url(self) -> Optional[str]:
+        return settings.llm_stub_url
+    
+    def default_api_key(self) -> str:
+        return "stub"
+
+
+PROVIDERS = {provider.name: provider for provider in (OpenAIProvider, CompatibleProvider, StubProvider)}
+
+
+def get_provider(name: Optional[str] = None, **options) -> LLMProvider:
+    name = name or settings.llm_provider
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}', expected one of {', '.join(PROVIDERS)}")
+    return PROVIDERS[name](**options)
\ No newline at end of file
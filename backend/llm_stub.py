@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the OpenAI chat completions API.
+
+Answers /v1/chat/completions with deterministic LinkedIn-style post JSON
+built from the topic titles in the prompt, so the generation path can be
+load-tested without network access or API spend. Latency, completion size,
+429 rate limiting and malformed replies are configurable:
+
+    python backend/llm_stub.py --port 8100 --latency-ms 300 --rate-limit-rate 0.05
+    LLM_PROVIDER=stub python backend/main.py
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from typing import Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from config import settings
+from token_budget import count_tokens, count_message_tokens
+
+WORDS = (
+    "compose state recomposition coroutines flow lifecycle viewmodel gradle build cache kotlin "
+    "multiplatform startup baseline profiles memory leaks testing modularization navigation "
+    "performance accessibility permissions privacy release pipeline dependency injection hilt "
+    "room database paging images rendering animations tooling migration stability"
+).split()
+
+# Roughly 4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+
+class StubLLM:
+    """Deterministic completion source. The same seed and request sequence gives the same replies."""
+    
+    def __init__(
+        self,
+        latency_ms: Optional[int] = None,
+        ms_per_token: Optional[float] = None,
+        completion_tokens: Optional[int] = None,
+        rate_limit_rate: Optional[float] = None,
+        malformed_rate: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        self.latency_ms = settings.llm_stub_latency_ms if latency_ms is None else latency_ms
+        self.ms_per_token = settings.llm_stub_ms_per_token if ms_per_token is None else ms_per_token
+        self.completion_tokens = completion_tokens or settings.llm_stub_completion_tokens
+        self.rate_limit_rate = settings.llm_stub_rate_limit_rate if rate_limit_rate is None else rate_limit_rate
+        self.malformed_rate = settings.llm_stub_malformed_rate if malformed_rate is None else malformed_rate
+        self._rng = random.Random(settings.llm_stub_seed if seed is None else seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "rate_limited": 0, "completions": 0, "malformed": 0, "completion_tokens": 0}
+    
+    def admit(self) -> bool:
+        """Count a request, False when it should be answered with a 429."""
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._rng.random() < self.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return False
+            return True
+    
+    def complete(self, messages: List[Dict], n: int = 1, max_tokens: Optional[int] = None) -> List[Dict]:
+        """n choices as {"content", "finish_reason"}, cut off at max_tokens like the real API."""
+        titles = re.findall(r"^\d+\. (.+)$", messages[-1]["content"] if messages else "", re.M)
+        choices = []
+        with self._lock:
+            for _ in range(n):
+                malformed = self._rng.random() < self.malformed_rate
+                content = self._malformed(titles) if malformed else self._post(titles)
+                finish_reason = "stop"
+                if max_tokens and count_tokens(content) > max_tokens:
+                    content = content[:max_tokens * CHARS_PER_TOKEN]
+                    finish_reason = "length"
+                
+                self.stats["completions"] += 1
+                self.stats["malformed"] += int(malformed)
+                self.stats["completion_tokens"] += count_tokens(content)
+                choices.append({"content": content, "finish_reason": finish_reason})
+        return choices
+    
+    def _sentence(self, words: int, subject: str) -> str:
+        body = " ".join(self._rng.choice(WORDS) for _ in range(words))
+        return f"{subject} {body}."
+    
+    def _section(self, chars: int, subject: str) -> str:
+        sentences = []
+        while sum(len(s) + 1 for s in sentences) < chars:
+            sentences.append(self._sentence(self._rng.randint(6, 12), subject))
+        return " ".join(sentences)
+    
+    def _post(self, titles: List[str]) -> str:
+        subject = titles[0] if titles else "Android development"
+        chars = self.completion_tokens * CHARS_PER_TOKEN
+        post = {
+            "hook": self._section(chars // 10, f"Everyone is talking about {subject}:"),
+            "insight": self._section(chars * 5 // 10, "The interesting part is"),
+            "takeaway": self._section(chars * 2 // 10, "My advice:"),
+            "cta": "How is your team handling this? #AndroidDev #Kotlin #MobileDev"
+        }
+        return json.dumps(post)
+    
+    def _malformed(self, titles: List[str]) -> str:
+        # Prose around the JSON, a missing section or plain text, as real models do
+        post = json.loads(self._post(titles))
+        kind = self._rng.choice(["prose", "missing", "text"])
+        if kind == "prose":
+            return f"Sure! Here is your post:\n```json\n{json.dumps(post, indent=2)}\n```"
+        if kind == "missing":
+            post.pop("cta")
+            return json.dumps(post)
+        return "\n".join(post.values())
+
+
+def create_app(stub: Optional[StubLLM] = None) -> FastAPI:
+    stub = stub or StubLLM()
+    app = FastAPI(title="LLM stub")
+    app.state.stub = stub
+    
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": settings.llm_model, "object": "model", "owned_by": "stub"}]}
+    
+    @app.get("/stats")
+    async def stats():
+        return stub.stats
+    
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", settings.llm_model)
+        messages = body.get("messages", [])
+        
+        await asyncio.sleep(stub.latency_ms / 1000)
+        if not stub.admit():
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": "0"},
+                content={"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}}
+            )
+        
+        choices = stub.complete(messages, n=body.get("n") or 1, max_tokens=body.get("max_tokens"))
+        completion_id = f"chatcmpl-stub-{stub.stats['requests']}"
+        created = int(time.time())
+        
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream(stub, completion_id, created, model, choices),
+                media_type="text/event-stream"
+            )
+        
+        completion_tokens = sum(count_tokens(choice["content"]) for choice in choices)
+        await asyncio.sleep(completion_tokens * stub.ms_per_token / 1000)
+        prompt_tokens = count_message_tokens(messages)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": i,
+                    "message": {"role": "assistant", "content": choice["content"]},
+                    "finish_reason": choice["finish_reason"]
+                }
+                for i, choice in enumerate(choices)
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+    
+    return app
+
+
+async def _stream(stub: StubLLM, completion_id: str, created: int, model: str, choices: List[Dict]):
+    def chunk(index: int, delta: Dict, finish_reason: Optional[str] = None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": index, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+    
+    for index, choice in enumerate(choices):
+        yield chunk(index, {"role": "assistant", "content": ""})
+        content = choice["content"]
+        # One chunk per simulated token
+        for offset in range(0, len(content), CHARS_PER_TOKEN):
+            await asyncio.sleep(stub.ms_per_token / 1000)
+            yield chunk(index, {"content": content[offset:offset + CHARS_PER_TOKEN]})
+        yield chunk(index, {}, choice["finish_reason"])
+    yield "data: [DONE]\n\n"
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=int, default=None)
+    parser.add_argument("--ms-per-token", type=float, default=None)
+    parser.add_argument("--completion-tokens", type=int, default=None)
+    parser.add_argument("--rate-limit-rate", type=float, default=None)
+    parser.add_argument("--malformed-rate", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    stub = StubLLM(
+        latency_ms=args.latency_ms,
+        ms_per_token=args.ms_per_token,
+        completion_tokens=args.completion_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(stub), host=args.host, port=args.port, log_level="warning")
\ No newline at end of file
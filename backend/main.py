@@ -1,18 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
+import os
+import uuid
+import asyncio
 import logging
+import json
 import uvicorn
 
-from database import get_db, init_db, Topic, LinkedInPost, SystemLog, Settings
+from database import get_db, init_db, unlink_post_topics, Topic, LinkedInPost, PublishOutbox, SystemLog, Settings
 from scheduler import scheduler
 from fetchers import RedditFetcher, XFetcher
 from clustering import TopicClusterer
-from post_generator import LinkedInPostGenerator
+from cluster_registry import ClusterRegistry
+from related_index import related_index
+from llm_cache import response_cache
+from metrics import metrics
+import token_budget
+from post_generator import LinkedInPostGenerator, generation_stats
 from linkedin_poster import LinkedInPoster
+from clients import clients, get_clients, ClientRegistry
+from health import credential_health
+from publisher import publisher
+from slot_planner import slot_planner
+from analytics import analytics_poller
+from singleflight import flights
 from config import settings
 from pydantic import BaseModel
 
@@ -47,34 +63,80 @@ class TopicResponse(BaseModel):
     cluster_id: Optional[int]
     rank_score: Optional[float]
 
+class RelatedTopicResponse(TopicResponse):
+    similarity: float
+
+class ClusterResponse(BaseModel):
+    id: int
+    top_terms: List[str]
+    size: int
+    total_engagement: float
+    run_count: int
+    first_seen: datetime
+    last_seen: datetime
+    window_topics: int
+    window_engagement: float
+
 class PostResponse(BaseModel):
     id: int
     content: str
     status: str
     created_at: datetime
+    scheduled_at: Optional[datetime] = None
     posted_at: Optional[datetime]
     sources: List[str]
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    media_paths: Optional[List[str]] = None
+    quality_score: Optional[float] = None
 
 class SettingsUpdate(BaseModel):
     fetch_interval: Optional[int]
     post_interval: Optional[int]
     paused: Optional[bool]
+    max_posts_per_day: Optional[int] = None
+    optimal_post_times: Optional[str] = None  # Comma separated HH:MM in UTC
+    pause_on_weekends: Optional[bool] = None
 
 class ManualPostRequest(BaseModel):
     topic_ids: List[int]
+    fresh: bool = False  # Skip the response cache and ask for a new variant
+
+class BatchGenerateRequest(BaseModel):
+    count: Optional[int] = None  # Defaults to BATCH_POSTS_PER_RUN
+
+
+# Shared, connection-pooled services
+def get_generator() -> LinkedInPostGenerator:
+    return scheduler.post_generator
+
+def get_linkedin_poster() -> LinkedInPoster:
+    return scheduler.linkedin_poster
 
 
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    token_budget.check_post_budget()
+    clients.startup()
+    credential_health.start()
     if not settings.debug:
         scheduler.start()
+    if settings.publisher_enabled and scheduler.linkedin_poster.has_credentials():
+        publisher.start()
+    if settings.analytics_enabled and scheduler.linkedin_poster.has_credentials():
+        analytics_poller.start()
     logger.info("Application started")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    scheduler.stop()
+    if not settings.debug:
+        scheduler.stop()
+    publisher.stop()
+    analytics_poller.stop()
+    credential_health.stop()
+    await clients.shutdown()
     logger.info("Application stopped")
 
 
@@ -84,16 +146,25 @@ async def root():
     return {"message": "LinkedIn Android Poster API"}
 
 @app.get("/api/status")
-async def get_status():
-    linkedin_poster = LinkedInPoster()
+async def get_status(linkedin_poster: LinkedInPoster = Depends(get_linkedin_poster)):
     return {
         "scheduler_running": scheduler.scheduler.running if hasattr(scheduler, 'scheduler') else False,
         "linkedin_configured": linkedin_poster.has_credentials(),
         "reddit_configured": bool(settings.reddit_client_id),
         "x_configured": bool(settings.x_bearer_token),
-        "openai_configured": bool(settings.openai_api_key)
+        "openai_configured": bool(settings.openai_api_key),
+        "llm_provider": settings.llm_provider,
+        "llm_model": settings.llm_model,
+        "clients": clients.describe(),
+        # Last known reachability, never waits on the network
+        "credentials": credential_health.snapshot()
     }
 
+@app.post("/api/status/refresh")
+async def refresh_status():
+    await credential_health.refresh()
+    return credential_health.snapshot()
+
 @app.get("/api/topics", response_model=List[TopicResponse])
 async def get_topics(
     limit: int = 50,
@@ -108,6 +179,39 @@ async def get_topics(
     topics = query.limit(limit).all()
     return topics
 
+@app.get("/api/topics/{topic_id}/related", response_model=List[RelatedTopicResponse])
+async def get_related_topics(
+    topic_id: int,
+    limit: int = 5,
+    db: Session = Depends(get_db)
+):
+    topic = db.query(Topic).filter(Topic.id == topic_id).first()
+    
+    if not topic:
+        raise HTTPException(status_code=404, detail="Topic not found")
+    
+    related = related_index.related(topic_id, k=limit)
+    if not related and topic_id > related_index.max_topic_id:
+        # Ingested since the last sync (e.g. by the CLI)
+        await asyncio.to_thread(related_index.sync, db)
+        related = related_index.related(topic_id, k=limit)
+    
+    topics = {t.id: t for t in db.query(Topic).filter(Topic.id.in_([i for i, _ in related])).all()}
+    
+    return [
+        {**TopicResponse.model_validate(topics[i], from_attributes=True).model_dump(), "similarity": similarity}
+        for i, similarity in related
+        if i in topics
+    ]
+
+@app.get("/api/clusters", response_model=List[ClusterResponse])
+async def get_clusters(
+    window_hours: int = 72,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    return ClusterRegistry().active_clusters(db, window_hours=window_hours, limit=limit)
+
 @app.get("/api/posts", response_model=List[PostResponse])
 async def get_posts(
     limit: int = 20,
@@ -125,25 +229,183 @@ async def get_posts(
 @app.post("/api/posts/generate")
 async def generate_post(
     request: ManualPostRequest,
-    db: Session = Depends(get_db)
+    generator: LinkedInPostGenerator = Depends(get_generator)
 ):
-    generator = LinkedInPostGenerator()
-    post_data = generator.generate_post(db, request.topic_ids)
+    topic_ids = sorted(set(request.topic_ids))
+    
+    async def generate():
+        # Own session, the request that started the call may go away before the others are answered
+        db = next(get_db())
+        try:
+            return await generator.agenerate_post(db, topic_ids, fresh=request.fresh)
+        finally:
+            db.close()
+    
+    # A double click or a second tab gets the same post instead of paying for another one
+    post_data = await flights.do(flights.make_key("generate", topic_ids=topic_ids, fresh=request.fresh), generate)
     
     if not post_data:
         raise HTTPException(status_code=400, detail="Failed to generate post")
     
     return post_data
 
+@app.post("/api/posts/generate/stream")
+async def stream_post(request: ManualPostRequest, generator: LinkedInPostGenerator = Depends(get_generator)):
+    async def events():
+        # Own session, a request-scoped dependency may be closed before the stream ends
+        db = next(get_db())
+        try:
+            async for event in generator.astream_post(db, request.topic_ids, fresh=request.fresh):
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/posts/generate-batch")
+async def generate_post_batch(request: BatchGenerateRequest):
+    async def generate():
+        db = next(get_db())
+        try:
+            return await scheduler.generate_batch(db, request.count)
+        finally:
+            db.close()
+    
+    posts = await flights.do(flights.make_key("generate-batch", count=request.count), generate)
+    return {"generated": len(posts), "posts": posts}
+
 @app.post("/api/posts/{post_id}/publish")
-async def publish_post(post_id: int, db: Session = Depends(get_db)):
-    linkedin_poster = LinkedInPoster()
-    result = await linkedin_poster.post_to_linkedin(db, post_id)
+async def publish_post(
+    post_id: int,
+    db: Session = Depends(get_db),
+    linkedin_poster: LinkedInPoster = Depends(get_linkedin_poster)
+):
+    if not settings.publisher_enabled:
+        result = await linkedin_poster.post_to_linkedin(db, post_id)
+        
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        
+        return result
+    
+    if not linkedin_poster.has_credentials():
+        raise HTTPException(status_code=400, detail="LinkedIn credentials not configured")
+    
+    entry = publisher.enqueue(db, post_id)
+    if not entry:
+        raise HTTPException(status_code=400, detail="Post not found or already published")
+    
+    return {"success": True, "message": "Post queued for publishing", "outbox_id": entry.id}
+
+@app.post("/api/posts/{post_id}/media")
+async def attach_media(post_id: int, request: Request, filename: str = "image", db: Session = Depends(get_db)):
+    """Attach an image to a post. The raw request body is streamed to MEDIA_DIR."""
+    post = db.query(LinkedInPost).filter(LinkedInPost.id == post_id).first()
+    
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    
+    if post.status in ("posted", "publishing"):
+        raise HTTPException(status_code=400, detail="Cannot change media of a published post")
+    
+    if not request.headers.get("content-type", "").startswith("image/"):
+        raise HTTPException(status_code=415, detail="Only images can be attached")
+    
+    os.makedirs(settings.media_dir, exist_ok=True)
+    path = os.path.join(settings.media_dir, f"{uuid.uuid4().hex}{os.path.splitext(filename)[1].lower()}")
+    size = 0
+    with open(path, "wb") as f:
+        async for chunk in request.stream():
+            size += len(chunk)
+            f.write(chunk)
+    
+    if size == 0:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail="Empty upload")
+    
+    # Reassign so the JSON column is marked dirty
+    post.media_paths = (post.media_paths or []) + [path]
+    db.commit()
+    
+    return {"message": "Media attached", "path": path, "size_bytes": size, "media_paths": post.media_paths}
+
+@app.get("/api/outbox")
+async def get_outbox(limit: int = 50, db: Session = Depends(get_db)):
+    entries = db.query(PublishOutbox).order_by(PublishOutbox.created_at.desc()).limit(limit).all()
+    return {
+        "stats": publisher.stats(db),
+        "entries": [
+            {
+                "id": entry.id,
+                "post_id": entry.post_id,
+                "status": entry.status,
+                "attempts": entry.attempts,
+                "next_attempt_at": entry.next_attempt_at,
+                "last_error": entry.last_error,
+                "published_at": entry.published_at
+            }
+            for entry in entries
+        ]
+    }
+
+@app.get("/api/schedule")
+async def get_schedule(db: Session = Depends(get_db)):
+    posts = db.query(LinkedInPost).filter(
+        LinkedInPost.status == "scheduled"
+    ).order_by(LinkedInPost.scheduled_at).all()
     
-    if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["message"])
+    return {
+        "config": slot_planner.config(db),
+        "scheduled": [
+            {"post_id": post.id, "scheduled_at": post.scheduled_at, "preview": post.content[:120]}
+            for post in posts
+        ],
+        "next_free_slots": slot_planner.free_slots(db, 5)
+    }
+
+@app.post("/api/schedule/assign")
+async def assign_schedule(db: Session = Depends(get_db)):
+    assigned = slot_planner.assign(db)
+    for slot in assigned:
+        scheduler.dispatcher.schedule(slot["post_id"], slot["scheduled_at"])
+    return {"assigned": assigned}
+
+@app.get("/api/drafts/buffer")
+async def get_draft_buffer(db: Session = Depends(get_db)):
+    return scheduler.draft_buffer.stats(db)
+
+@app.post("/api/drafts/buffer/refill")
+async def refill_draft_buffer():
+    made = await scheduler.draft_buffer.refill(force=True)
+    return {"generated": made}
+
+@app.get("/api/analytics/posts")
+async def get_post_analytics(limit: int = 20, db: Session = Depends(get_db)):
+    return {"stats": analytics_poller.stats(db), "posts": analytics_poller.top_posts(db, limit)}
+
+@app.get("/api/analytics/posts/{post_id}")
+async def get_post_performance(post_id: int, db: Session = Depends(get_db)):
+    performance = analytics_poller.post_performance(db, post_id)
+    
+    if not performance:
+        raise HTTPException(status_code=404, detail="Post not found")
     
-    return result
+    return performance
+
+@app.get("/api/analytics/clusters")
+async def get_cluster_performance(db: Session = Depends(get_db)):
+    return analytics_poller.cluster_performance(db)
+
+@app.post("/api/analytics/poll-now")
+async def poll_analytics_now():
+    if not scheduler.linkedin_poster.has_credentials():
+        raise HTTPException(status_code=400, detail="LinkedIn credentials not configured")
+    
+    return {"polled": await analytics_poller.poll_once()}
 
 @app.delete("/api/posts/{post_id}")
 async def delete_post(post_id: int, db: Session = Depends(get_db)):
@@ -155,6 +417,12 @@ async def delete_post(post_id: int, db: Session = Depends(get_db)):
     if post.status == "posted":
         raise HTTPException(status_code=400, detail="Cannot delete published posts")
     
+    if post.status == "publishing":
+        raise HTTPException(status_code=400, detail="Cannot delete a post while it is being published")
+    
+    # The post's topics become available again
+    unlink_post_topics(db, post.id)
+    db.query(PublishOutbox).filter(PublishOutbox.post_id == post.id).delete()
     db.delete(post)
     db.commit()
     
@@ -234,15 +502,38 @@ async def update_settings(
     
     return {"message": "Settings updated"}
 
+@app.get("/api/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
+@app.get("/api/generation/stats")
+async def get_generation_stats():
+    return generation_stats()
+
+@app.get("/api/token-usage")
+async def get_token_usage(days: int = 7, db: Session = Depends(get_db)):
+    return token_budget.daily_usage(db, days)
+
+@app.get("/api/llm-cache/stats")
+async def get_llm_cache_stats():
+    return response_cache.stats()
+
+@app.delete("/api/llm-cache")
+async def clear_llm_cache():
+    response_cache.clear()
+    return {"message": "LLM response cache cleared"}
+
 # Manual operations
 @app.post("/api/fetch-now")
-async def fetch_now(background_tasks: BackgroundTasks):
-    background_tasks.add_task(scheduler.fetch_topics_job)
+async def fetch_now():
+    if not scheduler.start_job("fetch_topics"):
+        return {"message": "Fetch job already running"}
     return {"message": "Fetch job started"}
 
 @app.post("/api/generate-now")
-async def generate_now(background_tasks: BackgroundTasks):
-    background_tasks.add_task(scheduler.generate_and_post_job)
+async def generate_now():
+    if not scheduler.start_job("generate_post"):
+        return {"message": "Generate job already running"}
     return {"message": "Generate job started"}
 
 @app.post("/api/scheduler/pause")
@@ -257,17 +548,16 @@ async def resume_scheduler():
 
 # Test endpoints for API verification
 @app.post("/api/test-reddit")
-async def test_reddit():
+async def test_reddit(registry: ClientRegistry = Depends(get_clients)):
     """Test Reddit API by fetching a quality Android development post"""
-    import praw
+    # PRAW is blocking, keep its requests off the event loop
+    return await flights.do(flights.make_key("test-reddit"), lambda: asyncio.to_thread(_test_reddit, registry))
+
+def _test_reddit(registry: ClientRegistry):
     from sources_config import REDDIT_SOURCES
     
     try:
-        reddit = praw.Reddit(
-            client_id=settings.reddit_client_id,
-            client_secret=settings.reddit_client_secret,
-            user_agent=settings.reddit_user_agent
-        )
+        reddit = registry.reddit()
         
         def is_quality_post(post, config):
             """Check if a post meets quality criteria"""
@@ -371,43 +661,59 @@ async def test_reddit():
         raise HTTPException(status_code=500, detail=f"Reddit API error: {str(e)}")
 
 @app.post("/api/test-openai")
-async def test_openai(request: dict):
-    """Test OpenAI API by summarizing provided text"""
-    import openai
-    
+async def test_openai(request: dict, registry: ClientRegistry = Depends(get_clients)):
+    """Test the configured LLM backend by summarizing provided text"""
+    key = flights.make_key("test-openai", text=request.get("text", ""), fresh=bool(request.get("fresh")))
+    return await flights.do(key, lambda: _test_openai(request, registry))
+
+async def _test_openai(request: dict, registry: ClientRegistry):
     try:
-        client = openai.OpenAI(api_key=settings.openai_api_key)
+        provider = registry.llm_provider()
+        client = registry.async_llm_client()
         
         text = request.get("text", "")
         if not text:
             raise HTTPException(status_code=400, detail="No text provided")
         
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that creates concise summaries of Android development posts. Focus on the key technical points and insights."
-                },
-                {
-                    "role": "user",
-                    "content": f"Summarize this Android development post in 2-3 sentences, focusing on the key technical insights:\n\n{text}"
-                }
-            ],
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a helpful assistant that creates concise summaries of Android development posts. Focus on the key technical points and insights."
+            },
+            {
+                "role": "user",
+                "content": f"Summarize this Android development post in 2-3 sentences, focusing on the key technical insights:\n\n{text}"
+            }
+        ]
+        cache_key = response_cache.make_key(provider.model, messages, max_tokens=150, temperature=0.7)
+        
+        if request.get("fresh"):
+            metrics.incr("llm_cache.bypassed")
+        else:
+            cached = response_cache.get(cache_key)
+            if cached:
+                return {**cached, "cached": True}
+        
+        response = await client.chat.completions.create(
+            model=provider.model,
+            messages=messages,
             max_tokens=150,
             temperature=0.7
         )
         
         summary = response.choices[0].message.content.strip()
         
-        return {
+        result = {
             "summary": summary,
-            "model": "gpt-4-turbo-preview",
+            "model": provider.model,
             "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else None
         }
+        response_cache.put(cache_key, result)
+        
+        return {**result, "cached": False}
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"LLM API error: {str(e)}")
 
 
 # Serve static files (React app) - commented out for development
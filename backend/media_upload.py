@@ -0,0 +1,197 @@
+import os
+import asyncio
+import hashlib
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import MediaAsset
+from clients import clients
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+IMAGE_RECIPE = "urn:li:digitalmediaRecipe:feedshare-image"
+SINGLE_UPLOAD = "com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"
+MULTIPART_UPLOAD = "com.linkedin.digitalmedia.uploading.MultipartUpload"
+
+
+class MediaUploadError(Exception):
+    """An upload step failed. status_code is None when no response arrived."""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = True):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+def file_hash(path: str, chunk_size: Optional[int] = None) -> str:
+    """SHA-256 of a file, read in chunks."""
+    chunk_size = chunk_size or settings.media_upload_chunk_size
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def read_chunks(path: str, first_byte: int = 0, last_byte: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Stream bytes first_byte..last_byte (inclusive) of a file, one chunk in memory at a time."""
+    remaining = None if last_byte is None else last_byte - first_byte + 1
+    with open(path, "rb") as f:
+        f.seek(first_byte)
+        while remaining is None or remaining > 0:
+            size = settings.media_upload_chunk_size if remaining is None else min(settings.media_upload_chunk_size, remaining)
+            chunk = await asyncio.to_thread(f.read, size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+class MediaUploader:
+    """Uploads images to LinkedIn's assets API so posts can carry them.
+
+    Each file is registered, then streamed from disk in
+    media_upload_chunk_size pieces: as one PUT, or as byte-range parts sent
+    media_upload_concurrency at a time when LinkedIn answers with a
+    multipart mechanism. Uploaded assets are remembered by SHA-256 in
+    media_assets, so the same file is never uploaded twice.
+    """
+    
+    def __init__(self, http: Optional[httpx.AsyncClient] = None):
+        self.http = http  # Defaults to the shared linkedin pool
+        self.access_token = settings.linkedin_access_token
+        self.person_urn = settings.linkedin_person_urn
+        self.api_url = settings.linkedin_api_url
+    
+    def _client(self) -> httpx.AsyncClient:
+        return self.http or clients.http("linkedin")
+    
+    def _headers(self) -> Dict:
+        return {
+            "Authorization": f"Bearer {self.access_token}",
+            "X-Restli-Protocol-Version": "2.0.0"
+        }
+    
+    async def upload_all(self, db: Session, paths: List[str]) -> List[str]:
+        """Asset URNs for the files, in order, uploading the ones not seen before."""
+        return [await self.upload(db, path) for path in paths]
+    
+    async def upload(self, db: Session, path: str) -> str:
+        if not os.path.isfile(path):
+            raise MediaUploadError(f"Media file not found: {path}", retryable=False)
+        
+        content_hash = await asyncio.to_thread(file_hash, path)
+        cached = db.query(MediaAsset).filter(MediaAsset.content_hash == content_hash).first()
+        if cached:
+            metrics.incr("media.cache_hits")
+            return cached.asset_urn
+        
+        size = os.path.getsize(path)
+        registration = await self._register(size)
+        mechanism = registration.get("uploadMechanism", {})
+        if MULTIPART_UPLOAD in mechanism:
+            await self._upload_parts(path, registration, mechanism[MULTIPART_UPLOAD])
+        elif SINGLE_UPLOAD in mechanism:
+            await self._upload_single(path, size, mechanism[SINGLE_UPLOAD])
+        else:
+            raise MediaUploadError(f"Unsupported upload mechanism: {', '.join(mechanism) or 'none'}", retryable=False)
+        
+        asset_urn = registration["asset"]
+        db.add(MediaAsset(
+            content_hash=content_hash,
+            asset_urn=asset_urn,
+            filename=os.path.basename(path),
+            size_bytes=size
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another upload of the same file finished first
+            db.rollback()
+        
+        metrics.incr("media.uploads")
+        metrics.incr("media.bytes_uploaded", size)
+        logger.info(f"Uploaded {os.path.basename(path)} ({size} bytes) as {asset_urn}")
+        return asset_urn
+    
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self._client().request(method, url, **kwargs)
+        except Exception as e:
+            raise MediaUploadError(f"Error uploading media to LinkedIn: {str(e)}")
+        if response.status_code >= 300:
+            raise MediaUploadError(
+                f"LinkedIn media API error: {response.status_code} - {response.text}",
+                status_code=response.status_code,
+                retryable=response.status_code == 429 or response.status_code >= 500
+            )
+        return response
+    
+    async def _register(self, size: int) -> Dict:
+        mechanisms = ["SYNCHRONOUS_UPLOAD"]
+        if size >= settings.media_multipart_threshold:
+            mechanisms.append("MULTIPART_UPLOAD")
+        
+        payload = {
+            "registerUploadRequest": {
+                "recipes": [IMAGE_RECIPE],
+                "owner": f"urn:li:person:{self.person_urn}",
+                "fileSize": size,
+                "supportedUploadMechanism": mechanisms,
+                "serviceRelationships": [{
+                    "relationshipType": "OWNER",
+                    "identifier": "urn:li:userGeneratedContent"
+                }]
+            }
+        }
+        response = await self._request(
+            "POST",
+            f"{self.api_url}/assets?action=registerUpload",
+            headers=self._headers(),
+            json=payload
+        )
+        return response.json()["value"]
+    
+    async def _upload_single(self, path: str, size: int, mechanism: Dict):
+        headers = {
+            **self._headers(),
+            **mechanism.get("headers", {}),
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(size)
+        }
+        await self._request("PUT", mechanism["uploadUrl"], headers=headers, content=read_chunks(path))
+    
+    async def _upload_parts(self, path: str, registration: Dict, mechanism: Dict):
+        semaphore = asyncio.Semaphore(max(1, settings.media_upload_concurrency))
+        
+        async def upload_part(part: Dict) -> Dict:
+            first, last = part["byteRange"]["firstByte"], part["byteRange"]["lastByte"]
+            headers = {
+                **part.get("headers", {}),
+                "Content-Type": "application/octet-stream",
+                "Content-Length": str(last - first + 1)
+            }
+            async with semaphore:
+                response = await self._request("PUT", part["url"], headers=headers, content=read_chunks(path, first, last))
+            metrics.incr("media.parts_uploaded")
+            return {"headers": {"ETag": response.headers.get("ETag", "")}, "httpStatusCode": response.status_code}
+        
+        responses = await asyncio.gather(*[upload_part(part) for part in mechanism["partUploadRequests"]])
+        
+        await self._request(
+            "POST",
+            f"{self.api_url}/assets?action=completeMultiPartUpload",
+            headers=self._headers(),
+            json={
+                "completeMultipartUploadRequest": {
+                    "mediaArtifact": registration["mediaArtifact"],
+                    "metadata": mechanism.get("metadata", ""),
+                    "partUploadResponses": responses
+                }
+            }
+        )
\ No newline at end of file
@@ -0,0 +1,39 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+
+class Metrics:
+    """In-process counters for monitoring, exposed through /api/metrics."""
+    
+    def __init__(self):
+        self._counters = defaultdict(float)
+        self._lock = threading.Lock()
+    
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+    
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+    
+    def ratio(self, numerator: str, denominator: str) -> Optional[float]:
+        total = self.get(denominator)
+        return self.get(numerator) / total if total else None
+    
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, float]:
+        with self._lock:
+            return {
+                name: value
+                for name, value in sorted(self._counters.items())
+                if prefix is None or name.startswith(prefix)
+            }
+    
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+# Global metrics instance
+metrics = Metrics()
\ No newline at end of file
@@ -0,0 +1,98 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from database import Topic, LinkedInPost
+from related_index import related_index
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _topic_text(topic: Topic) -> str:
+    return f"{topic.title} {topic.summary or (topic.content or '')[:settings.topic_summary_max_chars]}"
+
+
+class PostDeduplicator:
+    """Rejects topic sets that would make a near-repeat of a recent post, before any LLM call.
+
+    Posts created within the lookback window are embedded twice, from their
+    topics' text and from their content, with the related-topics hashing
+    embedding, which needs no fitting. A candidate set is embedded from its
+    topics' text; its similarity to a post is the largest of the two cosines
+    and the Jaccard overlap of the topic id sets.
+    """
+    
+    def __init__(self, threshold: Optional[float] = None, window_days: Optional[int] = None):
+        self.threshold = settings.post_dedup_threshold if threshold is None else threshold
+        self.window_days = settings.post_dedup_window_days if window_days is None else window_days
+        self._lock = threading.Lock()
+        self._post_ids = ()
+        self._topic_sets = []
+        self._vectors = None
+    
+    def check(self, db: Session, topic_ids: List[int], topics: Optional[List[Topic]] = None) -> Optional[Dict]:
+        """The most similar recent post when it is over the threshold, otherwise None."""
+        if not settings.post_dedup_enabled or not topic_ids:
+            return None
+        
+        metrics.incr("post_dedup.checks")
+        post_ids, topic_sets, vectors = self._history(db)
+        if not post_ids:
+            return None
+        
+        if topics is None:
+            topics = db.query(Topic).filter(Topic.id.in_(topic_ids)).all()
+        candidate = related_index.embed([" ".join(_topic_text(t) for t in topics)])[0]
+        
+        cosine = (vectors @ candidate).reshape(2, -1).max(axis=0)
+        wanted = set(topic_ids)
+        overlap = np.array([len(wanted & used) / len(wanted | used) if used else 0.0 for used in topic_sets])
+        similarity = np.maximum(cosine, overlap)
+        
+        best = int(np.argmax(similarity))
+        if similarity[best] < self.threshold:
+            return None
+        
+        metrics.incr("post_dedup.rejections")
+        match = {
+            "post_id": post_ids[best],
+            "similarity": round(float(similarity[best]), 3),
+            "topic_overlap": round(float(overlap[best]), 3)
+        }
+        logger.info(f"Topics {sorted(wanted)} repeat post {match['post_id']} (similarity {match['similarity']})")
+        return match
+    
+    def _history(self, db: Session):
+        """Embeddings of the posts in the window, rebuilt only when that set of posts changes."""
+        cutoff = datetime.utcnow() - timedelta(days=self.window_days)
+        rows = db.query(LinkedInPost.id, LinkedInPost.topic_ids).filter(
+            LinkedInPost.created_at >= cutoff,
+            LinkedInPost.status.notin_(("failed", "expired"))
+        ).order_by(LinkedInPost.id).all()
+        post_ids = tuple(row[0] for row in rows)
+        
+        with self._lock:
+            if post_ids == self._post_ids:
+                return self._post_ids, self._topic_sets, self._vectors
+        
+        topic_sets = [set(row[1] or []) for row in rows]
+        all_topic_ids = set().union(*topic_sets) if topic_sets else set()
+        topics = {t.id: t for t in db.query(Topic).filter(Topic.id.in_(all_topic_ids)).all()} if all_topic_ids else {}
+        contents = dict(db.query(LinkedInPost.id, LinkedInPost.content).filter(LinkedInPost.id.in_(post_ids)).all()) if post_ids else {}
+        
+        # Topic-text rows first, then content rows
+        texts = [" ".join(_topic_text(topics[i]) for i in used if i in topics) for used in topic_sets]
+        texts += [contents.get(post_id) or "" for post_id in post_ids]
+        vectors = related_index.embed(texts) if texts else None
+        
+        with self._lock:
+            self._post_ids, self._topic_sets, self._vectors = post_ids, topic_sets, vectors
+        return post_ids, topic_sets, vectors
+
+
+# Global deduplicator instance
+post_dedup = PostDeduplicator()
\ No newline at end of file
@@ -1,96 +1,740 @@
-import openai
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, AsyncIterator
 from sqlalchemy.orm import Session
 from datetime import datetime
-from database import Topic, LinkedInPost
+from database import SessionLocal, Topic, LinkedInPost, link_post_topics, unused_topic
 from config import settings
+from related_index import related_index
+from llm_cache import response_cache
+from llm_provider import get_provider
+from clients import ClientRegistry
+from quality import quality_scorer
+from metrics import metrics
+import token_budget
+from summarizer import summarizer
+from token_budget import PostBudget, count_message_tokens
+from post_schema import SECTIONS, JSON_RESPONSE_FORMAT, parse_sections
 import logging
 import json
+import re
+import time
+import asyncio
 
 logger = logging.getLogger(__name__)
 
+HASHTAGS = "#AndroidDev #Kotlin #MobileDev"
 
-class LinkedInPostGenerator:
+
+class SectionStreamParser:
+    """Pulls completed hook/insight/takeaway/cta values out of a partially received JSON reply."""
+    
     def __init__(self):
-        openai.api_key = settings.openai_api_key
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+        self.buffer = ""
+        self.sections = {}
+    
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        self.buffer += delta
+        completed = []
+        for name in SECTIONS:
+            if name in self.sections:
+                continue
+            match = re.search(rf'"{name}"\s*:\s*"((?:[^"\\]|\\.)*)"', self.buffer)
+            if match:
+                self.sections[name] = json.loads(f'"{match.group(1)}"')
+                completed.append((name, self.sections[name]))
+        return completed
+
+
+class LinkedInPostGenerator:
+    def __init__(self, clients: Optional[ClientRegistry] = None):
+        # Pooled clients from the shared registry, or a private pair for scripts and tests
+        self.provider = clients.llm_provider() if clients else get_provider()
+        self.model = self.provider.model
+        self.client = clients.llm_client() if clients else self.provider.client()
+        self.async_client = clients.async_llm_client() if clients else self.provider.async_client()
+        self._semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+    
+    def generate_post(self, db: Session, topic_ids: List[int], fresh: bool = False) -> Dict:
+        prepared = self._prepare_generation(db, topic_ids)
+        if not prepared:
+            return None
+        topics, messages, budget = prepared
+        
+        # Generate post using OpenAI
+        try:
+            full_content, post_data = self._generate_within_bounds(messages, topics, fresh, budget)
+            return self._save_post(db, topic_ids, topics, full_content, post_data, budget)
+        
+        except Exception as e:
+            logger.error(f"Error generating post: {str(e)}")
+            self._record_usage(db, budget)
+            return None
+    
+    async def agenerate_post(
+        self,
+        db: Session,
+        topic_ids: List[int],
+        fresh: bool = False,
+        candidates: Optional[int] = None,
+        scheduled_at: Optional[datetime] = None,
+        status: Optional[str] = None
+    ) -> Dict:
+        """Non-blocking generate_post that drafts several candidates concurrently and keeps the best."""
+        candidates = candidates or settings.post_generation_candidates
+        prepared = self._prepare_generation(db, topic_ids, completions=candidates)
+        if not prepared:
+            return None
+        topics, messages, budget = prepared
+        
+        try:
+            full_content, post_data = await self._agenerate_within_bounds(messages, topics, fresh, candidates, budget)
+            quality = quality_scorer.score(full_content, post_data, topics)
+            if not quality["passed"] and settings.post_quality_gate_enabled:
+                full_content, post_data, quality = await self._aregenerate_for_quality(
+                    messages, topics, full_content, post_data, quality, fresh, candidates, budget
+                )
+            return self._save_post(db, topic_ids, topics, full_content, post_data, budget, scheduled_at, quality, status)
+        
+        except Exception as e:
+            logger.error(f"Error generating post: {str(e)}")
+            self._record_usage(db, budget)
+            return None
     
-    def generate_post(self, db: Session, topic_ids: List[int]) -> Dict:
-        # Fetch topics
+    async def agenerate_batch(
+        self,
+        topic_groups: List[List[int]],
+        scheduled_times: Optional[List[datetime]] = None,
+        session_factory=None
+    ) -> List[Dict]:
+        """Generate one post per topic group concurrently.
+        
+        At most batch_generation_concurrency posts are in flight; their OpenAI
+        requests also share this generator's request semaphore. Every post
+        gets its own session, so one post's commit or rollback never touches
+        another's.
+        """
+        limit = asyncio.Semaphore(settings.batch_generation_concurrency)
+        scheduled_times = scheduled_times or [None] * len(topic_groups)
+        session_factory = session_factory or SessionLocal
+        
+        async def generate(topic_ids: List[int], scheduled_at: Optional[datetime]) -> Dict:
+            async with limit:
+                db = session_factory()
+                try:
+                    return await self.agenerate_post(db, topic_ids, scheduled_at=scheduled_at)
+                finally:
+                    db.close()
+        
+        results = await asyncio.gather(*[
+            generate(topic_ids, scheduled_at)
+            for topic_ids, scheduled_at in zip(topic_groups, scheduled_times)
+        ])
+        
+        posts = [post for post in results if post]
+        logger.info(f"Generated {len(posts)} of {len(topic_groups)} batch posts")
+        return posts
+    
+    async def astream_post(self, db: Session, topic_ids: List[int], fresh: bool = False) -> AsyncIterator[Dict]:
+        """Generate a post as a stream of events for Server-Sent Events.
+        
+        Yields {"event", "data"} dicts: "token" for every completion delta,
+        "section" when a JSON field has been fully received, "retry" when a
+        draft misses the length window and is re-prompted, then "done" with
+        the saved post and timings, or "error".
+        """
+        prepared = self._prepare_generation(db, topic_ids)
+        if not prepared:
+            yield {"event": "error", "data": {"message": "No topics found or token budget exhausted"}}
+            return
+        topics, messages, budget = prepared
+        
+        start = time.perf_counter()
+        first_token_at = None
+        best = None
+        format_retried = False
+        
+        try:
+            for attempt in range(1, settings.post_generation_max_attempts + 1):
+                if attempt > 1 and not budget.allows(count_message_tokens(messages), settings.post_completion_max_tokens):
+                    logger.warning(f"Post token budget reached after {attempt - 1} attempts ({budget.used} tokens)")
+                    break
+                
+                parser = SectionStreamParser()
+                parts = []
+                async for delta in self._astream_completion(
+                    messages=messages,
+                    fresh=fresh,
+                    budget=budget,
+                    temperature=0.7,
+                    max_tokens=settings.post_completion_max_tokens,
+                    response_format=JSON_RESPONSE_FORMAT
+                ):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(delta)
+                    yield {"event": "token", "data": {"attempt": attempt, "delta": delta}}
+                    
+                    for name, text in parser.feed(delta):
+                        yield {"event": "section", "data": {"attempt": attempt, "name": name, "text": text}}
+                
+                metrics.incr("generation.attempts")
+                post_content = "".join(parts)
+                
+                post_data, error = parse_sections(post_content)
+                if post_data is None:
+                    if format_retried:
+                        break
+                    format_retried = True
+                    yield {"event": "retry", "data": {"attempt": attempt, "reason": "format", "error": error}}
+                    messages = self._with_format_feedback(messages, post_content, error)
+                    continue
+                
+                full_content, post_data = self._fit_length(post_data, topics)
+                miss = self._length_miss(len(full_content))
+                if best is None or miss < self._length_miss(len(best[0])):
+                    best = (full_content, post_data)
+                if not miss:
+                    break
+                
+                yield {"event": "retry", "data": {"attempt": attempt, "reason": "length", "char_count": len(full_content)}}
+                messages = self._with_length_feedback(messages, post_content, len(full_content), post_data)
+            
+            if best is None:
+                raise ValueError(f"Reply did not match the post schema: {error}")
+            post = self._save_post(db, topic_ids, topics, *best, budget)
+        
+        except Exception as e:
+            logger.error(f"Error streaming post: {str(e)}")
+            self._record_usage(db, budget)
+            yield {"event": "error", "data": {"message": str(e)}}
+            return
+        
+        total = time.perf_counter() - start
+        ttft = first_token_at - start if first_token_at else None
+        metrics.incr("generation.streams")
+        metrics.incr("generation.stream_seconds", total)
+        if ttft is not None:
+            metrics.incr("generation.stream_ttft_seconds", ttft)
+        
+        timings = {
+            "time_to_first_token_ms": round(ttft * 1000) if ttft is not None else None,
+            "total_ms": round(total * 1000),
+            "prompt_tokens": budget.prompt_tokens,
+            "completion_tokens": budget.completion_tokens
+        }
+        
+        if post is None:
+            yield {"event": "error", "data": {"message": "Post length outside bounds", **timings}}
+        else:
+            yield {"event": "done", "data": {**post, **timings}}
+    
+    def _prepare_generation(self, db: Session, topic_ids: List[int], completions: int = 1):
+        """Load the topics, fit their context into the prompt and open the post's token budget.
+        
+        Returns (topics, messages, budget), or None when there are no topics or
+        the remaining budget can't cover a first attempt. Topics asked for
+        explicitly are not checked against recent posts; the automated paths
+        pick their sets with post_dedup before calling in.
+        """
         topics = db.query(Topic).filter(Topic.id.in_(topic_ids)).all()
         
         if not topics:
             logger.error("No topics found for post generation")
             return None
         
-        # Prepare context
-        context = self._prepare_context(topics)
+        topics, context = self._compact_context(topics)
+        messages = self._build_messages(context)
         
-        # Generate post using OpenAI
+        budget = token_budget.post_budget(db)
+        if not budget.allows(count_message_tokens(messages), settings.post_completion_max_tokens * completions):
+            metrics.incr("generation.budget_refusals")
+            logger.warning(f"Token budget too low to generate a post ({budget.limit} tokens available)")
+            return None
+        
+        return topics, messages, budget
+    
+    def _build_messages(self, context: str) -> List[Dict]:
+        return [
+            {
+                "role": "system",
+                "content": self._get_system_prompt()
+            },
+            {
+                "role": "user",
+                "content": context
+            }
+        ]
+    
+    def _record_usage(self, db: Session, budget: PostBudget):
+        # Spend of a failed generation still counts against the daily budget
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt()
-                    },
-                    {
-                        "role": "user",
-                        "content": context
-                    }
-                ],
+            token_budget.record_usage(db, budget)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Error recording token usage: {str(e)}")
+            db.rollback()
+    
+    def _save_post(
+        self,
+        db: Session,
+        topic_ids: List[int],
+        topics: List[Topic],
+        full_content: str,
+        post_data: Dict,
+        budget: PostBudget,
+        scheduled_at: Optional[datetime] = None,
+        quality: Optional[Dict] = None,
+        status: Optional[str] = None
+    ) -> Dict:
+        token_budget.record_usage(db, budget)
+        
+        # Validate length
+        char_count = len(full_content)
+        if self._length_miss(char_count):
+            metrics.incr("generation.length_failures")
+            logger.warning(f"Post length {char_count} still outside bounds, giving up on this post")
+            db.commit()
+            return None
+        metrics.incr("generation.length_ok")
+        
+        # Drafts under min_quality_score are kept for review but never published automatically
+        quality = quality or quality_scorer.score(full_content, post_data, topics)
+        status = status or ("scheduled" if scheduled_at else "queued")
+        if not quality["passed"] and settings.post_quality_gate_enabled:
+            metrics.incr("generation.quality_rejections")
+            logger.warning(f"Post quality {quality['score']} below {quality_scorer.min_score}, holding it for review: {quality['components']}")
+            status, scheduled_at = "low_quality", None
+        
+        # Topics dropped while compacting the context are not part of the post
+        kept = {t.id for t in topics}
+        
+        # Save to database
+        linkedin_post = LinkedInPost(
+            topic_ids=[topic_id for topic_id in topic_ids if topic_id in kept],
+            content=full_content,
+            hook=post_data["hook"],
+            insight=post_data["insight"],
+            takeaway=post_data["takeaway"],
+            cta=post_data["cta"],
+            sources=post_data["sources"],
+            created_at=datetime.utcnow(),
+            scheduled_at=scheduled_at,
+            status=status,
+            quality_score=quality["score"],
+            prompt_tokens=budget.prompt_tokens,
+            completion_tokens=budget.completion_tokens
+        )
+        
+        db.add(linkedin_post)
+        link_post_topics(db, linkedin_post, topics)
+        db.commit()
+        
+        logger.info(f"Generated LinkedIn post with {char_count} characters")
+        
+        return {
+            "id": linkedin_post.id,
+            "content": full_content,
+            "char_count": char_count,
+            "topics": [t.title for t in topics],
+            "scheduled_at": scheduled_at,
+            "status": status,
+            "quality_score": quality["score"],
+            "prompt_tokens": budget.prompt_tokens,
+            "completion_tokens": budget.completion_tokens
+        }
+    
+    def _generate_within_bounds(
+        self,
+        messages: List[Dict],
+        topics: List[Topic],
+        fresh: bool,
+        budget: PostBudget
+    ) -> Tuple[str, Dict]:
+        """Draft, fix locally, then re-prompt with length feedback until the post fits or a cap is hit.
+        
+        Returns the assembled post and its sections for the draft closest to
+        the length window.
+        """
+        best = None
+        format_retried = False
+        
+        for attempt in range(1, settings.post_generation_max_attempts + 1):
+            if attempt > 1 and not budget.allows(count_message_tokens(messages), settings.post_completion_max_tokens):
+                logger.warning(f"Post token budget reached after {attempt - 1} attempts ({budget.used} tokens)")
+                break
+            
+            post_content = self._complete(
+                messages=messages,
+                fresh=fresh,
+                budget=budget,
                 temperature=0.7,
-                max_tokens=500
+                max_tokens=settings.post_completion_max_tokens,
+                response_format=JSON_RESPONSE_FORMAT
             )
+            metrics.incr("generation.attempts")
             
-            post_content = response.choices[0].message.content
+            # Validate the structured response, one re-prompt if it can't be repaired
+            post_data, error = parse_sections(post_content)
+            if post_data is None:
+                if format_retried:
+                    break
+                format_retried = True
+                logger.info(f"Post reply invalid on attempt {attempt}: {error}")
+                messages = self._with_format_feedback(messages, post_content, error)
+                continue
             
-            # Parse the structured response
-            post_data = self._parse_post_content(post_content)
+            # Try cheap length fixes before another call
+            full_content, post_data = self._fit_length(post_data, topics)
             
-            # Ensure proper attribution
-            sources = [topic.url for topic in topics]
-            post_data["sources"] = sources
-            
-            # Add attribution to content
-            attribution = "\n\nSources:\n" + "\n".join([f"• {url}" for url in sources])
-            full_content = f"{post_data['hook']}\n\n{post_data['insight']}\n\n{post_data['takeaway']}\n\n{post_data['cta']}{attribution}"
-            
-            # Validate length
             char_count = len(full_content)
-            if char_count < settings.min_post_length or char_count > settings.max_post_length:
-                logger.warning(f"Post length {char_count} outside bounds, regenerating...")
-                return self._regenerate_with_length_constraint(db, topic_ids, char_count)
+            if best is None or self._length_miss(char_count) < self._length_miss(len(best[0])):
+                best = (full_content, post_data)
+            if not self._length_miss(char_count):
+                break
+            
+            logger.info(f"Post length {char_count} outside bounds on attempt {attempt}")
+            messages = self._with_length_feedback(messages, post_content, char_count, post_data)
+        
+        if best is None:
+            raise ValueError(f"Reply did not match the post schema: {error}")
+        return best
+    
+    async def _agenerate_within_bounds(
+        self,
+        messages: List[Dict],
+        topics: List[Topic],
+        fresh: bool,
+        candidates: int,
+        budget: PostBudget
+    ) -> Tuple[str, Dict]:
+        """Async _generate_within_bounds drafting several candidates per attempt.
+        
+        A candidate inside the length window always beats one outside it;
+        the local quality score breaks ties.
+        """
+        best = None
+        format_retried = False
+        # With n= the prompt is billed once, parallel calls pay for it per candidate
+        prompt_copies = 1 if settings.post_generation_candidate_mode == "n" else candidates
+        
+        for attempt in range(1, settings.post_generation_max_attempts + 1):
+            if attempt > 1 and not budget.allows(
+                count_message_tokens(messages) * prompt_copies,
+                settings.post_completion_max_tokens * candidates
+            ):
+                logger.warning(f"Post token budget reached after {attempt - 1} attempts ({budget.used} tokens)")
+                break
             
-            # Save to database
-            linkedin_post = LinkedInPost(
-                topic_ids=topic_ids,
-                content=full_content,
-                hook=post_data["hook"],
-                insight=post_data["insight"],
-                takeaway=post_data["takeaway"],
-                cta=post_data["cta"],
-                sources=sources,
-                created_at=datetime.utcnow(),
-                status="queued"
+            contents = await self._acomplete_candidates(
+                messages=messages,
+                n=candidates,
+                fresh=fresh,
+                budget=budget,
+                temperature=0.7,
+                max_tokens=settings.post_completion_max_tokens,
+                response_format=JSON_RESPONSE_FORMAT
             )
+            metrics.incr("generation.attempts")
+            metrics.incr("generation.candidates", len(contents))
             
-            db.add(linkedin_post)
-            db.commit()
+            ranked, error = self._rank_candidates(contents, topics)
             
-            logger.info(f"Generated LinkedIn post with {char_count} characters")
+            if not ranked:
+                # No candidate could be repaired, re-prompt once with the error
+                if format_retried:
+                    break
+                format_retried = True
+                logger.info(f"No valid draft among {len(contents)} on attempt {attempt}: {error}")
+                messages = self._with_format_feedback(messages, contents[0], error)
+                continue
+            miss, _, post_content, full_content, post_data = min(ranked, key=lambda c: (c[0], c[1]))
             
-            return {
-                "id": linkedin_post.id,
-                "content": full_content,
-                "char_count": char_count,
-                "topics": [t.title for t in topics]
-            }
+            if best is None or miss < self._length_miss(len(best[0])):
+                best = (full_content, post_data)
+            if not miss:
+                break
             
-        except Exception as e:
-            logger.error(f"Error generating post: {str(e)}")
-            return None
+            logger.info(f"Best of {len(contents)} drafts is {len(full_content)} characters on attempt {attempt}")
+            messages = self._with_length_feedback(messages, post_content, len(full_content), post_data)
+        
+        if best is None:
+            raise ValueError(f"No draft matched the post schema: {error}")
+        return best
+    
+    def _rank_candidates(self, contents: List[str], topics: List[Topic]) -> Tuple[List[Tuple], Optional[str]]:
+        """(length miss, -quality score, reply, post, sections) for every reply that parses, scored as one batch."""
+        parsed = []
+        error = None
+        for post_content in contents:
+            post_data, error = parse_sections(post_content)
+            if post_data is not None:
+                parsed.append((post_content, *self._fit_length(post_data, topics)))
+        
+        scores = quality_scorer.score_batch(
+            [full_content for _, full_content, _ in parsed],
+            [post_data for _, _, post_data in parsed],
+            [topics] * len(parsed)
+        )
+        ranked = [
+            (self._length_miss(len(full_content)), -quality["score"], post_content, full_content, post_data)
+            for (post_content, full_content, post_data), quality in zip(parsed, scores)
+        ]
+        return ranked, error
+    
+    async def _aregenerate_for_quality(
+        self,
+        messages: List[Dict],
+        topics: List[Topic],
+        full_content: str,
+        post_data: Dict,
+        quality: Dict,
+        fresh: bool,
+        candidates: int,
+        budget: PostBudget
+    ) -> Tuple[str, Dict, Dict]:
+        """One re-prompt aimed at the draft's weakest quality checks. Keeps the better of the two drafts."""
+        draft = json.dumps({name: post_data[name] for name in SECTIONS})
+        retry_messages = messages + [
+            {"role": "assistant", "content": draft},
+            {"role": "user", "content": (
+                f"Improve this post. {quality_scorer.feedback(quality, topics)} "
+                f"Reply with the same JSON format."
+            )}
+        ]
+        prompt_copies = 1 if settings.post_generation_candidate_mode == "n" else candidates
+        if not budget.allows(count_message_tokens(retry_messages) * prompt_copies, settings.post_completion_max_tokens * candidates):
+            return full_content, post_data, quality
+        
+        metrics.incr("generation.quality_retries")
+        contents = await self._acomplete_candidates(
+            messages=retry_messages,
+            n=candidates,
+            fresh=fresh,
+            budget=budget,
+            temperature=0.7,
+            max_tokens=settings.post_completion_max_tokens,
+            response_format=JSON_RESPONSE_FORMAT
+        )
+        ranked, _ = self._rank_candidates(contents, topics)
+        ranked = [candidate for candidate in ranked if not candidate[0]]
+        if not ranked:
+            return full_content, post_data, quality
+        
+        _, score, _, retry_content, retry_data = min(ranked, key=lambda c: c[1])
+        if -score <= quality["score"]:
+            return full_content, post_data, quality
+        logger.info(f"Quality regeneration raised the score from {quality['score']} to {-score}")
+        return retry_content, retry_data, quality_scorer.score(retry_content, retry_data, topics)
+    
+    def _with_format_feedback(self, messages: List[Dict], post_content: str, error: str) -> List[Dict]:
+        metrics.incr("generation.parse_retries")
+        return messages + [
+            {"role": "assistant", "content": post_content},
+            {"role": "user", "content": (
+                f"That reply could not be used: {error}. Reply with only a JSON object with the "
+                f'non-empty string fields "hook", "insight", "takeaway" and "cta".'
+            )}
+        ]
+    
+    def _with_length_feedback(self, messages: List[Dict], post_content: str, char_count: int, post_data: Dict) -> List[Dict]:
+        # Continue the conversation so the model edits its draft instead of starting over
+        return messages + [
+            {"role": "assistant", "content": post_content},
+            {"role": "user", "content": self._length_feedback(char_count, len(self._attribution(post_data["sources"])))}
+        ]
+    
+    def _length_miss(self, char_count: int) -> int:
+        """Characters outside the length window, 0 when the post fits."""
+        return max(settings.min_post_length - char_count, char_count - settings.max_post_length, 0)
+    
+    def _assemble(self, post_data: Dict, attribution: str) -> str:
+        return f"{post_data['hook']}\n\n{post_data['insight']}\n\n{post_data['takeaway']}\n\n{post_data['cta']}{attribution}"
+    
+    def _attribution(self, sources: List[str], titles: Optional[List[str]] = None) -> str:
+        if titles:
+            return "\n\nSources:\n" + "\n".join([f"• {title} - {url}" for title, url in zip(titles, sources)])
+        return "\n\nSources:\n" + "\n".join([f"• {url}" for url in sources])
+    
+    def _fit_length(self, post_data: Dict, topics: List[Topic]) -> Tuple[str, Dict]:
+        """Bring a draft into the length window without another LLM call where possible.
+        
+        Too long: shorten source links, then drop trailing sentences from the
+        longest body section. Too short: add the hashtags line if the model left
+        it out, then name each source next to its link.
+        """
+        post_data = dict(post_data)
+        post_data["sources"] = [topic.url for topic in topics]
+        attribution = self._attribution(post_data["sources"])
+        full_content = self._assemble(post_data, attribution)
+        
+        if len(full_content) > settings.max_post_length:
+            post_data["sources"] = [_short_url(url) for url in post_data["sources"]]
+            attribution = self._attribution(post_data["sources"])
+            full_content = self._assemble(post_data, attribution)
+            
+            while len(full_content) > settings.max_post_length and _trim_sentence(post_data):
+                full_content = self._assemble(post_data, attribution)
+            
+            metrics.incr("generation.local_fixes")
+        
+        elif len(full_content) < settings.min_post_length:
+            if "#" not in full_content:
+                post_data["cta"] = f"{post_data['cta']}\n\n{HASHTAGS}"
+                full_content = self._assemble(post_data, attribution)
+            
+            if len(full_content) < settings.min_post_length:
+                detailed = self._attribution(post_data["sources"], [topic.title for topic in topics])
+                # Only worth it if it does not overshoot the window
+                if len(self._assemble(post_data, detailed)) <= settings.max_post_length:
+                    full_content = self._assemble(post_data, detailed)
+            
+            metrics.incr("generation.local_fixes")
+        
+        return full_content, post_data
+    
+    def _length_feedback(self, char_count: int, attribution_length: int) -> str:
+        target = (settings.min_post_length + settings.max_post_length) // 2
+        direction = "Shorten" if char_count > settings.max_post_length else "Expand"
+        return (
+            f"That post came out at {char_count} characters, including a {attribution_length}-character "
+            f"sources block that is added automatically. The total must be between {settings.min_post_length} "
+            f"and {settings.max_post_length} characters. {direction} the hook, insight, takeaway and cta by "
+            f"about {abs(char_count - target)} characters (roughly {target - attribution_length} characters "
+            f"across those four sections) and reply with the same JSON format."
+        )
+    
+    def _complete(
+        self,
+        messages: List[Dict],
+        fresh: bool = False,
+        model: Optional[str] = None,
+        budget: Optional[PostBudget] = None,
+        **params
+    ) -> str:
+        """Chat completion through the response cache; fresh=True always calls the API."""
+        model = model or self.model
+        key = response_cache.make_key(model, messages, **params)
+        
+        if fresh:
+            metrics.incr("llm_cache.bypassed")
+        else:
+            cached = response_cache.get(key)
+            if cached:
+                return cached["content"]
+        
+        response = self.client.chat.completions.create(model=model, messages=messages, **params)
+        content = response.choices[0].message.content
+        if budget is not None:
+            budget.record(messages, [content], getattr(response, "usage", None))
+        
+        # A fresh variant replaces the cached one for later identical requests
+        response_cache.put(key, {"content": content, "model": model})
+        
+        return content
+    
+    async def _acomplete_candidates(
+        self,
+        messages: List[Dict],
+        n: int = 1,
+        fresh: bool = False,
+        model: Optional[str] = None,
+        budget: Optional[PostBudget] = None,
+        **params
+    ) -> List[str]:
+        """n chat completions for one prompt on the async client, cached as a set.
+        
+        In "n" mode one request asks for all choices; in "parallel" mode n
+        requests run concurrently, bounded by the generator's semaphore.
+        """
+        model = model or self.model
+        key_params = dict(params, n=n) if n > 1 else params
+        key = response_cache.make_key(model, messages, **key_params)
+        
+        if fresh:
+            metrics.incr("llm_cache.bypassed")
+        else:
+            cached = response_cache.get(key)
+            if cached:
+                return cached.get("candidates") or [cached["content"]]
+        
+        async def request(choices: int) -> List[str]:
+            async with self._semaphore:
+                extra = {"n": choices} if choices > 1 else {}
+                response = await self.async_client.chat.completions.create(model=model, messages=messages, **extra, **params)
+            contents = [choice.message.content for choice in response.choices]
+            if budget is not None:
+                budget.record(messages, contents, getattr(response, "usage", None))
+            return contents
+        
+        if n == 1 or settings.post_generation_candidate_mode == "n":
+            contents = await request(n)
+        else:
+            results = await asyncio.gather(*[request(1) for _ in range(n)], return_exceptions=True)
+            contents = [content for result in results if isinstance(result, list) for content in result]
+            if not contents:
+                raise results[0]
+        
+        response_cache.put(key, {"content": contents[0], "candidates": contents, "model": model})
+        
+        return contents
+    
+    async def _astream_completion(
+        self,
+        messages: List[Dict],
+        fresh: bool = False,
+        model: Optional[str] = None,
+        budget: Optional[PostBudget] = None,
+        **params
+    ) -> AsyncIterator[str]:
+        """Streamed chat completion deltas, sharing cache entries with _complete.
+        
+        A cache hit is replayed as a single delta.
+        """
+        model = model or self.model
+        key = response_cache.make_key(model, messages, **params)
+        
+        if fresh:
+            metrics.incr("llm_cache.bypassed")
+        else:
+            cached = response_cache.get(key)
+            if cached:
+                yield cached["content"]
+                return
+        
+        parts = []
+        async with self._semaphore:
+            stream = await self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                **params
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        
+        # Stream chunks carry no usage, count the received text locally
+        if budget is not None:
+            budget.record(messages, ["".join(parts)])
+        
+        response_cache.put(key, {"content": "".join(parts), "model": model})
+    
+    def select_companion_topics(self, db: Session, anchor_id: int, count: int = 2) -> List[int]:
+        """Pick the unused clustered topics most similar to the anchor topic."""
+        related = related_index.related(anchor_id, k=count * 5)
+        if not related:
+            return []
+        
+        similarity = dict(related)
+        candidates = db.query(Topic).filter(
+            Topic.id.in_(list(similarity)),
+            Topic.processed == True,
+            unused_topic()
+        ).all()
+        candidates.sort(key=lambda t: similarity[t.id], reverse=True)
+        
+        return [t.id for t in candidates[:count]]
     
     def _get_system_prompt(self) -> str:
         return """You are an expert Android developer and LinkedIn content creator. Generate engaging LinkedIn posts about Android development trends.
@@ -118,42 +762,101 @@ Format your response as JSON:
     "cta": "..."
 }"""
     
-    def _prepare_context(self, topics: List[Topic]) -> str:
-        context = "Create a LinkedIn post based on these trending Android development topics:\n\n"
+    def _prepare_context(self, topics: List[Topic], content_chars: Optional[Dict[int, int]] = None) -> str:
+        parts = ["Create a LinkedIn post based on these trending Android development topics:\n\n"]
         
         for i, topic in enumerate(topics, 1):
-            context += f"{i}. {topic.title}\n"
-            if topic.content:
-                context += f"   Context: {topic.content[:200]}...\n"
-            context += f"   Engagement: {topic.score} points, {topic.engagement} comments\n"
-            context += f"   Source: {topic.source}\n\n"
+            excerpt = self._topic_excerpt(topic, (content_chars or {}).get(topic.id))
+            parts.append(f"{i}. {topic.title}\n")
+            if excerpt:
+                parts.append(f"   Context: {excerpt}\n")
+            parts.append(f"   Engagement: {topic.score} points, {topic.engagement} comments\n")
+            parts.append(f"   Source: {topic.source}\n\n")
         
-        context += "\nCreate an original post that synthesizes these trends. DO NOT copy text directly."
+        parts.append("\nCreate an original post that synthesizes these trends. DO NOT copy text directly.")
         
-        return context
+        return "".join(parts)
     
-    def _parse_post_content(self, content: str) -> Dict:
-        try:
-            # Try to parse as JSON first
-            data = json.loads(content)
-            return {
-                "hook": data.get("hook", ""),
-                "insight": data.get("insight", ""),
-                "takeaway": data.get("takeaway", ""),
-                "cta": data.get("cta", "")
-            }
-        except:
-            # Fallback to text parsing
-            lines = content.split("\n")
-            return {
-                "hook": lines[0] if lines else "",
-                "insight": "\n".join(lines[1:4]) if len(lines) > 1 else "",
-                "takeaway": "\n".join(lines[4:6]) if len(lines) > 4 else "",
-                "cta": lines[-1] if lines else ""
-            }
+    def _topic_excerpt(self, topic: Topic, max_chars: Optional[int] = None) -> Optional[str]:
+        """Extractive summary of the topic content, cached on the topic."""
+        if not topic.content or max_chars == 0:
+            return None
+        if topic.summary is None:
+            topic.summary = summarizer.summarize(topic.content)
+        if max_chars is None or max_chars >= len(topic.summary):
+            return topic.summary
+        return summarizer.summarize(topic.summary, max_chars=max_chars)
     
-    def _regenerate_with_length_constraint(self, db: Session, topic_ids: List[int], current_length: int) -> Dict:
-        # Implement length-constrained regeneration
-        logger.info(f"Regenerating post with length constraint (current: {current_length})")
-        # For now, return the original attempt
-        return self.generate_post(db, topic_ids)
\ No newline at end of file
+    def _compact_context(self, topics: List[Topic]) -> Tuple[List[Topic], str]:
+        """Fit the topic context into post_context_token_limit.
+        
+        Content summaries of the lowest-ranked topics are shortened, then
+        dropped, then whole topics are dropped. The best topic always stays.
+        """
+        limit = settings.post_context_token_limit
+        kept = list(topics)
+        content_chars = {}
+        context = self._prepare_context(kept)
+        if token_budget.count_tokens(context) <= limit:
+            return kept, context
+        
+        metrics.incr("generation.context_compactions")
+        lowest_first = sorted(topics, key=lambda t: t.rank_score or 0)
+        
+        for chars in (settings.topic_summary_max_chars // 2, 0):
+            for topic in lowest_first:
+                content_chars[topic.id] = chars
+                context = self._prepare_context(kept, content_chars)
+                if token_budget.count_tokens(context) <= limit:
+                    return kept, context
+        
+        for topic in lowest_first[:-1]:
+            kept.remove(topic)
+            context = self._prepare_context(kept, content_chars)
+            if token_budget.count_tokens(context) <= limit:
+                break
+        
+        logger.info(f"Compacted generation context to {len(kept)} of {len(topics)} topics")
+        return kept, context
+
+
+def _short_url(url: str) -> str:
+    """Reddit permalinks carry the title slug; redd.it/<id> points at the same post."""
+    match = re.search(r"reddit\.com/r/[^/]+/comments/([a-z0-9]+)", url)
+    return f"https://redd.it/{match.group(1)}" if match else url
+
+
+def _trim_sentence(post_data: Dict) -> bool:
+    """Drop the last sentence of the longer of insight and takeaway, keeping at least one."""
+    for section in sorted(["insight", "takeaway"], key=lambda name: len(post_data[name]), reverse=True):
+        sentences = re.split(r"(?<=[.!?])\s+", post_data[section].strip())
+        if len(sentences) > 1:
+            post_data[section] = " ".join(sentences[:-1])
+            return True
+    return False
+
+
+def generation_stats() -> Dict:
+    """Length success rate, LLM attempts per post, reply parse outcomes and streaming latency since startup."""
+    finished = metrics.get("generation.length_ok") + metrics.get("generation.length_failures")
+    streams = metrics.get("generation.streams")
+    replies = sum(metrics.get(f"generation.parse_{outcome}") for outcome in ("ok", "repaired", "failures"))
+    return {
+        "posts": int(finished),
+        "length_ok": int(metrics.get("generation.length_ok")),
+        "length_failures": int(metrics.get("generation.length_failures")),
+        "length_success_rate": metrics.get("generation.length_ok") / finished if finished else None,
+        "attempts": int(metrics.get("generation.attempts")),
+        "avg_attempts_per_post": metrics.get("generation.attempts") / finished if finished else None,
+        "candidates": int(metrics.get("generation.candidates")),
+        "streams": int(streams),
+        "avg_stream_ttft_ms": round(metrics.get("generation.stream_ttft_seconds") / streams * 1000) if streams else None,
+        "avg_stream_total_ms": round(metrics.get("generation.stream_seconds") / streams * 1000) if streams else None,
+        "local_fixes": int(metrics.get("generation.local_fixes")),
+        "duplicate_refusals": int(metrics.get("post_dedup.rejections")),
+        "quality_retries": int(metrics.get("generation.quality_retries")),
+        "quality_rejections": int(metrics.get("generation.quality_rejections")),
+        "parse_failure_rate": metrics.get("generation.parse_failures") / replies if replies else None,
+        "parse_repair_rate": metrics.get("generation.parse_repaired") / replies if replies else None,
+        "parse_retries": int(metrics.get("generation.parse_retries"))
+    }
\ No newline at end of file
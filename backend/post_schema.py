@@ -0,0 +1,112 @@
+import re
+import json
+import logging
+from typing import Dict, Optional, Tuple
+from pydantic import BaseModel, ValidationError, field_validator
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Ask the API for a syntactically valid JSON object
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+KEY_ALIASES = {
+    "calltoaction": "cta",
+    "insights": "insight",
+    "takeaways": "takeaway",
+    "opening": "hook"
+}
+
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class PostSections(BaseModel):
+    """The four sections every post reply must contain."""
+    hook: str
+    insight: str
+    takeaway: str
+    cta: str
+    
+    @field_validator("hook", "insight", "takeaway", "cta")
+    @classmethod
+    def not_blank(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("must not be empty")
+        return value.strip()
+
+
+SECTIONS = list(PostSections.model_fields)
+
+
+def parse_sections(content: Optional[str]) -> Tuple[Optional[Dict], Optional[str]]:
+    """Validate a model reply against PostSections, repairing common defects locally.
+
+    Returns (sections, None) on success, or (None, error) where the error is
+    worded to be fed back to the model.
+    """
+    data, repaired = _load_object(content or "")
+    if data is None:
+        metrics.incr("generation.parse_failures")
+        return None, "the reply was not a JSON object"
+    
+    data, normalized = _normalize(data)
+    try:
+        sections = PostSections.model_validate(data)
+    except ValidationError as e:
+        metrics.incr("generation.parse_failures")
+        return None, _describe(e)
+    
+    if repaired or normalized:
+        metrics.incr("generation.parse_repaired")
+    else:
+        metrics.incr("generation.parse_ok")
+    return sections.model_dump(), None
+
+
+def _load_object(content: str) -> Tuple[Optional[Dict], bool]:
+    try:
+        data = json.loads(content)
+        return (data, False) if isinstance(data, dict) else (None, False)
+    except ValueError:
+        pass
+    
+    # Code fences or prose around the object, raw newlines in strings, trailing commas
+    match = re.search(r"\{.*\}", content, re.S)
+    if not match:
+        return None, False
+    try:
+        data = json.loads(TRAILING_COMMA.sub(r"\1", match.group(0)), strict=False)
+    except ValueError:
+        return None, False
+    return (data, True) if isinstance(data, dict) else (None, False)
+
+
+def _normalize(data: Dict) -> Tuple[Dict, bool]:
+    """Unwrap a single nested object, map key variants and join list values."""
+    changed = False
+    if len(data) == 1:
+        inner = next(iter(data.values()))
+        if isinstance(inner, dict):
+            data, changed = inner, True
+    
+    normalized = {}
+    for key, value in data.items():
+        name = re.sub(r"[^a-z]", "", str(key).lower())
+        name = KEY_ALIASES.get(name, name)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            value = "\n".join(value)
+            changed = True
+        if name != key:
+            changed = True
+        normalized[name] = value
+    
+    return normalized, changed
+
+
+def _describe(error: ValidationError) -> str:
+    problems = []
+    for item in error.errors():
+        field = ".".join(str(part) for part in item["loc"]) or "reply"
+        message = "is missing" if item["type"] == "missing" else item["msg"].lower()
+        problems.append(f'"{field}" {message}')
+    return "; ".join(problems)
\ No newline at end of file
@@ -0,0 +1,317 @@
+import os
+import re
+import uuid
+import random
+import socket
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from database import SessionLocal, LinkedInPost, PublishOutbox, Settings
+from linkedin_poster import LinkedInPoster
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CLAIMABLE = ["pending", "publishing"]
+DUPLICATE_URN = re.compile(r"urn:li:(?:share|ugcPost):\d+")
+
+
+def _idempotency_key(post: LinkedInPost) -> str:
+    return hashlib.sha256(f"{post.id}:{post.content}".encode("utf-8")).hexdigest()[:32]
+
+
+def _retryable(result: Dict) -> bool:
+    # No response (timeout, connection error), rate limited or a server error
+    if result.get("retryable") is False:
+        return False
+    status = result["status_code"]
+    return status is None or status == 429 or status >= 500
+
+
+def _duplicate_urn(result: Dict) -> Optional[str]:
+    """Share URN from LinkedIn's 422 duplicate-content error, which means an earlier attempt went through."""
+    if result["status_code"] == 422 and "duplicate" in result["message"].lower():
+        match = DUPLICATE_URN.search(result["message"])
+        return match.group(0) if match else ""
+    return None
+
+
+class OutboxPublisher:
+    """Delivers posts queued in the publish_outbox table to LinkedIn.
+
+    Workers claim due rows with a conditional UPDATE that takes a time-limited
+    lease, so several processes can share one outbox and rows held by a
+    crashed worker are picked up again once the lease lapses. Timeouts, 429s
+    and 5xx responses are retried with exponential backoff and jitter, and
+    every attempt for a post carries the same idempotency key. Posts per UTC
+    day are capped at the lower of the max_posts_per_day setting and
+    linkedin_rate_limit.
+    """
+    
+    def __init__(self, poster: Optional[LinkedInPoster] = None, session_factory=None):
+        self.poster = poster or LinkedInPoster()
+        self.session_factory = session_factory or SessionLocal
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._wake = asyncio.Event()
+        self._task = None
+    
+    def enqueue(self, db: Session, post_id: int) -> Optional[PublishOutbox]:
+        """Queue a post for publishing. Queuing a post twice returns its existing entry."""
+        post = db.query(LinkedInPost).filter(LinkedInPost.id == post_id).first()
+        if not post or post.status == "posted":
+            return None
+        
+        entry = db.query(PublishOutbox).filter(PublishOutbox.post_id == post_id).first()
+        if entry is None:
+            entry = PublishOutbox(
+                post_id=post_id,
+                idempotency_key=_idempotency_key(post),
+                status="pending",
+                attempts=0,
+                next_attempt_at=datetime.utcnow()
+            )
+            db.add(entry)
+        elif entry.status == "failed":
+            # A manual retry gets a fresh round of attempts under the same key
+            entry.status = "pending"
+            entry.attempts = 0
+            entry.next_attempt_at = datetime.utcnow()
+            entry.last_error = None
+        
+        post.status = "publishing"
+        post.error_message = None
+        db.commit()
+        self._wake.set()
+        return entry
+    
+    def daily_cap(self, db: Session) -> int:
+        cap = settings.linkedin_rate_limit
+        setting = db.query(Settings).filter(Settings.key == "max_posts_per_day").first()
+        if setting:
+            try:
+                cap = min(cap, int(setting.value))
+            except ValueError:
+                logger.warning(f"Ignoring invalid max_posts_per_day setting: {setting.value}")
+        return cap
+    
+    def remaining_today(self, db: Session) -> int:
+        now = datetime.utcnow()
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        published = db.query(LinkedInPost).filter(LinkedInPost.posted_at >= day_start).count()
+        # Leased rows may land today too
+        in_flight = db.query(PublishOutbox).filter(
+            PublishOutbox.status == "publishing",
+            PublishOutbox.lease_expires_at > now
+        ).count()
+        return max(self.daily_cap(db) - published - in_flight, 0)
+    
+    def claim(self, db: Session, limit: int) -> List[int]:
+        """Lease up to `limit` due entries for this worker."""
+        now = datetime.utcnow()
+        lease_free = or_(PublishOutbox.lease_expires_at.is_(None), PublishOutbox.lease_expires_at < now)
+        due = db.query(PublishOutbox.id).filter(
+            PublishOutbox.status.in_(CLAIMABLE),
+            PublishOutbox.next_attempt_at <= now,
+            lease_free
+        ).order_by(PublishOutbox.next_attempt_at).limit(limit * 2).all()
+        
+        claimed = []
+        for (entry_id,) in due:
+            if len(claimed) >= limit:
+                break
+            # Only one worker's UPDATE matches while the lease is free
+            updated = db.query(PublishOutbox).filter(
+                PublishOutbox.id == entry_id,
+                PublishOutbox.status.in_(CLAIMABLE),
+                lease_free
+            ).update({
+                PublishOutbox.status: "publishing",
+                PublishOutbox.lease_owner: self.worker_id,
+                PublishOutbox.lease_expires_at: now + timedelta(seconds=settings.publisher_lease_seconds)
+            }, synchronize_session=False)
+            db.commit()
+            if updated:
+                claimed.append(entry_id)
+        
+        return claimed
+    
+    async def run_once(self) -> int:
+        """Publish the entries that are due, within the daily cap. Returns how many were attempted."""
+        db = self.session_factory()
+        try:
+            limit = min(settings.publisher_concurrency, self.remaining_today(db))
+            claimed = self.claim(db, limit) if limit else []
+        finally:
+            db.close()
+        
+        if claimed:
+            await asyncio.gather(*[self._deliver(entry_id) for entry_id in claimed])
+        return len(claimed)
+    
+    async def _deliver(self, entry_id: int) -> bool:
+        db = self.session_factory()
+        try:
+            entry = db.query(PublishOutbox).filter(PublishOutbox.id == entry_id).first()
+            post = db.query(LinkedInPost).filter(LinkedInPost.id == entry.post_id).first()
+            now = datetime.utcnow()
+            
+            if post is None or post.status == "posted":
+                entry.status = "failed" if post is None else "done"
+                entry.last_error = "Post deleted" if post is None else None
+                entry.lease_owner = entry.lease_expires_at = None
+                db.commit()
+                return post is not None
+            
+            entry.attempts += 1
+            if post.media_paths:
+                result = await self.poster.upload_media(db, post.media_paths)
+                if result["success"]:
+                    # Uploads can outlast the lease, a reclaimed entry belongs to the other worker now
+                    if not self._renew_lease(db, entry_id):
+                        logger.warning(f"Lease on outbox entry {entry_id} lapsed during media upload, leaving it to its new owner")
+                        return False
+                    result = await self.poster.publish(post.content, entry.idempotency_key, media=result["assets"])
+            else:
+                result = await self.poster.publish(post.content, entry.idempotency_key)
+            metrics.incr("publisher.attempts")
+            
+            # A retry after an ambiguous failure can find the post already live
+            if not result["success"] and entry.attempts > 1:
+                urn = _duplicate_urn(result)
+                if urn is not None:
+                    result = {**result, "success": True, "post_id": urn}
+            
+            now = datetime.utcnow()
+            if result["success"]:
+                post.status = "posted"
+                post.posted_at = now
+                post.linkedin_post_id = result["post_id"]
+                entry.status = "done"
+                entry.published_at = now
+                entry.last_error = None
+                metrics.incr("publisher.published")
+                logger.info(f"Published post {post.id} to LinkedIn: {result['post_id']}")
+            elif _retryable(result) and entry.attempts < settings.publisher_max_attempts:
+                delay = self._backoff(entry.attempts, result["retry_after"])
+                entry.status = "pending"
+                entry.next_attempt_at = now + delay
+                entry.last_error = result["message"]
+                metrics.incr("publisher.retries")
+                logger.warning(f"Publishing post {post.id} failed (attempt {entry.attempts}), retrying in {delay.total_seconds():.0f}s: {result['message']}")
+            else:
+                entry.status = "failed"
+                entry.last_error = result["message"]
+                post.status = "failed"
+                post.error_message = result["message"]
+                metrics.incr("publisher.failures")
+                logger.error(f"Giving up on publishing post {post.id} after {entry.attempts} attempts: {result['message']}")
+            
+            entry.lease_owner = None
+            entry.lease_expires_at = None
+            db.commit()
+            return result["success"]
+        
+        except Exception as e:
+            # The lease lapses and a later pass picks the entry up again
+            logger.error(f"Error delivering outbox entry {entry_id}: {str(e)}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+    
+    def _renew_lease(self, db: Session, entry_id: int) -> bool:
+        """Restart this worker's lease on an entry. False when another worker holds it."""
+        updated = db.query(PublishOutbox).filter(
+            PublishOutbox.id == entry_id,
+            PublishOutbox.lease_owner == self.worker_id
+        ).update({
+            PublishOutbox.lease_expires_at: datetime.utcnow() + timedelta(seconds=settings.publisher_lease_seconds)
+        }, synchronize_session=False)
+        db.commit()
+        return bool(updated)
+    
+    def _backoff(self, attempts: int, retry_after: Optional[float] = None) -> timedelta:
+        # Exponential with equal jitter, never sooner than the server asked
+        ceiling = min(settings.publisher_backoff_max, settings.publisher_backoff_base * 2 ** (attempts - 1))
+        delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        if retry_after:
+            delay = max(delay, retry_after)
+        return timedelta(seconds=delay)
+    
+    def _idle_seconds(self) -> float:
+        """Until the next entry is due, at most the poll interval. Until the next UTC day once the cap is spent."""
+        db = self.session_factory()
+        try:
+            if not self.remaining_today(db):
+                now = datetime.utcnow()
+                tomorrow = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+                until_tomorrow = max((tomorrow - now).total_seconds(), 1)
+                # A leased entry that fails gives its share of the cap back
+                leased = db.query(PublishOutbox).filter(
+                    PublishOutbox.status == "publishing",
+                    PublishOutbox.lease_expires_at > now
+                ).count()
+                return min(until_tomorrow, settings.publisher_poll_interval) if leased else until_tomorrow
+            next_due = db.query(PublishOutbox.next_attempt_at).filter(
+                PublishOutbox.status.in_(CLAIMABLE)
+            ).order_by(PublishOutbox.next_attempt_at).first()
+        finally:
+            db.close()
+        
+        if not next_due or not next_due[0]:
+            return settings.publisher_poll_interval
+        return min(max((next_due[0] - datetime.utcnow()).total_seconds(), 1), settings.publisher_poll_interval)
+    
+    async def run_forever(self):
+        while True:
+            try:
+                attempted = await self.run_once()
+            except Exception as e:
+                logger.error(f"Error in publisher loop: {str(e)}")
+                attempted = 0
+            
+            # Keep draining while there is due work, otherwise sleep until woken
+            if attempted:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._idle_seconds())
+            except asyncio.TimeoutError:
+                pass
+            except Exception as e:
+                logger.error(f"Error in publisher loop: {str(e)}")
+                await asyncio.sleep(settings.publisher_poll_interval)
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self.run_forever())
+            logger.info(f"Publisher {self.worker_id} started")
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            logger.info("Publisher stopped")
+    
+    def stats(self, db: Session) -> Dict:
+        counts = {status: 0 for status in ["pending", "publishing", "done", "failed"]}
+        for entry in db.query(PublishOutbox.status).all():
+            counts[entry[0]] = counts.get(entry[0], 0) + 1
+        return {
+            **counts,
+            "daily_cap": self.daily_cap(db),
+            "remaining_today": self.remaining_today(db),
+            "attempts": int(metrics.get("publisher.attempts")),
+            "retries": int(metrics.get("publisher.retries")),
+            "published": int(metrics.get("publisher.published")),
+            "failures": int(metrics.get("publisher.failures"))
+        }
+
+
+# Global publisher instance
+publisher = OutboxPublisher()
\ No newline at end of file
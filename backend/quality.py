@@ -0,0 +1,159 @@
+import re
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from database import Topic
+from post_schema import SECTIONS
+from sources_config import LINKEDIN_CONTENT
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Share of the 1-10 score each check contributes
+WEIGHTS = {
+    "length": 0.25,
+    "structure": 0.2,
+    "originality": 0.2,
+    "readability": 0.15,
+    "hashtags": 0.1,
+    "coverage": 0.1
+}
+
+# What to ask for when a check comes out low, used for the one regeneration
+FEEDBACK = {
+    "length": "Keep the whole post between {min_length} and {max_length} characters.",
+    "structure": "Open with a hook of one or two short lines and end with a question or a clear call to action.",
+    "originality": "Several passages repeat the source wording. Rewrite them in your own words.",
+    "readability": "Use shorter sentences, around 10 to 20 words each, and plainer words.",
+    "hashtags": "End with two or three relevant hashtags such as {hashtags}.",
+    "coverage": "Make the post clearly about: {titles}."
+}
+
+CALL_TO_ACTION = re.compile(r"\?|\b(share|comment|follow|try|check|let me know|tell me|join)\b", re.I)
+HASHTAG = re.compile(r"#\w+")
+SENTENCE = re.compile(r"[^.!?\n]+[.!?]*")
+WORD = re.compile(r"[A-Za-z0-9']+")
+
+
+class PostQualityScorer:
+    """Local 1-10 quality score for drafts, with no LLM calls.
+
+    Combines length fit against min_post_length/max_post_length, structure
+    (all sections, a short hook, a call to action), hashtags, readability
+    (sentence and word length), originality (share of the draft's 6-word
+    shingles found in the source topics) and coverage of the topic titles.
+    Shingles and title terms go through hashing vectorizers, so a batch of
+    drafts is scored with a few sparse matrix operations and nothing has to
+    be fitted.
+    """
+    
+    def __init__(self, min_score: Optional[float] = None):
+        self.min_score = min_score if min_score is not None else LINKEDIN_CONTENT["min_quality_score"]
+        self.known_hashtags = {tag.lower() for tag in LINKEDIN_CONTENT["hashtags"]}
+        self._shingles = HashingVectorizer(
+            token_pattern=r"[a-z0-9]+", ngram_range=(6, 6), binary=True, norm=None, alternate_sign=False
+        )
+        self._terms = HashingVectorizer(
+            token_pattern=r"[a-z0-9]{4,}", binary=True, norm=None, alternate_sign=False
+        )
+    
+    def score(self, content: str, sections: Dict, topics: List[Topic]) -> Dict:
+        return self.score_batch([content], [sections], [topics])[0]
+    
+    def score_batch(self, contents: List[str], sections: List[Dict], topics: List[List[Topic]]) -> List[Dict]:
+        """{"score", "passed", "components"} per draft. components are in [0, 1]."""
+        if not contents:
+            return []
+        
+        bodies = [" ".join(draft.get(name, "") for name in SECTIONS) for draft in sections]
+        components = {
+            "length": self._length(np.array([len(content) for content in contents], dtype=float)),
+            "structure": self._structure(sections),
+            "originality": self._originality(bodies, topics),
+            "readability": self._readability(bodies),
+            "hashtags": self._hashtags(contents),
+            "coverage": self._coverage(bodies, topics)
+        }
+        scores = 1 + 9 * sum(WEIGHTS[name] * values for name, values in components.items())
+        
+        return [
+            {
+                "score": round(float(scores[i]), 1),
+                "passed": bool(scores[i] >= self.min_score),
+                "components": {name: round(float(values[i]), 2) for name, values in components.items()}
+            }
+            for i in range(len(contents))
+        ]
+    
+    def feedback(self, quality: Dict, topics: List[Topic], limit: int = 3) -> str:
+        """Instructions for the weakest checks, worded for a re-prompt."""
+        weakest = sorted(quality["components"].items(), key=lambda item: item[1])[:limit]
+        lines = [
+            FEEDBACK[name].format(
+                min_length=settings.min_post_length,
+                max_length=settings.max_post_length,
+                hashtags=" ".join(LINKEDIN_CONTENT["hashtags"][:3]),
+                titles="; ".join(topic.title for topic in topics)
+            )
+            for name, value in weakest if value < 0.8
+        ]
+        return " ".join(lines)
+    
+    def _length(self, lengths: np.ndarray) -> np.ndarray:
+        low, high = settings.min_post_length, settings.max_post_length
+        half = (high - low) / 2
+        inside = 1 - 0.3 * np.abs(lengths - (low + high) / 2) / half
+        miss = np.maximum(low - lengths, lengths - high)
+        outside = 0.6 * np.clip(1 - miss / half, 0, 1)
+        return np.where(miss <= 0, inside, outside)
+    
+    def _structure(self, sections: List[Dict]) -> np.ndarray:
+        filled = np.array([sum(1 for name in SECTIONS if draft.get(name, "").strip()) / len(SECTIONS) for draft in sections])
+        short_hook = np.array([0 < len(draft.get("hook", "")) <= 220 for draft in sections], dtype=float)
+        cta = np.array([bool(CALL_TO_ACTION.search(draft.get("cta", ""))) for draft in sections], dtype=float)
+        return 0.6 * filled + 0.2 * short_hook + 0.2 * cta
+    
+    def _hashtags(self, contents: List[str]) -> np.ndarray:
+        tags = [[tag.lower() for tag in HASHTAG.findall(content)] for content in contents]
+        count = np.array([len(found) for found in tags], dtype=float)
+        known = np.array([any(tag in self.known_hashtags for tag in found) for found in tags], dtype=float)
+        # A wall of hashtags reads as spam
+        return (0.5 * np.minimum(count, 3) / 3 + 0.5 * known) * np.where(count > 6, 0.5, 1.0)
+    
+    def _readability(self, bodies: List[str]) -> np.ndarray:
+        sentence_lengths = np.array([
+            np.mean([len(WORD.findall(sentence)) for sentence in SENTENCE.findall(body) if WORD.search(sentence)] or [0])
+            for body in bodies
+        ])
+        words = [WORD.findall(body) for body in bodies]
+        long_words = np.array([sum(1 for word in found if len(word) >= 13) / len(found) if found else 0 for found in words])
+        # Best between 8 and 20 words a sentence, nothing left at 3 or 40
+        fit = np.where(
+            sentence_lengths < 8,
+            np.clip((sentence_lengths - 3) / 5, 0, 1),
+            np.clip(1 - (sentence_lengths - 20) / 20, 0, 1)
+        )
+        return fit * (1 - np.minimum(3 * long_words, 0.5))
+    
+    def _originality(self, bodies: List[str], topics: List[List[Topic]]) -> np.ndarray:
+        drafts = self._shingles.transform([body.lower() for body in bodies])
+        sources = self._shingles.transform([
+            " ".join(f"{topic.title} {topic.content or ''}" for topic in draft_topics).lower()
+            for draft_topics in topics
+        ])
+        total = np.asarray(drafts.sum(axis=1)).ravel()
+        copied = np.asarray(drafts.multiply(sources).sum(axis=1)).ravel()
+        ratio = np.divide(copied, total, out=np.zeros_like(copied, dtype=float), where=total > 0)
+        return np.clip(1 - 2 * ratio, 0, 1)
+    
+    def _coverage(self, bodies: List[str], topics: List[List[Topic]]) -> np.ndarray:
+        titles = self._terms.transform([" ".join(topic.title or "" for topic in draft_topics).lower() for draft_topics in topics])
+        drafts = self._terms.transform([body.lower() for body in bodies])
+        total = np.asarray(titles.sum(axis=1)).ravel()
+        covered = np.asarray(titles.multiply(drafts).sum(axis=1)).ravel()
+        return np.divide(covered, total, out=np.ones_like(covered, dtype=float), where=total > 0)
+
+
+# Global quality scorer instance
+quality_scorer = PostQualityScorer()
\ No newline at end of file
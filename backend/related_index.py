@@ -0,0 +1,256 @@
+import os
+import threading
+import logging
+from typing import List, Tuple, Optional, Iterable
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.random_projection import SparseRandomProjection
+from sklearn.preprocessing import normalize
+import scipy.sparse as sp
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import Topic
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+HASH_FEATURES = 2 ** 18
+VECTOR_DIMS = 128
+
+
+class RelatedTopicIndex:
+    """Random-projection LSH index over topic vectors for "related topics" lookups.
+
+    Topics are embedded with a stateless hashing vectorizer and a seeded sparse
+    random projection, so vectors stay comparable across restarts and the index
+    can grow one fetch at a time without refitting. Candidates from the LSH
+    buckets (plus single-bit multi-probe) are re-ranked by exact cosine.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        n_tables: Optional[int] = None,
+        n_bits: Optional[int] = None,
+        seed: int = 42
+    ):
+        self.path = path
+        self.n_tables = n_tables or settings.related_index_tables
+        self.n_bits = n_bits or settings.related_index_bits
+        self.seed = seed
+        
+        self.hasher = HashingVectorizer(
+            n_features=HASH_FEATURES,
+            ngram_range=(1, 2),
+            stop_words='english',
+            alternate_sign=False,
+            norm='l2'
+        )
+        # Fitting only reads the input shape, the seed fixes the projection
+        self.projection = SparseRandomProjection(n_components=VECTOR_DIMS, random_state=seed)
+        self.projection.fit(sp.csr_matrix((1, HASH_FEATURES)))
+        
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((self.n_tables * self.n_bits, VECTOR_DIMS)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(self.n_bits, dtype=np.int64))
+        
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._reset()
+    
+    def _reset(self):
+        self._vectors = np.zeros((1024, VECTOR_DIMS), dtype=np.float32)
+        self._ids = np.zeros(1024, dtype=np.int64)
+        self._size = 0
+        self._id_to_row = {}
+        self._buckets = [dict() for _ in range(self.n_tables)]
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def max_topic_id(self) -> int:
+        return int(self._ids[:self._size].max()) if self._size else 0
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        projected = self.projection.transform(self.hasher.transform(texts))
+        if sp.issparse(projected):
+            projected = projected.toarray()
+        return normalize(projected).astype(np.float32)
+    
+    def _signatures(self, vectors: np.ndarray) -> np.ndarray:
+        """One integer bucket key per table for each vector, shape (n, n_tables)."""
+        bits = (vectors @ self.planes.T > 0).reshape(len(vectors), self.n_tables, self.n_bits)
+        return bits.astype(np.int64) @ self._bit_weights
+    
+    def add(self, topic_ids: Iterable[int], vectors: np.ndarray):
+        with self._lock:
+            self._add(list(topic_ids), vectors)
+    
+    def _add(self, topic_ids: List[int], vectors: np.ndarray):
+        keep = [i for i, topic_id in enumerate(topic_ids) if topic_id not in self._id_to_row]
+        if not keep:
+            return
+        topic_ids = [topic_ids[i] for i in keep]
+        vectors = vectors[keep]
+        
+        # Grow storage geometrically so incremental adds stay amortised O(1)
+        needed = self._size + len(topic_ids)
+        if needed > len(self._ids):
+            capacity = max(needed, len(self._ids) * 2)
+            self._vectors = np.resize(self._vectors, (capacity, VECTOR_DIMS))
+            self._ids = np.resize(self._ids, capacity)
+        
+        start = self._size
+        self._vectors[start:needed] = vectors
+        self._ids[start:needed] = topic_ids
+        self._size = needed
+        
+        signatures = self._signatures(vectors)
+        for offset, topic_id in enumerate(topic_ids):
+            row = start + offset
+            self._id_to_row[topic_id] = row
+            for table, key in enumerate(signatures[offset]):
+                self._buckets[table].setdefault(int(key), []).append(row)
+    
+    def remove(self, topic_ids: Iterable[int]) -> int:
+        """Drop topics from the index, returning how many of them were indexed."""
+        with self._lock:
+            removed = [topic_id for topic_id in set(topic_ids) if topic_id in self._id_to_row]
+            if not removed:
+                return 0
+            
+            # Rebuild rows and buckets from the survivors, deletions are rare next to adds
+            keep = ~np.isin(self._ids[:self._size], removed)
+            ids, vectors = self._ids[:self._size][keep].tolist(), self._vectors[:self._size][keep]
+            self._reset()
+            self._add(ids, vectors)
+        return len(removed)
+    
+    def query_vector(self, vector: np.ndarray, k: int = 5, exclude_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        with self._lock:
+            if not self._size:
+                return []
+            
+            signatures = self._signatures(vector.reshape(1, -1))[0]
+            flips = [0] + [1 << bit for bit in range(self.n_bits)]
+            
+            candidates = []
+            for table, key in enumerate(signatures):
+                buckets = self._buckets[table]
+                for flip in flips:
+                    rows = buckets.get(int(key) ^ flip)
+                    if rows:
+                        candidates.extend(rows)
+            
+            if not candidates:
+                return []
+            
+            # Dedupe with a scatter into a row mask, cheaper than np.unique's sort
+            seen = np.zeros(self._size, dtype=bool)
+            seen[np.asarray(candidates, dtype=np.int64)] = True
+            rows = np.flatnonzero(seen)
+            scores = self._vectors[rows] @ vector
+            ids = self._ids[rows]
+        
+        if exclude_id is not None:
+            mask = ids != exclude_id
+            scores, ids = scores[mask], ids[mask]
+        
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        return [(int(ids[i]), float(scores[i])) for i in top]
+    
+    def related(self, topic_id: int, k: int = 5) -> List[Tuple[int, float]]:
+        self.ensure_loaded()
+        # A concurrent add can regrow the storage, so read the row and its vector together
+        with self._lock:
+            row = self._id_to_row.get(topic_id)
+            if row is None:
+                return []
+            vector = self._vectors[row].copy()
+        return self.query_vector(vector, k=k, exclude_id=topic_id)
+    
+    def sync(self, db: Session, batch_size: int = 1000) -> int:
+        """Index topics ingested since the last sync, drop deleted ones and persist the index."""
+        self.ensure_loaded()
+        removed = self._remove_deleted(db)
+        added = 0
+        
+        while True:
+            topics = db.query(Topic).filter(
+                Topic.id > self.max_topic_id
+            ).order_by(Topic.id).limit(batch_size).all()
+            
+            if not topics:
+                break
+            
+            vectors = self.embed([f"{t.title} {t.content or ''}" for t in topics])
+            self.add([t.id for t in topics], vectors)
+            added += len(topics)
+        
+        if added or removed:
+            logger.info(f"Indexed {added} new topics, dropped {removed} deleted ones ({len(self)} total)")
+            self.save()
+        
+        return added
+    
+    def _remove_deleted(self, db: Session) -> int:
+        indexed = self.max_topic_id
+        if not indexed:
+            return 0
+        
+        # Every topic up to the newest indexed id is in the index, so a lower count means deletions
+        if db.query(func.count(Topic.id)).filter(Topic.id <= indexed).scalar() >= len(self):
+            return 0
+        
+        existing = {topic_id for (topic_id,) in db.query(Topic.id).filter(Topic.id <= indexed)}
+        with self._lock:
+            deleted = [topic_id for topic_id in self._id_to_row if topic_id not in existing]
+        return self.remove(deleted)
+    
+    def ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+    
+    def save(self):
+        if not self.path:
+            return
+        
+        with self._lock:
+            tmp_path = f"{self.path}.tmp.npz"
+            np.savez(
+                tmp_path,
+                vectors=self._vectors[:self._size],
+                ids=self._ids[:self._size],
+                config=np.array([self.n_tables, self.n_bits, self.seed, VECTOR_DIMS])
+            )
+            # Atomic swap so a crash mid-write never leaves a truncated index
+            os.replace(tmp_path, self.path)
+    
+    def load(self):
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        
+        try:
+            data = np.load(self.path)
+            config = data["config"].tolist()
+            if config != [self.n_tables, self.n_bits, self.seed, VECTOR_DIMS]:
+                logger.warning("Related topic index settings changed, rebuilding from scratch")
+                return
+            
+            with self._lock:
+                self._reset()
+                self._add(data["ids"].tolist(), data["vectors"])
+            logger.info(f"Loaded related topic index with {len(self)} topics")
+        except Exception as e:
+            logger.error(f"Error loading related topic index: {str(e)}")
+            self._reset()
+
+
+# Global index instance
+related_index = RelatedTopicIndex(settings.related_index_path)
\ No newline at end of file
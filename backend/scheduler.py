@@ -2,16 +2,31 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 import logging
+from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from database import get_db, Settings, SystemLog
+from database import get_db, Settings, SystemLog, Topic, LinkedInPost, unused_topic
 from fetchers import RedditFetcher, XFetcher
 from clustering import TopicClusterer
 from post_generator import LinkedInPostGenerator
 from linkedin_poster import LinkedInPoster
+from related_index import related_index
+from post_dedup import post_dedup
+from publisher import publisher
+from slot_planner import slot_planner, SlotDispatcher
+from draft_buffer import DraftBuffer
+from clients import clients
+from singleflight import flights
+from config import settings
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Jobs that can also be started by hand, by APScheduler job id
+MANUAL_JOBS = {
+    "fetch_topics": "fetch_topics_job",
+    "generate_post": "generate_and_post_job"
+}
+
 
 class TaskScheduler:
     def __init__(self):
@@ -19,13 +34,16 @@ class TaskScheduler:
         self.reddit_fetcher = RedditFetcher()
         self.x_fetcher = XFetcher()
         self.clusterer = TopicClusterer()
-        self.post_generator = LinkedInPostGenerator()
+        self.post_generator = LinkedInPostGenerator(clients)
         self.linkedin_poster = LinkedInPoster()
+        self.dispatcher = SlotDispatcher(self._publish_post)
+        self.draft_buffer = DraftBuffer(self._generate_on_demand)
         
     def start(self):
         # Add jobs
         self.scheduler.add_job(
-            func=self.fetch_topics_job,
+            func=self.run_job,
+            args=['fetch_topics'],
             trigger=IntervalTrigger(seconds=self._get_fetch_interval()),
             id='fetch_topics',
             name='Fetch trending topics',
@@ -33,28 +51,59 @@ class TaskScheduler:
         )
         
         self.scheduler.add_job(
-            func=self.generate_and_post_job,
+            func=self.run_job,
+            args=['generate_post'],
             trigger=IntervalTrigger(seconds=self._get_post_interval()),
             id='generate_post',
             name='Generate and post content',
             replace_existing=True
         )
         
+        if settings.batch_generation_enabled:
+            self.scheduler.add_job(
+                func=self.generate_batch_job,
+                trigger=IntervalTrigger(seconds=settings.batch_generation_interval),
+                id='generate_batch',
+                name='Generate scheduled drafts',
+                replace_existing=True
+            )
+        
         self.scheduler.start()
+        self.dispatcher.start()
+        if settings.draft_buffer_enabled:
+            self.draft_buffer.start()
         logger.info("Scheduler started")
     
     def stop(self):
         self.scheduler.shutdown()
+        self.dispatcher.stop()
+        self.draft_buffer.stop()
         logger.info("Scheduler stopped")
     
     def pause(self):
         self.scheduler.pause()
+        self.dispatcher.pause()
+        self.draft_buffer.pause()
         logger.info("Scheduler paused")
     
     def resume(self):
         self.scheduler.resume()
+        self.dispatcher.resume()
+        self.draft_buffer.resume()
         logger.info("Scheduler resumed")
     
+    async def run_job(self, job_id: str):
+        """Run a job, or wait for the run already in progress. Scheduled and manual runs share one flight."""
+        await flights.do(flights.make_key(job_id), getattr(self, MANUAL_JOBS[job_id]), ttl=0)
+    
+    def start_job(self, job_id: str) -> bool:
+        """Start a job in the background. False when a run of it is already in progress."""
+        key = flights.make_key(job_id)
+        if flights.in_flight(key):
+            return False
+        flights.start(key, getattr(self, MANUAL_JOBS[job_id]), ttl=0)
+        return True
+    
     def update_intervals(self, fetch_interval: int, post_interval: int):
         # Update fetch job
         self.scheduler.reschedule_job(
@@ -115,6 +164,10 @@ class TaskScheduler:
             top_topics = self.clusterer.cluster_and_rank_topics(db)
             logger.info(f"Clustered topics, got {len(top_topics)} top topics")
             
+            # Keep the related topics index in step with ingestion, vectorizing off the event loop
+            indexed = await asyncio.to_thread(related_index.sync, db)
+            logger.info(f"Indexed {indexed} new topics for related lookups")
+            
             self._log_activity(
                 db, "fetcher", 
                 f"Fetch job completed. Reddit: {len(reddit_topics)}, X: {len(x_topics)}, Top: {len(top_topics)}"
@@ -136,35 +189,36 @@ class TaskScheduler:
         try:
             self._log_activity(db, "poster", "Starting post generation job")
             
-            # Get top ranked topics for post generation
-            from .database import Topic
-            top_topics = db.query(Topic).filter(
-                Topic.processed == True,
-                Topic.rank_score.isnot(None)
-            ).order_by(Topic.rank_score.desc()).limit(3).all()
-            
-            if not top_topics:
-                logger.info("No topics available for post generation")
+            # Scheduled drafts are published by the slot dispatcher when their slot comes up
+            if db.query(LinkedInPost).filter(LinkedInPost.status == "scheduled").count():
+                logger.info("Scheduled drafts are waiting for their slots")
                 return
             
-            # Generate post
-            topic_ids = [t.id for t in top_topics]
-            post_data = self.post_generator.generate_post(db, topic_ids)
-            
-            if not post_data:
-                logger.error("Failed to generate post")
-                return
-            
-            # Try to post to LinkedIn if credentials are available
-            if self.linkedin_poster.has_credentials():
-                result = await self.linkedin_poster.post_to_linkedin(db, post_data["id"])
+            # Drafts are generated ahead of time, so this tick does not wait on the LLM
+            post = self.draft_buffer.take(db) if settings.draft_buffer_enabled else None
+            if post:
+                post_id = post.id
+            else:
+                # Buffer off or not refilled yet, generate from the ranked topics as before
+                if settings.draft_buffer_enabled:
+                    logger.info("Draft buffer is empty, generating a post on demand")
+                post_data = await self._generate_on_demand(db)
                 
-                if result["success"]:
-                    self._log_activity(db, "poster", f"Successfully posted to LinkedIn: {result.get('post_id')}")
-                else:
-                    self._log_activity(db, "poster", f"Failed to post to LinkedIn: {result['message']}", level="ERROR")
+                if not post_data:
+                    logger.error("Failed to generate post")
+                    return
+                if post_data["status"] == "low_quality":
+                    self._log_activity(db, "generator", f"Post {post_data['id']} scored {post_data['quality_score']}, held for review", level="WARNING")
+                    return
+                post_id = post_data["id"]
+            
+            # Publish at the next optimal time rather than whenever this job ran
+            assigned = slot_planner.assign(db, [post_id])
+            if assigned:
+                self.dispatcher.schedule(post_id, assigned[0]["scheduled_at"])
+                self._log_activity(db, "poster", f"Post {post_id} scheduled for {assigned[0]['scheduled_at']:%Y-%m-%d %H:%M} UTC")
             else:
-                self._log_activity(db, "poster", "Post generated but LinkedIn credentials not configured")
+                await self._publish_post(db, post_id)
             
         except Exception as e:
             error_msg = f"Error in post job: {str(e)}"
@@ -173,6 +227,91 @@ class TaskScheduler:
         finally:
             db.close()
     
+    async def _publish_post(self, db: Session, post_id: int):
+        # Hand the post to the publish outbox, or post directly when it is disabled
+        if self.linkedin_poster.has_credentials() and settings.publisher_enabled:
+            if publisher.enqueue(db, post_id):
+                self._log_activity(db, "poster", f"Queued post {post_id} for publishing")
+            else:
+                self._log_activity(db, "poster", f"Post {post_id} could not be queued for publishing", level="ERROR")
+        elif self.linkedin_poster.has_credentials():
+            result = await self.linkedin_poster.post_to_linkedin(db, post_id)
+            
+            if result["success"]:
+                self._log_activity(db, "poster", f"Successfully posted to LinkedIn: {result.get('post_id')}")
+            else:
+                self._log_activity(db, "poster", f"Failed to post to LinkedIn: {result['message']}", level="ERROR")
+        else:
+            # Back to the queue so the post can be published by hand
+            post = db.query(LinkedInPost).filter(LinkedInPost.id == post_id).first()
+            if post and post.status == "scheduled":
+                post.status = "queued"
+                db.commit()
+            self._log_activity(db, "poster", "Post generated but LinkedIn credentials not configured")
+    
+    async def _generate_on_demand(self, db: Session, max_anchors: int = 5, status: Optional[str] = None):
+        # Best ranked topics no post has used yet
+        top_topics = db.query(Topic).filter(
+            Topic.processed == True,
+            Topic.rank_score.isnot(None),
+            unused_topic()
+        ).order_by(Topic.rank_score.desc()).limit(max_anchors + 2).all()
+        
+        if not top_topics:
+            logger.info("No topics available for post generation")
+            return None
+        
+        # Anchor on the best topic and pair it with its nearest neighbours,
+        # moving down the ranking while the set would repeat a recent post
+        for i, anchor in enumerate(top_topics[:max_anchors]):
+            companions = self.post_generator.select_companion_topics(db, anchor.id, count=2)
+            topic_ids = [anchor.id] + companions if companions else [t.id for t in top_topics[i:i + 3]]
+            if not post_dedup.check(db, topic_ids):
+                return await self.post_generator.agenerate_post(db, topic_ids, status=status)
+        
+        logger.info("Every candidate topic set repeats a recent post")
+        return None
+    
+    async def generate_batch(self, db: Session, count: Optional[int] = None) -> List[Dict]:
+        """Draft posts from the strongest clusters into the next free posting slots."""
+        count = count or settings.batch_posts_per_run
+        # Plan spare groups so rejected near-repeats can be replaced
+        groups = self.clusterer.plan_post_groups(db, count * 2, per_cluster=settings.batch_topics_per_post)
+        groups = [group for group in groups if not post_dedup.check(db, group)][:count]
+        if not groups:
+            logger.info("No clustered topics available for batch generation")
+            return []
+        
+        slots = slot_planner.free_slots(db, len(groups))
+        if not slots:
+            logger.info("No free posting slots for batch generation")
+            return []
+        
+        posts = await self.post_generator.agenerate_batch(groups[:len(slots)], slots)
+        for post in posts:
+            # Low quality drafts come back without a slot
+            if post["scheduled_at"]:
+                self.dispatcher.schedule(post["id"], post["scheduled_at"])
+        return posts
+    
+    async def generate_batch_job(self):
+        if self._is_paused():
+            logger.info("Skipping batch generation job - scheduler is paused")
+            return
+        
+        db = next(get_db())
+        try:
+            self._log_activity(db, "generator", "Starting batch generation job")
+            posts = await self.generate_batch(db)
+            self._log_activity(db, "generator", f"Batch generation completed: {len(posts)} drafts scheduled")
+        
+        except Exception as e:
+            error_msg = f"Error in batch generation job: {str(e)}"
+            logger.error(error_msg)
+            self._log_activity(db, "generator", error_msg, level="ERROR")
+        finally:
+            db.close()
+    
     def _log_activity(self, db: Session, component: str, message: str, level: str = "INFO"):
         log_entry = SystemLog(
             level=level,
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Merges concurrent identical calls into one in-flight operation.
+
+    The first caller for a key starts the operation as a task and every
+    caller that arrives while it runs awaits the same task, so the upstream
+    work (an LLM call, a Reddit crawl, a job) happens once and its result or
+    exception reaches all of them. A finished result that is not empty can
+    be shared for a short TTL as well. Waiters are shielded: a caller that
+    disconnects does not cancel the operation for the others.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.singleflight_result_ttl if ttl is None else ttl
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._results: Dict[str, Tuple[float, Any]] = {}
+    
+    @staticmethod
+    def make_key(name: str, **params) -> str:
+        """Key for an operation and its normalized arguments. Callers sort lists whose order does not matter."""
+        return name + ":" + json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+    
+    def start(self, key: str, operation: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> asyncio.Task:
+        """The in-flight task for key, starting operation if nothing is running under it."""
+        task = self._calls.get(key)
+        if task is not None:
+            metrics.incr("singleflight.coalesced")
+            logger.info(f"Joined in-flight call {key}")
+            return task
+        
+        ttl = self.ttl if ttl is None else ttl
+        task = asyncio.ensure_future(operation())
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done, ttl))
+        metrics.incr("singleflight.started")
+        return task
+    
+    async def do(self, key: str, operation: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """Result of operation, shared with every identical call in flight or finished within the TTL."""
+        shared = self._results.get(key)
+        if shared is not None:
+            if shared[0] > time.monotonic():
+                metrics.incr("singleflight.shared")
+                return shared[1]
+            del self._results[key]
+        return await asyncio.shield(self.start(key, operation, ttl))
+    
+    def _finish(self, key: str, task: asyncio.Task, ttl: float):
+        self._calls.pop(key, None)
+        # Reading the exception also keeps asyncio from warning when every waiter went away
+        if task.cancelled() or task.exception() is not None:
+            return
+        # An empty result is a failed generation, the next caller should try again
+        if ttl and task.result():
+            now = time.monotonic()
+            self._results = {k: shared for k, shared in self._results.items() if shared[0] > now}
+            self._results[key] = (now + ttl, task.result())
+
+
+# Global single-flight instance
+flights = SingleFlight()
\ No newline at end of file
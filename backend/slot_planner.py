@@ -0,0 +1,248 @@
+import heapq
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, time, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from database import SessionLocal, LinkedInPost, PublishOutbox, Settings
+from publisher import CLAIMABLE
+from sources_config import SCHEDULE_CONFIG
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# How far ahead the planner looks for a free slot
+HORIZON_DAYS = 366
+
+
+def _setting(db: Session, key: str):
+    setting = db.query(Settings).filter(Settings.key == key).first()
+    return setting.value if setting else SCHEDULE_CONFIG[key]
+
+
+def _parse_times(value) -> List[time]:
+    if isinstance(value, str):
+        value = value.split(",")
+    times = set()
+    for item in value:
+        try:
+            times.add(datetime.strptime(item.strip(), "%H:%M").time())
+        except ValueError:
+            logger.warning(f"Ignoring invalid post time: {item}")
+    return sorted(times)
+
+
+class SlotPlanner:
+    """Places posts on the optimal UTC posting times.
+
+    Slot times, the daily cap and weekend pausing come from the Settings
+    table (optimal_post_times as comma separated HH:MM, max_posts_per_day,
+    pause_on_weekends) and fall back to SCHEDULE_CONFIG. A slot holds one
+    post, and posts already published or waiting in the publish outbox count
+    against the cap of the day they go out.
+    """
+    
+    def config(self, db: Session) -> Dict:
+        pause_on_weekends = _setting(db, "pause_on_weekends")
+        if isinstance(pause_on_weekends, str):
+            pause_on_weekends = pause_on_weekends.lower() == "true"
+        return {
+            "optimal_post_times": [t.strftime("%H:%M") for t in _parse_times(_setting(db, "optimal_post_times"))],
+            "max_posts_per_day": int(_setting(db, "max_posts_per_day")),
+            "pause_on_weekends": pause_on_weekends
+        }
+    
+    def free_slots(self, db: Session, count: int, after: Optional[datetime] = None) -> List[datetime]:
+        """The next `count` unclaimed slots after `after` (default now), earliest first."""
+        after = after or datetime.utcnow()
+        config = self.config(db)
+        times = _parse_times(config["optimal_post_times"])
+        if count <= 0 or not times or config["max_posts_per_day"] <= 0:
+            return []
+        
+        day_start = datetime.combine(after.date(), time())
+        taken = {
+            row[0] for row in db.query(LinkedInPost.scheduled_at).filter(
+                LinkedInPost.status == "scheduled",
+                LinkedInPost.scheduled_at >= day_start
+            ).all()
+        }
+        per_day = Counter(slot.date() for slot in taken)
+        per_day.update(
+            row[0].date() for row in db.query(LinkedInPost.posted_at).filter(
+                LinkedInPost.posted_at >= day_start
+            ).all()
+        )
+        # Outbox entries go out at their next attempt, or as soon as a worker gets to them
+        per_day.update(
+            max(row[0] or after, after).date() for row in db.query(PublishOutbox.next_attempt_at).filter(
+                PublishOutbox.status.in_(CLAIMABLE)
+            ).all()
+        )
+        
+        slots = []
+        for offset in range(HORIZON_DAYS):
+            day = after.date() + timedelta(days=offset)
+            if config["pause_on_weekends"] and day.weekday() >= 5:
+                continue
+            for slot_time in times:
+                slot = datetime.combine(day, slot_time)
+                if slot <= after or slot in taken or per_day[day] >= config["max_posts_per_day"]:
+                    continue
+                slots.append(slot)
+                per_day[day] += 1
+                if len(slots) == count:
+                    return slots
+        return slots
+    
+    def assign(self, db: Session, post_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Schedule queued posts (all of them, or just `post_ids`) into free slots, oldest first."""
+        query = db.query(LinkedInPost).filter(LinkedInPost.status == "queued")
+        if post_ids is not None:
+            query = query.filter(LinkedInPost.id.in_(post_ids))
+        posts = query.order_by(LinkedInPost.created_at, LinkedInPost.id).all()
+        
+        assigned = []
+        for post, slot in zip(posts, self.free_slots(db, len(posts))):
+            post.scheduled_at = slot
+            post.status = "scheduled"
+            assigned.append({"post_id": post.id, "scheduled_at": slot})
+        db.commit()
+        
+        if len(assigned) < len(posts):
+            logger.warning(f"No free slot for {len(posts) - len(assigned)} queued posts")
+        return assigned
+
+
+class SlotDispatcher:
+    """Publishes scheduled posts at their slot time.
+
+    Due times sit in a min-heap and the loop sleeps until the earliest one
+    instead of polling. Rescheduling a post just pushes a new entry; the
+    stale one is skipped when popped, and every post is checked against the
+    database before it is handed to `publish`.
+    """
+    
+    def __init__(self, publish: Callable[[Session, int], Awaitable[None]], session_factory=None):
+        self.publish = publish
+        self.session_factory = session_factory or SessionLocal
+        self._heap = []
+        self._due = {}  # post_id -> the scheduled_at its live heap entry was pushed with
+        self._wake = asyncio.Event()
+        self._task = None
+        self._paused = False
+    
+    def schedule(self, post_id: int, when: datetime):
+        if self._due.get(post_id) == when:
+            return
+        self._due[post_id] = when
+        heapq.heappush(self._heap, (when, post_id))
+        self._wake.set()
+    
+    def refresh(self, db: Session):
+        """Rebuild the heap from the scheduled posts in the database."""
+        rows = db.query(LinkedInPost.id, LinkedInPost.scheduled_at).filter(
+            LinkedInPost.status == "scheduled",
+            LinkedInPost.scheduled_at.isnot(None)
+        ).all()
+        self._due = {post_id: when for post_id, when in rows}
+        self._heap = [(when, post_id) for post_id, when in rows]
+        heapq.heapify(self._heap)
+        self._wake.set()
+    
+    def pending(self) -> List[Dict]:
+        return [
+            {"post_id": post_id, "scheduled_at": when}
+            for when, post_id in sorted(self._heap) if self._due.get(post_id) == when
+        ]
+    
+    def _pop_due(self, now: datetime) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, post_id = heapq.heappop(self._heap)
+            if self._due.get(post_id) == when:
+                del self._due[post_id]
+                due.append(post_id)
+        return due
+    
+    async def fire_due(self) -> int:
+        """Publish every post whose slot has arrived. Returns how many were handed over."""
+        now = datetime.utcnow()
+        fired = 0
+        for post_id in self._pop_due(now):
+            db = self.session_factory()
+            try:
+                post = db.query(LinkedInPost).filter(LinkedInPost.id == post_id).first()
+                # Deleted, published by hand or moved since it was pushed
+                if not post or post.status != "scheduled" or not post.scheduled_at or post.scheduled_at > now:
+                    continue
+                lateness = (now - post.scheduled_at).total_seconds()
+                await self.publish(db, post_id)
+                metrics.incr("slot_dispatcher.dispatched")
+                metrics.incr("slot_dispatcher.lateness_seconds", lateness)
+                fired += 1
+            except Exception as e:
+                logger.error(f"Error dispatching post {post_id}: {str(e)}")
+            finally:
+                db.close()
+        return fired
+    
+    def _seconds_until_next(self) -> Optional[float]:
+        # Drop stale entries so they do not cut the sleep short
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return (self._heap[0][0] - datetime.utcnow()).total_seconds()
+    
+    async def run_forever(self):
+        while True:
+            self._wake.clear()
+            wait = self._seconds_until_next()
+            if not self._paused and wait is not None and wait <= 0:
+                await self.fire_due()
+                continue
+            
+            # Sleep until the next slot, a new schedule, or the periodic resync
+            timeout = settings.slot_dispatcher_refresh_seconds
+            if not self._paused and wait is not None:
+                timeout = min(timeout, wait)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if timeout == settings.slot_dispatcher_refresh_seconds:
+                    self._resync()
+    
+    def _resync(self):
+        db = self.session_factory()
+        try:
+            self.refresh(db)
+        except Exception as e:
+            logger.error(f"Error refreshing slot schedule: {str(e)}")
+        finally:
+            db.close()
+    
+    def start(self):
+        if self._task is None:
+            self._resync()
+            self._task = asyncio.get_event_loop().create_task(self.run_forever())
+            logger.info("Slot dispatcher started")
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            logger.info("Slot dispatcher stopped")
+    
+    def pause(self):
+        self._paused = True
+    
+    def resume(self):
+        self._paused = False
+        self._resync()
+
+
+# Global slot planner instance
+slot_planner = SlotPlanner()
\ No newline at end of file
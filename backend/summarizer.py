@@ -0,0 +1,126 @@
+import re
+import logging
+from typing import List, Optional
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+URL_ONLY = re.compile(r"^\W*https?://\S+\W*$")
+
+
+def _split_sentences(text: str) -> List[str]:
+    sentences = [s.strip() for s in SENTENCE_SPLIT.split(text)]
+    return [s for s in sentences if s and not URL_ONLY.match(s)]
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 3].rsplit(" ", 1)[0]
+    return f"{cut}..."
+
+
+class ExtractiveSummarizer:
+    """Picks the most informative sentences of topic content under a character budget.
+
+    Sentences are scored by TF-IDF cosine with the centroid of their own
+    topic, so the sentences that carry the topic's dominant terms win.
+    Clustering passes its fitted vectorizer so the weights reflect the
+    current corpus; otherwise a vectorizer is fitted on the sentences.
+    """
+    
+    def __init__(self, max_chars: Optional[int] = None):
+        self.max_chars = max_chars
+    
+    def summarize(self, text: Optional[str], vectorizer: Optional[TfidfVectorizer] = None, max_chars: Optional[int] = None) -> Optional[str]:
+        return self.summarize_many([text], vectorizer, max_chars)[0]
+    
+    def summarize_many(
+        self,
+        texts: List[Optional[str]],
+        vectorizer: Optional[TfidfVectorizer] = None,
+        max_chars: Optional[int] = None
+    ) -> List[Optional[str]]:
+        max_chars = max_chars or self.max_chars or settings.topic_summary_max_chars
+        results = [None] * len(texts)
+        pending = []
+        
+        for i, text in enumerate(texts):
+            if not text:
+                results[i] = text
+                continue
+            text = text.strip()
+            sentences = _split_sentences(text)
+            if len(text) <= max_chars or len(sentences) < 2:
+                results[i] = _truncate(text, max_chars)
+            else:
+                pending.append((i, sentences))
+        
+        if not pending:
+            return results
+        
+        # One transform over every sentence of the batch
+        all_sentences = [s for _, sentences in pending for s in sentences]
+        matrix = self._transform(all_sentences, vectorizer)
+        
+        offset = 0
+        for i, sentences in pending:
+            rows = matrix[offset:offset + len(sentences)] if matrix is not None else None
+            offset += len(sentences)
+            
+            scores = self._centrality(rows) if rows is not None else None
+            if scores is None or not scores.any():
+                # The shared vocabulary misses this topic, score it on its own
+                scores = self._centrality(self._transform(sentences, None))
+            
+            results[i] = self._select(sentences, scores, max_chars)
+            metrics.incr("summarizer.chars_in", len(texts[i]))
+            metrics.incr("summarizer.chars_out", len(results[i]))
+        
+        return results
+    
+    def _transform(self, sentences: List[str], vectorizer: Optional[TfidfVectorizer]):
+        try:
+            if vectorizer is not None and hasattr(vectorizer, "vocabulary_"):
+                return vectorizer.transform(sentences)
+            return TfidfVectorizer(stop_words='english').fit_transform(sentences)
+        except ValueError:
+            # Only stop words or an empty vocabulary
+            return None
+    
+    def _centrality(self, rows) -> Optional[np.ndarray]:
+        if rows is None:
+            return None
+        centroid = np.asarray(rows.sum(axis=0)).ravel()
+        norm = np.linalg.norm(centroid)
+        if not norm:
+            return np.zeros(rows.shape[0])
+        return np.asarray(rows @ (centroid / norm)).ravel()
+    
+    def _select(self, sentences: List[str], scores: Optional[np.ndarray], max_chars: int) -> str:
+        if scores is None:
+            scores = np.zeros(len(sentences))
+        
+        # Best sentences first, earlier sentences win ties
+        order = np.argsort(-scores, kind="stable")
+        picked = []
+        total = 0
+        for index in order:
+            length = len(sentences[index]) + (1 if picked else 0)
+            if total + length <= max_chars:
+                picked.append(index)
+                total += length
+        
+        if not picked:
+            return _truncate(sentences[order[0]], max_chars)
+        
+        # Keep the original reading order
+        return " ".join(sentences[i] for i in sorted(picked))
+
+
+# Global summarizer instance
+summarizer = ExtractiveSummarizer()
\ No newline at end of file
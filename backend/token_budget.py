@@ -0,0 +1,159 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional
+from sqlalchemy.orm import Session
+from database import TokenUsage
+from config import settings
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Per-message overhead of the chat format (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# System prompt and instructions around the topic context
+PROMPT_OVERHEAD_TOKENS = 300
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """cl100k_base encoding, or None when tiktoken or its encoding files are unavailable."""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        if tiktoken is None:
+            _encoding_failed = True
+        else:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken encoding unavailable, estimating token counts: {str(e)}")
+                _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Roughly 4 characters per token for English text
+    return len(text) // 4 + 1
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+class PostBudget:
+    """Token spend of one post against its allowance.
+
+    The allowance is the per-post budget, capped by what is left of the
+    daily budget when generation starts.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+    
+    @property
+    def used(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+    
+    def allows(self, prompt_tokens: int, max_completion_tokens: int) -> bool:
+        return self.used + prompt_tokens + max_completion_tokens <= self.limit
+    
+    def record(self, messages: List[Dict], contents: List[str], usage=None, prompt_copies: int = 1):
+        """Add one API call, preferring the usage the API reported over local counts."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+            prompt_tokens = count_message_tokens(messages) * prompt_copies
+            completion_tokens = sum(count_tokens(content) for content in contents)
+        
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def spent_today(db: Session) -> int:
+    row = db.query(TokenUsage).filter(TokenUsage.day == _today()).first()
+    return (row.prompt_tokens + row.completion_tokens) if row else 0
+
+
+def attempt_tokens() -> int:
+    """Worst case for one generation call: every candidate at max_tokens, re-prompts carrying a previous draft."""
+    candidates = settings.post_generation_candidates
+    prompt_copies = 1 if settings.post_generation_candidate_mode == "n" else candidates
+    prompt = settings.post_context_token_limit + PROMPT_OVERHEAD_TOKENS + settings.post_completion_max_tokens
+    return prompt * prompt_copies + settings.post_completion_max_tokens * candidates
+
+
+def per_post_limit() -> int:
+    """POST_GENERATION_TOKEN_BUDGET, or with 0 enough for every attempt plus the quality retry."""
+    if settings.post_generation_token_budget:
+        return settings.post_generation_token_budget
+    return attempt_tokens() * (settings.post_generation_max_attempts + 1)
+
+
+def check_post_budget():
+    """Warn when the per-post budget cannot pay for a single re-prompt, which disables length and quality retries."""
+    if per_post_limit() < 2 * attempt_tokens():
+        logger.warning(
+            f"POST_GENERATION_TOKEN_BUDGET={per_post_limit()} covers one attempt of up to {attempt_tokens()} tokens, "
+            f"length and quality re-prompts will be skipped. Set it to 0 to size it from the candidate settings."
+        )
+
+
+def post_budget(db: Session) -> PostBudget:
+    limit = per_post_limit()
+    if settings.daily_token_budget:
+        limit = min(limit, max(settings.daily_token_budget - spent_today(db), 0))
+    return PostBudget(limit)
+
+
+def record_usage(db: Session, budget: PostBudget):
+    """Add a post's spend to today's totals. Flushed with the caller's commit."""
+    if not budget.used:
+        return
+    
+    row = db.query(TokenUsage).filter(TokenUsage.day == _today()).first()
+    if row is None:
+        row = TokenUsage(day=_today(), prompt_tokens=0, completion_tokens=0, generations=0)
+        db.add(row)
+    
+    row.prompt_tokens += budget.prompt_tokens
+    row.completion_tokens += budget.completion_tokens
+    row.generations += 1
+
+
+def daily_usage(db: Session, days: int = 7) -> Dict:
+    first_day = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    rows = db.query(TokenUsage).filter(TokenUsage.day >= first_day).order_by(TokenUsage.day.desc()).all()
+    
+    used_today = spent_today(db)
+    return {
+        "daily_budget": settings.daily_token_budget or None,
+        "remaining_today": max(settings.daily_token_budget - used_today, 0) if settings.daily_token_budget else None,
+        "tokenizer": "tiktoken" if _get_encoding() is not None else "estimate",
+        "days": [
+            {
+                "day": row.day,
+                "prompt_tokens": row.prompt_tokens,
+                "completion_tokens": row.completion_tokens,
+                "total_tokens": row.prompt_tokens + row.completion_tokens,
+                "generations": row.generations
+            }
+            for row in rows
+        ]
+    }
\ No newline at end of file
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Clustering Benchmark Suite
+
+Runs TopicClusterer against synthetic Android-topic corpora stored in a
+temporary SQLite database and times each phase (load, vectorize, fit,
+score, write-back) separately for every clustering mode, together with the
+peak memory traced during that phase. Runs fully offline.
+
+Results are written as JSON so runs from different versions can be diffed:
+
+    python benchmarks/clustering_benchmark.py --sizes 1000 10000 --output new.json
+    python benchmarks/clustering_benchmark.py --sizes 1000 10000 --baseline old.json
+
+Peak memory comes from tracemalloc, which slows down allocation-heavy phases
+(mostly load and write-back); use --no-memory for timing-only runs.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sklearn
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import clustering
+from clustering import TopicClusterer
+from database import Base, Topic
+from synthetic_corpus import generate_corpus
+
+MODES = {
+    "heuristic": {"k_selection": "heuristic", "reduce_dimensions": False},
+    "auto": {"k_selection": "auto", "reduce_dimensions": False},
+    "lsa": {"k_selection": "heuristic", "reduce_dimensions": True},
+    "auto+lsa": {"k_selection": "auto", "reduce_dimensions": True},
+}
+
+PHASES = ["load", "vectorize", "fit", "score", "write_back"]
+
+
+class PhaseTimer:
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.phases = {}
+    
+    def run(self, name, func, *args):
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        peak = 0
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        
+        self.phases[name] = {
+            "seconds": round(elapsed, 4),
+            "peak_memory_mb": round(peak / 1024 / 1024, 2) if self.trace_memory else None,
+        }
+        return result
+
+
+def make_session(path, size, seed, in_memory):
+    if in_memory:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    
+    # Spread fetch times over the last day so everything is inside the window
+    now = datetime.utcnow()
+    rows = []
+    for i, topic in enumerate(generate_corpus(size, seed=seed)):
+        row = {key: value for key, value in topic.items() if key != "theme"}
+        row["fetched_at"] = now - timedelta(seconds=(i * 86000) // size)
+        row["processed"] = False
+        rows.append(row)
+    
+    with engine.begin() as connection:
+        connection.execute(insert(Topic), rows)
+    
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def run_mode(mode, session_factory, trace_memory):
+    clustering._k_cache.clear()
+    clusterer = TopicClusterer(**MODES[mode])
+    timer = PhaseTimer(trace_memory)
+    db = session_factory()
+    
+    try:
+        topics = timer.run("load", clusterer._load_topics, db, 24)
+        texts = [f"{topic.title} {topic.content or ''}" for topic in topics]
+        matrix = timer.run("vectorize", clusterer._vectorize, texts)
+        kmeans, labels = timer.run("fit", clusterer._fit, matrix, 24)
+        scores = timer.run("score", clusterer._score, topics, matrix, kmeans, labels)
+        timer.run("write_back", clusterer._write_back, db, topics, kmeans, labels, scores)
+    finally:
+        db.close()
+    
+    return {
+        "mode": mode,
+        "topics": len(topics),
+        "dimensions": int(matrix.shape[1]),
+        "n_clusters": int(kmeans.n_clusters),
+        "phases": timer.phases,
+        "total_seconds": round(sum(p["seconds"] for p in timer.phases.values()), 4),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print per-phase changes against a previous run, return the regressions."""
+    with open(baseline_path) as f:
+        baseline = {(r["mode"], r["topics"]): r for r in json.load(f)["results"]}
+    
+    regressions = []
+    print(f"\nAgainst {baseline_path} (regression threshold {threshold:.0%})")
+    print(f"{'mode':<10}{'topics':>8}  {'phase':<11}{'old s':>9}{'new s':>9}{'change':>9}")
+    for result in results:
+        old = baseline.get((result["mode"], result["topics"]))
+        if not old:
+            continue
+        for phase in PHASES + ["total"]:
+            new_s = result["total_seconds"] if phase == "total" else result["phases"][phase]["seconds"]
+            old_s = old["total_seconds"] if phase == "total" else old["phases"][phase]["seconds"]
+            change = (new_s - old_s) / old_s if old_s else 0.0
+            flag = ""
+            # Ignore jitter on phases that take only a few milliseconds
+            if change > threshold and new_s - old_s > 0.01:
+                flag = "  REGRESSION"
+                regressions.append((result["mode"], result["topics"], phase, change))
+            print(f"{result['mode']:<10}{result['topics']:>8}  {phase:<11}{old_s:>9.3f}{new_s:>9.3f}{change:>+9.1%}{flag}")
+    
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark topic clustering phases")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Corpus sizes to generate (1k to 200k)")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--in-memory", action="store_true", help="Use in-memory SQLite instead of a temp file")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc peak memory tracking")
+    parser.add_argument("--output", default="clustering_benchmark.json", help="JSON results path")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown counted as regression")
+    args = parser.parse_args()
+    
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            for mode in args.modes:
+                # Fresh database per run so every mode starts from unprocessed topics
+                engine, session_factory = make_session(
+                    os.path.join(directory, f"bench_{size}_{mode}.db"), size, args.seed, args.in_memory
+                )
+                try:
+                    result = run_mode(mode, session_factory, not args.no_memory)
+                finally:
+                    engine.dispose()
+                results.append(result)
+                
+                phases = "  ".join(f"{p}={result['phases'][p]['seconds']:.3f}s" for p in PHASES)
+                print(f"{mode:<10}{size:>8} topics  k={result['n_clusters']:<3} {phases}  total={result['total_seconds']:.3f}s")
+    
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "sklearn": sklearn.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "memory_traced": not args.no_memory,
+        },
+        "results": results,
+    }
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+    
+    if args.baseline and compare(results, args.baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
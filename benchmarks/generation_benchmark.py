@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Post Generation Throughput Benchmark
+
+Drives LinkedInPostGenerator.agenerate_post over synthetic topics against
+the offline stub LLM server (started in-process) or any OpenAI-compatible
+endpoint, and reports posts per second, per-post latency percentiles, token
+use and reply parse outcomes. Needs no network access with the stub:
+
+    python benchmarks/generation_benchmark.py --posts 200 --concurrency 16 --latency-ms 400
+    python benchmarks/generation_benchmark.py --base-url http://localhost:8080/v1 --model llama3
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import uvicorn
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from config import settings
+from database import Base, Topic
+from llm_stub import StubLLM, create_app
+from post_generator import LinkedInPostGenerator, generation_stats
+from synthetic_corpus import generate_corpus
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(stub: StubLLM, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(stub), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def make_session(path: str, size: int, seed: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    rows = [
+        {**{key: value for key, value in topic.items() if key != "theme"}, "processed": True}
+        for topic in generate_corpus(size, seed=seed)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Topic), rows)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+async def run(generator: LinkedInPostGenerator, db, groups, concurrency: int, candidates: int):
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def generate(topic_ids):
+        async with limit:
+            start = time.perf_counter()
+            post = await generator.agenerate_post(db, topic_ids, fresh=True, candidates=candidates)
+            latencies.append(time.perf_counter() - start)
+            return post
+    
+    start = time.perf_counter()
+    posts = await asyncio.gather(*[generate(topic_ids) for topic_ids in groups])
+    return posts, latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark post generation throughput")
+    parser.add_argument("--posts", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8, help="Posts in flight")
+    parser.add_argument("--candidates", type=int, default=1, help="Drafts per attempt")
+    parser.add_argument("--topics-per-post", type=int, default=3)
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint, default starts the stub server")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--latency-ms", type=int, default=200, help="Stub time to first token")
+    parser.add_argument("--ms-per-token", type=float, default=5)
+    parser.add_argument("--completion-tokens", type=int, default=300)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    
+    # Every request goes to the backend: no cache hits, no daily budget
+    settings.llm_cache_enabled = False
+    settings.daily_token_budget = 0
+    settings.llm_max_concurrency = args.concurrency * max(args.candidates, 1)
+    if args.model:
+        settings.llm_model = args.model
+    
+    stub = None
+    if args.base_url:
+        settings.llm_provider = "compatible"
+        settings.llm_base_url = args.base_url
+    else:
+        stub = StubLLM(
+            latency_ms=args.latency_ms,
+            ms_per_token=args.ms_per_token,
+            completion_tokens=args.completion_tokens,
+            rate_limit_rate=args.rate_limit_rate,
+            malformed_rate=args.malformed_rate,
+            seed=args.seed
+        )
+        port = free_port()
+        server = start_stub(stub, port)
+        settings.llm_provider = "stub"
+        settings.llm_stub_url = f"http://127.0.0.1:{port}/v1"
+    
+    with tempfile.TemporaryDirectory() as directory:
+        engine, db = make_session(os.path.join(directory, "bench.db"), args.posts * args.topics_per_post, args.seed)
+        groups = [
+            list(range(i * args.topics_per_post + 1, (i + 1) * args.topics_per_post + 1))
+            for i in range(args.posts)
+        ]
+        try:
+            generator = LinkedInPostGenerator()
+            posts, latencies, wall = asyncio.run(run(generator, db, groups, args.concurrency, args.candidates))
+        finally:
+            db.close()
+            engine.dispose()
+    
+    if stub is not None:
+        server.should_exit = True
+    
+    saved = [post for post in posts if post]
+    stats = generation_stats()
+    results = {
+        "provider": settings.llm_provider,
+        "model": settings.llm_model,
+        "posts": args.posts,
+        "saved": len(saved),
+        "concurrency": args.concurrency,
+        "candidates": args.candidates,
+        "wall_seconds": round(wall, 3),
+        "posts_per_second": round(len(saved) / wall, 3) if wall else None,
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000),
+        "prompt_tokens": sum(post["prompt_tokens"] for post in saved),
+        "completion_tokens": sum(post["completion_tokens"] for post in saved),
+        "attempts": stats["attempts"],
+        "parse_failure_rate": stats["parse_failure_rate"],
+        "parse_repair_rate": stats["parse_repair_rate"],
+        "stub": stub.stats if stub is not None else None,
+    }
+    
+    print(f"{results['saved']}/{args.posts} posts in {results['wall_seconds']}s "
+          f"({results['posts_per_second']} posts/s) at concurrency {args.concurrency}")
+    print(f"latency p50={results['latency_p50_ms']}ms p95={results['latency_p95_ms']}ms  "
+          f"attempts={results['attempts']}  tokens={results['prompt_tokens']}+{results['completion_tokens']}")
+    if stub is not None:
+        print(f"stub: {stub.stats}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
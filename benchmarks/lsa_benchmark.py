@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+LSA Clustering Benchmark
+
+Compares the current TF-IDF (100 features) + KMeans pipeline against the
+optional TruncatedSVD stage at growing vocabulary sizes on a fixed synthetic
+corpus. Reports wall time, peak traced memory and clustering agreement
+(adjusted Rand index) with the current pipeline and with the generated themes.
+
+Usage:
+    python benchmarks/lsa_benchmark.py --topics 5000 --output lsa.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sklearn.cluster import KMeans
+from sklearn.metrics import adjusted_rand_score
+
+from clustering import TopicClusterer
+from config import settings
+from synthetic_corpus import generate_corpus
+
+
+def run_pipeline(texts, n_clusters, reduce_dimensions, max_features=None, components=None):
+    if max_features is not None:
+        settings.cluster_lsa_max_features = max_features
+    if components is not None:
+        settings.cluster_lsa_components = components
+
+    clusterer = TopicClusterer(k_selection="heuristic", reduce_dimensions=reduce_dimensions)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    matrix = clusterer._vectorize(texts)
+    vectorized = time.perf_counter()
+    labels = KMeans(n_clusters=n_clusters, random_state=42, n_init=10).fit_predict(matrix)
+    finished = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return labels, {
+        "vocabulary": len(clusterer.vectorizer.vocabulary_),
+        "dimensions": matrix.shape[1],
+        "vectorize_seconds": round(vectorized - start, 4),
+        "fit_seconds": round(finished - vectorized, 4),
+        "total_seconds": round(finished - start, 4),
+        "peak_memory_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LSA clustering stage")
+    parser.add_argument("--topics", type=int, default=5000, help="Corpus size")
+    parser.add_argument("--vocab", type=int, nargs="+", default=[1000, 5000, 20000, 50000],
+                        help="Vocabulary sizes to test with the LSA stage")
+    parser.add_argument("--components", type=int, default=settings.cluster_lsa_components,
+                        help="SVD output dimensions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.topics, seed=args.seed)
+    texts = [f"{t['title']} {t['content'] or ''}" for t in corpus]
+    themes = [t["theme"] for t in corpus]
+    n_clusters = TopicClusterer(k_selection="heuristic")._heuristic_n_clusters(len(texts))
+
+    baseline_labels, baseline = run_pipeline(texts, n_clusters, reduce_dimensions=False)
+    baseline.update({
+        "pipeline": "tfidf-100",
+        "ari_vs_current": 1.0,
+        "ari_vs_themes": round(adjusted_rand_score(themes, baseline_labels), 4),
+    })
+    results = [baseline]
+
+    for vocab in args.vocab:
+        labels, row = run_pipeline(texts, n_clusters, True, max_features=vocab, components=args.components)
+        row.update({
+            "pipeline": f"tfidf-{vocab}+svd-{args.components}",
+            "ari_vs_current": round(adjusted_rand_score(baseline_labels, labels), 4),
+            "ari_vs_themes": round(adjusted_rand_score(themes, labels), 4),
+        })
+        results.append(row)
+
+    print(f"{args.topics} topics, k={n_clusters}")
+    print(f"{'pipeline':<24}{'vocab':>8}{'dims':>6}{'total s':>10}{'peak MB':>10}{'ARI cur':>9}{'ARI themes':>12}")
+    for row in results:
+        print(
+            f"{row['pipeline']:<24}{row['vocabulary']:>8}{row['dimensions']:>6}"
+            f"{row['total_seconds']:>10.3f}{row['peak_memory_mb']:>10.1f}"
+            f"{row['ari_vs_current']:>9.3f}{row['ari_vs_themes']:>12.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"topics": args.topics, "n_clusters": n_clusters, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Related Topics Index Benchmark
+
+Builds the LSH related-topics index over a synthetic corpus and measures
+build time, query latency and recall@k against exact brute-force cosine.
+
+Usage:
+    python benchmarks/related_index_benchmark.py --topics 100000 --queries 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from related_index import RelatedTopicIndex
+from synthetic_corpus import generate_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the related topics index")
+    parser.add_argument("--topics", type=int, default=100000, help="Corpus size")
+    parser.add_argument("--queries", type=int, default=500, help="Number of query topics")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--tables", type=int, default=None, help="LSH tables (default from settings)")
+    parser.add_argument("--bits", type=int, default=None, help="Bits per LSH table (default from settings)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    
+    corpus = generate_corpus(args.topics, seed=args.seed)
+    texts = [f"{t['title']} {t['content'] or ''}" for t in corpus]
+    topic_ids = list(range(1, len(texts) + 1))
+    
+    index = RelatedTopicIndex(path=None, n_tables=args.tables, n_bits=args.bits)
+    
+    start = time.perf_counter()
+    vectors = index.embed(texts)
+    embedded = time.perf_counter()
+    # Add in fetch-sized batches, the way ingestion grows the index
+    for offset in range(0, len(texts), 1000):
+        index.add(topic_ids[offset:offset + 1000], vectors[offset:offset + 1000])
+    built = time.perf_counter()
+    
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(len(texts), size=min(args.queries, len(texts)), replace=False)
+    
+    latencies = []
+    recalls = []
+    for row in query_rows:
+        topic_id = topic_ids[row]
+        
+        query_start = time.perf_counter()
+        approximate = index.related(topic_id, k=args.k)
+        latencies.append(time.perf_counter() - query_start)
+        
+        # Tie-aware recall: synthetic corpora contain many equally similar
+        # topics, so any result scoring at least the exact k-th best counts
+        exact_scores = vectors @ vectors[row]
+        exact_scores[row] = -np.inf
+        kth_best = np.partition(-exact_scores, args.k - 1)[args.k - 1] * -1
+        hits = sum(1 for _, score in approximate if score >= kth_best - 1e-5)
+        recalls.append(hits / args.k)
+    
+    latencies_ms = np.array(latencies) * 1000
+    brute_start = time.perf_counter()
+    for row in query_rows[:50]:
+        np.argpartition(-(vectors @ vectors[row]), args.k)[:args.k]
+    brute_ms = (time.perf_counter() - brute_start) / min(50, len(query_rows)) * 1000
+    
+    results = {
+        "topics": len(texts),
+        "tables": index.n_tables,
+        "bits": index.n_bits,
+        "embed_seconds": round(embedded - start, 3),
+        "index_build_seconds": round(built - embedded, 3),
+        "query_p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "query_p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "query_p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "brute_force_ms": round(brute_ms, 3),
+        f"recall_at_{args.k}": round(float(np.mean(recalls)), 4),
+    }
+    
+    for key, value in results.items():
+        print(f"{key:<22}{value}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Synthetic Android Topic Corpus
+Deterministic generator of Reddit/X-like topics for offline benchmarks
+"""
+import random
+from typing import List, Dict
+
+# Each theme has its own vocabulary; titles and bodies mostly draw from one
+# theme with some bleed from others, like real subreddit traffic.
+THEMES = {
+    "compose": [
+        "jetpack compose", "recomposition", "lazycolumn", "modifier", "state hoisting",
+        "remember", "material 3", "composable", "side effects", "compose ui",
+        "animation api", "layout inspector", "stability", "derivedstateof"
+    ],
+    "coroutines": [
+        "kotlin coroutines", "flow", "stateflow", "sharedflow", "dispatchers",
+        "structured concurrency", "viewmodelscope", "suspend functions", "channels",
+        "cancellation", "supervisorjob", "callbackflow", "collectaslatestate"
+    ],
+    "gradle": [
+        "gradle", "build times", "version catalog", "kotlin dsl", "configuration cache",
+        "agp", "build variants", "ksp", "kapt", "convention plugins", "dependency updates",
+        "r8", "proguard rules"
+    ],
+    "testing": [
+        "unit tests", "espresso", "robolectric", "compose testing", "mockk",
+        "turbine", "screenshot tests", "paparazzi", "test coverage", "fakes",
+        "instrumentation tests", "flaky tests"
+    ],
+    "architecture": [
+        "mvvm", "mvi", "clean architecture", "repository pattern", "use cases",
+        "modularization", "hilt", "dagger", "dependency injection", "navigation",
+        "single activity", "feature modules", "koin"
+    ],
+    "performance": [
+        "baseline profiles", "startup time", "macrobenchmark", "jank", "memory leaks",
+        "leakcanary", "strictmode", "systrace", "perfetto", "app size", "frame drops",
+        "cold start", "profileinstaller"
+    ],
+    "multiplatform": [
+        "kotlin multiplatform", "kmp", "compose multiplatform", "ios", "shared code",
+        "expect actual", "ktor", "sqldelight", "swift interop", "kmm", "wasm"
+    ],
+    "platform": [
+        "android 15", "android 14", "target sdk", "privacy sandbox", "foreground services",
+        "predictive back", "edge to edge", "permissions", "play store policy",
+        "photo picker", "health connect", "app standby"
+    ],
+    "data": [
+        "room database", "datastore", "retrofit", "okhttp", "paging 3", "workmanager",
+        "offline first", "sync", "caching", "serialization", "moshi", "graphql"
+    ],
+    "tooling": [
+        "android studio", "gemini in android studio", "lint", "detekt", "ktlint",
+        "emulator", "logcat", "live edit", "compose preview", "profiler", "iguana", "koala"
+    ]
+}
+
+GENERIC_WORDS = [
+    "release", "update", "guide", "tutorial", "tips", "best practice", "migration",
+    "experience", "production", "team", "library", "open source", "deep dive",
+    "benchmark", "lessons", "developers", "app", "project", "support", "announcement"
+]
+
+TITLE_TEMPLATES = [
+    "{a} vs {b}: what changed after the latest update",
+    "How we cut our {a} problems in half with {b}",
+    "Deep dive into {a} and {b}",
+    "{a} best practices for {b} in 2024",
+    "Migrating from {b} to {a}: lessons learned",
+    "Why {a} matters for {b}",
+    "Announcing a new open source library for {a}",
+    "{a}, {b} and {c} in production",
+]
+
+SENTENCE_TEMPLATES = [
+    "We spent weeks on {a} before realising {b} was the real issue.",
+    "The {a} update finally makes {b} usable for most teams.",
+    "If you use {a} together with {b}, watch out for {c}.",
+    "Our numbers improved after switching {a} to {b}.",
+    "The official docs on {a} skip over how it interacts with {b}.",
+    "This {g} covers {a}, {b} and a few notes on {c}.",
+    "Curious how others handle {a} once {b} is in the mix.",
+]
+
+
+def generate_corpus(n_topics: int, seed: int = 42, bleed: float = 0.15) -> List[Dict]:
+    """Generate n_topics topic dicts with a known ``theme`` label.
+
+    ``bleed`` is the probability that a term is drawn from another theme.
+    """
+    rng = random.Random(seed)
+    theme_names = list(THEMES)
+
+    def term(theme: str) -> str:
+        if rng.random() < bleed:
+            theme = rng.choice(theme_names)
+        return rng.choice(THEMES[theme])
+
+    topics = []
+    for i in range(n_topics):
+        theme = theme_names[i % len(theme_names)] if i < len(theme_names) else rng.choice(theme_names)
+        title = rng.choice(TITLE_TEMPLATES).format(a=term(theme), b=term(theme), c=term(theme))
+
+        sentences = [
+            rng.choice(SENTENCE_TEMPLATES).format(
+                a=term(theme), b=term(theme), c=term(theme), g=rng.choice(GENERIC_WORDS)
+            )
+            for _ in range(rng.randint(1, 6))
+        ]
+        content = " ".join(sentences)[:1000] if rng.random() > 0.2 else None
+
+        topics.append({
+            "source": "reddit" if rng.random() < 0.7 else "x",
+            "source_id": f"synthetic_{seed}_{i}",
+            "title": title,
+            "content": content,
+            "url": f"https://example.com/synthetic/{seed}/{i}",
+            "author": f"user{rng.randint(1, 5000)}",
+            "score": float(int(rng.paretovariate(1.2) * 10)),
+            "engagement": int(rng.paretovariate(1.5) * 3),
+            "theme": theme,
+        })
+
+    return topics
@@ -73,8 +73,22 @@ function App() {
     
     setLoading(true);
     try {
-      await apiService.generatePost(selectedTopics);
-      setMessage('Post generated');
+      let draft = '';
+      await apiService.streamPost(selectedTopics, (event, data) => {
+        if (event === 'token') {
+          draft += data.delta;
+          setMessage(`Generating post... ${draft.length} characters received`);
+        } else if (event === 'retry') {
+          draft = '';
+          setMessage(data.reason === 'format'
+            ? 'Draft was not in the expected format, retrying...'
+            : `Draft was ${data.char_count} characters, adjusting length...`);
+        } else if (event === 'done') {
+          setMessage(`Post generated (first token ${data.time_to_first_token_ms} ms, total ${data.total_ms} ms)`);
+        } else if (event === 'error') {
+          setMessage(`Error generating post: ${data.message}`);
+        }
+      });
       setSelectedTopics([]);
       loadData();
     } catch (error) {
@@ -26,6 +26,35 @@ export const apiService = {
   generatePost: (topicIds: number[]): Promise<any> =>
     api.post('/posts/generate', { topic_ids: topicIds }).then(res => res.data),
 
+  // Server-Sent Events over POST, so EventSource can't be used
+  streamPost: async (topicIds: number[], onEvent: (event: string, data: any) => void): Promise<void> => {
+    const response = await fetch(`${API_BASE}/posts/generate/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ topic_ids: topicIds }),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Stream failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const messages = buffer.split('\n\n');
+      buffer = messages.pop() || '';
+      for (const message of messages) {
+        const event = message.match(/^event: (.*)$/m)?.[1];
+        const data = message.match(/^data: (.*)$/m)?.[1];
+        if (event && data) onEvent(event, JSON.parse(data));
+      }
+    }
+  },
+
   publishPost: (postId: number): Promise<any> =>
     api.post(`/posts/${postId}/publish`).then(res => res.data),
 
@@ -2,7 +2,29 @@ import pytest
 import sys
 import os
 
+# Keep the LLM response cache off disk during tests
+os.environ.setdefault("LLM_CACHE_PATH", ":memory:")
+
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-# Common test fixtures can go here
\ No newline at end of file
+# Backend modules import each other as top-level modules (run from backend/)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Common test fixtures can go here
+@pytest.fixture
+def sqlite_db():
+    """Session on a fresh in-memory SQLite database with all tables created"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from database import Base
+    
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    
+    yield session
+    
+    session.close()
+    engine.dispose()
\ No newline at end of file
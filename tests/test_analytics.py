@@ -0,0 +1,110 @@
+import httpx
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy.orm import sessionmaker
+from database import Cluster, LinkedInPost, PostMetric, PostTopic, Topic
+import analytics as analytics_module
+from analytics import AnalyticsPoller, poll_interval
+from linkedin_stub import StubLinkedIn, create_app
+
+
+@pytest.fixture
+def stub():
+    return StubLinkedIn()
+
+
+@pytest.fixture
+def poller(sqlite_db, stub):
+    with patch.object(analytics_module.settings, "linkedin_api_url", "http://linkedin.test/v2"):
+        return AnalyticsPoller(
+            http=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(stub)), base_url="http://linkedin.test"),
+            session_factory=sessionmaker(bind=sqlite_db.bind)
+        )
+
+
+def _posted(db, stub, *ages, likes=0, comments=0):
+    now = datetime.utcnow()
+    posts = []
+    for i, age in enumerate(ages):
+        urn = f"urn:li:share:{100 + i}"
+        stub.social[urn] = {"likes": likes, "comments": comments}
+        posts.append(LinkedInPost(content=f"post {i}", status="posted", linkedin_post_id=urn, posted_at=now - age, sources=[]))
+    db.add_all(posts)
+    db.commit()
+    return posts
+
+
+class TestAnalyticsPoller:
+    
+    def test_interval_grows_with_age_within_bounds(self):
+        with patch.object(analytics_module.settings, "analytics_age_fraction", 0.25), \
+                patch.object(analytics_module.settings, "analytics_min_interval", 900), \
+                patch.object(analytics_module.settings, "analytics_max_interval", 86400):
+            assert poll_interval(timedelta(minutes=10)) == timedelta(seconds=900)
+            assert poll_interval(timedelta(hours=8)) == timedelta(hours=2)
+            assert poll_interval(timedelta(days=20)) == timedelta(days=1)
+    
+    def test_due_posts_follow_the_decaying_schedule(self, sqlite_db, stub, poller):
+        fresh, checked_young, checked_old, expired = _posted(
+            sqlite_db, stub, timedelta(minutes=5), timedelta(hours=1), timedelta(days=4), timedelta(days=40)
+        )
+        now = datetime.utcnow()
+        # Checked 20 minutes ago: due again at 1 hour old, not at 4 days old
+        checked_young.metrics_checked_at = now - timedelta(minutes=20)
+        checked_old.metrics_checked_at = now - timedelta(minutes=20)
+        expired.metrics_checked_at = now - timedelta(days=5)
+        sqlite_db.commit()
+        
+        due = poller.due_posts(sqlite_db, now)
+        
+        assert [post.id for post in due] == [fresh.id, checked_young.id]
+    
+    @pytest.mark.asyncio
+    async def test_poll_batches_requests_and_stores_counts(self, sqlite_db, stub, poller):
+        posts = _posted(sqlite_db, stub, timedelta(hours=1), timedelta(hours=2), timedelta(hours=3), likes=4, comments=1)
+        
+        with patch.object(analytics_module.settings, "analytics_batch_size", 2):
+            assert await poller.poll_once() == 3
+        
+        assert stub.stats["social_requests"] == 2
+        performance = poller.post_performance(sqlite_db, posts[0].id)
+        assert performance["latest"]["reactions"] == 4
+        assert performance["latest"]["comments"] == 1
+        assert performance["next_poll_at"] > datetime.utcnow()
+    
+    @pytest.mark.asyncio
+    async def test_unchanged_counts_add_no_rows(self, sqlite_db, stub, poller):
+        post = _posted(sqlite_db, stub, timedelta(hours=1), likes=2)[0]
+        await poller.poll_once()
+        
+        sqlite_db.expire_all()
+        poller.record(sqlite_db, post, {"reactions": 2, "comments": 0, "impressions": None}, datetime.utcnow())
+        stub.social[post.linkedin_post_id]["likes"] = 5
+        post.metrics_checked_at = None
+        sqlite_db.commit()
+        await poller.poll_once()
+        
+        history = poller.post_performance(sqlite_db, post.id)["history"]
+        assert [row["reactions"] for row in history] == [2, 5]
+    
+    def test_cluster_rollup_uses_latest_counts(self, sqlite_db, stub, poller):
+        sqlite_db.add(Cluster(id=1, top_terms=["compose", "state"]))
+        sqlite_db.add_all([Topic(id=1, source_id="a", cluster_id=1), Topic(id=2, source_id="b", cluster_id=1)])
+        first, second = _posted(sqlite_db, stub, timedelta(hours=1), timedelta(hours=2))
+        sqlite_db.add_all([
+            PostTopic(post_id=first.id, topic_id=1),
+            PostTopic(post_id=first.id, topic_id=2),
+            PostTopic(post_id=second.id, topic_id=2),
+            PostMetric(post_id=first.id, reactions=1, comments=0),
+            PostMetric(post_id=first.id, reactions=10, comments=2),
+            PostMetric(post_id=second.id, reactions=4, comments=0)
+        ])
+        sqlite_db.commit()
+        
+        rollups = poller.cluster_performance(sqlite_db)
+        
+        assert rollups == [{
+            "cluster_id": 1, "posts": 2, "reactions": 14, "comments": 2, "impressions": 0,
+            "top_terms": ["compose", "state"], "avg_engagement": 8.0
+        }]
\ No newline at end of file
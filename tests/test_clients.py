@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import patch
+import clients as clients_module
+from clients import ClientRegistry
+
+
+class TestClientRegistry:
+    
+    @pytest.mark.asyncio
+    async def test_http_clients_are_shared_per_upstream(self):
+        registry = ClientRegistry()
+        
+        linkedin = registry.http("linkedin")
+        
+        assert registry.http("linkedin") is linkedin
+        assert registry.http("x") is not linkedin
+        await registry.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_shutdown_closes_and_next_use_reopens(self):
+        registry = ClientRegistry()
+        client = registry.http("x")
+        
+        await registry.shutdown()
+        
+        assert client.is_closed
+        assert registry.describe()["http"] == []
+        reopened = registry.http("x")
+        assert reopened is not client
+        assert not reopened.is_closed
+        await registry.shutdown()
+    
+    def test_upstream_settings_shape_the_pool(self):
+        registry = ClientRegistry()
+        with patch.object(clients_module.settings, "linkedin_http_timeout", 12.0), \
+                patch.object(clients_module.settings, "linkedin_http_max_connections", 3):
+            options = registry._http_options("linkedin")
+        
+        assert options["timeout"] == 12.0
+        assert options["limits"].max_connections == 3
+        with pytest.raises(ValueError):
+            registry._http_options("unknown")
+    
+    def test_http2_falls_back_without_h2(self):
+        registry = ClientRegistry()
+        with patch.object(clients_module.settings, "x_http2", True), \
+                patch.object(clients_module, "h2", None):
+            assert registry._http_options("x")["http2"] is False
+    
+    @pytest.mark.asyncio
+    async def test_llm_clients_reuse_the_llm_pool(self):
+        registry = ClientRegistry()
+        with patch.object(clients_module.settings, "openai_api_key", "test"):
+            async_client = registry.async_llm_client()
+            
+            assert registry.async_llm_client() is async_client
+            assert async_client._client is registry.http("llm")
+            assert registry.llm_client()._client is registry.sync_http("llm")
+        await registry.shutdown()
\ No newline at end of file
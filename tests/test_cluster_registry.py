@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime, timedelta
+from backend.cluster_registry import ClusterRegistry
+from database import Cluster, Topic
+
+
+class TestClusterRegistry:
+    
+    def _run(self, label, centroid, size=3, engagement=30.0):
+        return {"label": label, "centroid": centroid, "size": size, "engagement": engagement}
+    
+    def test_new_clusters_are_created(self, sqlite_db):
+        registry = ClusterRegistry(match_threshold=0.3)
+        
+        mapping = registry.reconcile(sqlite_db, [
+            self._run(0, {"compose": 0.8, "recomposition": 0.5}),
+            self._run(1, {"gradle": 0.9, "build": 0.4}),
+        ])
+        sqlite_db.commit()
+        
+        assert len(mapping) == 2
+        assert mapping[0] != mapping[1]
+        assert sqlite_db.query(Cluster).count() == 2
+    
+    def test_similar_cluster_keeps_identity_across_runs(self, sqlite_db):
+        registry = ClusterRegistry(match_threshold=0.3)
+        
+        first = registry.reconcile(sqlite_db, [
+            self._run(0, {"compose": 0.8, "recomposition": 0.5}),
+            self._run(1, {"gradle": 0.9, "build": 0.4}),
+        ])
+        sqlite_db.commit()
+        
+        # Labels are swapped in the next run, identities must not be
+        second = registry.reconcile(sqlite_db, [
+            self._run(0, {"gradle": 0.7, "kotlin dsl": 0.3}, size=2, engagement=10.0),
+            self._run(1, {"compose": 0.9, "lazycolumn": 0.2}),
+        ])
+        sqlite_db.commit()
+        
+        assert second[0] == first[1]
+        assert second[1] == first[0]
+        
+        gradle = sqlite_db.get(Cluster, first[1])
+        assert gradle.size == 5
+        assert gradle.total_engagement == 40.0
+        assert gradle.run_count == 2
+        assert "kotlin dsl" in gradle.centroid
+    
+    def test_stale_clusters_are_not_matched(self, sqlite_db):
+        registry = ClusterRegistry(match_threshold=0.3, window_hours=24)
+        sqlite_db.add(Cluster(
+            centroid={"compose": 1.0},
+            size=4,
+            last_seen=datetime.utcnow() - timedelta(days=3)
+        ))
+        sqlite_db.commit()
+        
+        mapping = registry.reconcile(sqlite_db, [self._run(0, {"compose": 1.0})])
+        sqlite_db.commit()
+        
+        assert sqlite_db.query(Cluster).count() == 2
+        assert sqlite_db.get(Cluster, mapping[0]).size == 3
+    
+    def test_active_clusters_aggregate_window_engagement(self, sqlite_db):
+        registry = ClusterRegistry()
+        mapping = registry.reconcile(sqlite_db, [
+            self._run(0, {"compose": 1.0}),
+            self._run(1, {"gradle": 1.0}),
+        ])
+        sqlite_db.add_all([
+            Topic(source_id="a", title="a", score=10, engagement=5, cluster_id=mapping[0]),
+            Topic(source_id="b", title="b", score=100, engagement=50, cluster_id=mapping[1]),
+            Topic(
+                source_id="c", title="c", score=1000, engagement=0, cluster_id=mapping[0],
+                fetched_at=datetime.utcnow() - timedelta(days=30)
+            ),
+        ])
+        sqlite_db.commit()
+        
+        clusters = registry.active_clusters(sqlite_db, window_hours=72)
+        
+        assert [c["id"] for c in clusters] == [mapping[1], mapping[0]]
+        assert clusters[0]["window_topics"] == 1
+        assert clusters[0]["window_engagement"] == 150
+        assert clusters[1]["top_terms"] == ["compose"]
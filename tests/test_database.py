@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+import database
+from database import Topic, LinkedInPost, PostTopic
+
+
+class TestPostTopics:
+    
+    def _topics(self, db, count):
+        db.add_all([
+            Topic(source_id=f"t{i}", title=f"topic {i}", rank_score=1.0 - i / 10, processed=True)
+            for i in range(count)
+        ])
+        db.commit()
+        return [t.id for t in db.query(Topic).order_by(Topic.id).all()]
+    
+    def test_backfill_from_json_topic_ids(self, sqlite_db):
+        ids = self._topics(sqlite_db, 3)
+        early = datetime(2024, 1, 1)
+        sqlite_db.add_all([
+            LinkedInPost(topic_ids=[ids[0], ids[1], 999], content="first", created_at=early),
+            LinkedInPost(topic_ids=[ids[0]], content="second", created_at=early + timedelta(days=1)),
+        ])
+        sqlite_db.commit()
+        
+        assert database.backfill_post_topics(sqlite_db) == 3
+        # Only runs on an empty link table
+        assert database.backfill_post_topics(sqlite_db) == 0
+        
+        assert sqlite_db.query(PostTopic).count() == 3
+        used = {t.id: t.used_at for t in sqlite_db.query(Topic).all()}
+        assert used == {ids[0]: early, ids[1]: early, ids[2]: None}
+    
+    def test_best_unused_topics_skip_linked_ones(self, sqlite_db):
+        ids = self._topics(sqlite_db, 4)
+        post = LinkedInPost(topic_ids=[ids[0], ids[2]], content="used")
+        sqlite_db.add(post)
+        database.link_post_topics(sqlite_db, post, sqlite_db.query(Topic).filter(Topic.id.in_([ids[0], ids[2]])).all())
+        sqlite_db.commit()
+        
+        best = sqlite_db.query(Topic).filter(database.unused_topic()).order_by(Topic.rank_score.desc()).limit(2).all()
+        
+        assert [t.id for t in best] == [ids[1], ids[3]]
+        assert sqlite_db.get(Topic, ids[0]).used_at is not None
+    
+    def test_unused_query_is_served_by_indexes(self, sqlite_db):
+        self._topics(sqlite_db, 2)
+        query = sqlite_db.query(Topic.id).filter(database.unused_topic()).order_by(Topic.rank_score.desc()).limit(3)
+        sql = str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+        
+        plan = " ".join(str(row) for row in sqlite_db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+        
+        assert "ix_topics_rank_score" in plan
+        assert "SEARCH post_topics USING INDEX ix_post_topics_topic_id" in plan
+    
+    def test_unlink_frees_topics_no_other_post_uses(self, sqlite_db):
+        ids = self._topics(sqlite_db, 2)
+        topics = sqlite_db.query(Topic).order_by(Topic.id).all()
+        first = LinkedInPost(topic_ids=ids, content="first")
+        second = LinkedInPost(topic_ids=[ids[1]], content="second")
+        sqlite_db.add_all([first, second])
+        database.link_post_topics(sqlite_db, first, topics)
+        database.link_post_topics(sqlite_db, second, topics[1:])
+        sqlite_db.commit()
+        
+        database.unlink_post_topics(sqlite_db, first.id)
+        sqlite_db.commit()
+        sqlite_db.expire_all()
+        
+        assert sqlite_db.get(Topic, ids[0]).used_at is None
+        assert sqlite_db.get(Topic, ids[1]).used_at is not None
+        assert sqlite_db.query(PostTopic).count() == 1
\ No newline at end of file
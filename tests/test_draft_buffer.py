@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy.orm import sessionmaker
+from database import LinkedInPost, PostTopic, Topic
+import draft_buffer as draft_buffer_module
+from draft_buffer import DraftBuffer
+
+
+class TestDraftBuffer:
+    
+    @pytest.fixture(autouse=True)
+    def sizes(self):
+        with patch.object(draft_buffer_module.settings, "draft_buffer_target", 3), \
+                patch.object(draft_buffer_module.settings, "draft_buffer_low_water", 2), \
+                patch.object(draft_buffer_module.settings, "draft_buffer_max_topic_age_hours", 72):
+            yield
+    
+    @pytest.fixture
+    def buffer(self, sqlite_db):
+        generated = []
+        
+        async def generate(db, status=None):
+            post = LinkedInPost(content=f"draft {len(generated)}", status=status or "queued", sources=[])
+            db.add(post)
+            db.commit()
+            generated.append(post.id)
+            return {"id": post.id}
+        
+        return DraftBuffer(generate, session_factory=sessionmaker(bind=sqlite_db.bind))
+    
+    def _ready(self, db, *fetched_ages):
+        now = datetime.utcnow()
+        posts = []
+        for i, age in enumerate(fetched_ages):
+            topic = Topic(source_id=f"t{i}", title=f"topic {i}", fetched_at=now - age)
+            post = LinkedInPost(content=f"ready {i}", status="ready", sources=[], created_at=now - timedelta(minutes=10 - i))
+            db.add_all([topic, post])
+            db.flush()
+            db.add(PostTopic(post_id=post.id, topic_id=topic.id))
+            posts.append(post)
+        db.commit()
+        return posts
+    
+    @pytest.mark.asyncio
+    async def test_refill_tops_up_to_target_below_low_water(self, sqlite_db, buffer):
+        self._ready(sqlite_db, timedelta(hours=1))
+        
+        assert await buffer.refill() == 2
+        assert len(buffer.ready(sqlite_db)) == 3
+        assert sqlite_db.query(LinkedInPost).filter(LinkedInPost.status == "queued").count() == 0
+        # At the target, and above the low-water mark after one take
+        assert await buffer.refill() == 0
+        buffer.take(sqlite_db)
+        assert await buffer.refill() == 0
+    
+    def test_take_hands_out_oldest_and_wakes_producer(self, sqlite_db, buffer):
+        oldest, newer, newest = self._ready(sqlite_db, timedelta(hours=1), timedelta(hours=1), timedelta(hours=1))
+        
+        assert buffer.take(sqlite_db).id == oldest.id
+        assert not buffer._wake.is_set()
+        assert buffer.take(sqlite_db).id == newer.id
+        assert buffer._wake.is_set()
+        assert sqlite_db.get(LinkedInPost, oldest.id).status == "queued"
+    
+    def test_drafts_on_aged_out_topics_expire(self, sqlite_db, buffer):
+        stale, fresh = self._ready(sqlite_db, timedelta(hours=100), timedelta(hours=1))
+        
+        assert buffer.take(sqlite_db).id == fresh.id
+        assert sqlite_db.get(LinkedInPost, stale.id).status == "expired"
+        assert buffer.take(sqlite_db) is None
+    
+    @pytest.mark.asyncio
+    async def test_empty_generation_backs_off(self, sqlite_db):
+        async def nothing(db, status=None):
+            return None
+        
+        buffer = DraftBuffer(nothing, session_factory=sessionmaker(bind=sqlite_db.bind))
+        with patch.object(draft_buffer_module.settings, "draft_buffer_check_interval", 60):
+            assert buffer._idle_seconds() == 60
+            await buffer.refill()
+            await buffer.refill()
+            assert buffer._idle_seconds() == 240
\ No newline at end of file
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from backend.fetchers.reddit_fetcher import RedditFetcher
 from backend.fetchers.x_fetcher import XFetcher
 from backend.database import Topic
+from clients import clients
 
 
 class TestRedditFetcher:
@@ -30,7 +31,7 @@ class TestRedditFetcher:
         submission.num_comments = 25
         return submission
     
-    @patch('backend.fetchers.reddit_fetcher.praw.Reddit')
+    @patch.object(clients, 'reddit')
     def test_fetch_trending_topics_success(self, mock_reddit, mock_db, mock_submission):
         # Setup mocks
         fetcher = RedditFetcher()
@@ -107,7 +108,7 @@ class TestXFetcher:
         fetcher = XFetcher()
         fetcher.bearer_token = "test_token"
         
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch.object(clients, 'http') as mock_client:
             # Setup mock response
             mock_response = Mock()
             mock_response.status_code = 200
@@ -115,7 +116,7 @@ class TestXFetcher:
             
             mock_client_instance = AsyncMock()
             mock_client_instance.get.return_value = mock_response
-            mock_client.return_value.__aenter__.return_value = mock_client_instance
+            mock_client.return_value = mock_client_instance
             
             # Execute
             result = await fetcher.fetch_trending_topics(mock_db)
@@ -142,7 +143,7 @@ class TestXFetcher:
         fetcher = XFetcher()
         fetcher.bearer_token = "test_token"
         
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch.object(clients, 'http') as mock_client:
             # Setup rate limit response
             mock_response = Mock()
             mock_response.status_code = 429
@@ -150,7 +151,7 @@ class TestXFetcher:
             
             mock_client_instance = AsyncMock()
             mock_client_instance.get.return_value = mock_response
-            mock_client.return_value.__aenter__.return_value = mock_client_instance
+            mock_client.return_value = mock_client_instance
             
             # Execute
             result = await fetcher.fetch_trending_topics(mock_db)
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+import health as health_module
+from health import CredentialHealth
+
+
+def _registry(x_status=200):
+    registry = Mock()
+    registry.llm_provider.return_value = Mock(model="gpt-test")
+    registry.llm_provider.return_value.name = "compatible"
+    registry.async_llm_client.return_value.models.list = AsyncMock()
+    registry.http.return_value.get = AsyncMock(return_value=Mock(status_code=x_status))
+    return registry
+
+
+class TestCredentialHealth:
+    
+    @pytest.fixture
+    def poster(self):
+        poster = Mock()
+        poster.has_credentials.return_value = True
+        poster.validate_credentials = AsyncMock(return_value=True)
+        return poster
+    
+    @pytest.fixture(autouse=True)
+    def credentials(self):
+        with patch.object(health_module.settings, "x_bearer_token", "token"), \
+                patch.object(health_module.settings, "reddit_client_id", ""):
+            yield
+    
+    @pytest.mark.asyncio
+    async def test_refresh_checks_every_integration(self, poster):
+        health = CredentialHealth(poster=poster, registry=_registry(x_status=401))
+        
+        results = await health.refresh()
+        
+        assert results["linkedin"]["status"] == "ok"
+        assert results["openai"]["status"] == "ok"
+        assert results["openai"]["message"] == "compatible: gpt-test"
+        assert results["reddit"]["status"] == "unconfigured"
+        assert results["x"]["status"] == "failed"
+        assert "401" in results["x"]["message"]
+    
+    @pytest.mark.asyncio
+    async def test_rejected_token_and_timeout_fail(self, poster):
+        async def slow(timeout=None):
+            await asyncio.sleep(1)
+        
+        poster.validate_credentials = slow
+        registry = _registry()
+        registry.async_llm_client.return_value.models.list.side_effect = Exception("401 Unauthorized")
+        health = CredentialHealth(poster=poster, registry=registry)
+        
+        with patch.object(health_module.settings, "health_check_timeout", 0.05):
+            results = await health.refresh()
+        
+        assert results["linkedin"]["status"] == "failed"
+        assert "No answer" in results["linkedin"]["message"]
+        assert results["openai"]["message"] == "401 Unauthorized"
+    
+    @pytest.mark.asyncio
+    async def test_snapshot_serves_cache_and_refreshes_in_background(self, poster):
+        health = CredentialHealth(poster=poster, registry=_registry())
+        
+        first = health.snapshot()
+        assert first["stale"] is True
+        assert first["integrations"]["linkedin"]["status"] == "unknown"
+        
+        # The background refresh started by the snapshot
+        await health._refreshing
+        second = health.snapshot()
+        assert second["stale"] is False
+        assert second["integrations"]["linkedin"]["status"] == "ok"
+        assert poster.validate_credentials.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_share_one_run(self, poster):
+        health = CredentialHealth(poster=poster, registry=_registry())
+        
+        await asyncio.gather(health.refresh(), health.refresh(), health.refresh())
+        
+        assert poster.validate_credentials.await_count == 1
\ No newline at end of file
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import Mock, patch, AsyncMock
 from backend.linkedin_poster import LinkedInPoster
 from backend.database import LinkedInPost
+from clients import clients
 
 
 class TestLinkedInPoster:
@@ -50,10 +51,10 @@ class TestLinkedInPoster:
         mock_response.status_code = 201
         mock_response.json.return_value = {"id": "urn:li:share:1234567890"}
         
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch.object(clients, 'http') as mock_client:
             mock_client_instance = AsyncMock()
             mock_client_instance.post.return_value = mock_response
-            mock_client.return_value.__aenter__.return_value = mock_client_instance
+            mock_client.return_value = mock_client_instance
             
             result = await poster.post_to_linkedin(mock_db, 1)
             
@@ -116,10 +117,10 @@ class TestLinkedInPoster:
         mock_response.status_code = 400
         mock_response.text = "Bad Request"
         
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch.object(clients, 'http') as mock_client:
             mock_client_instance = AsyncMock()
             mock_client_instance.post.return_value = mock_response
-            mock_client.return_value.__aenter__.return_value = mock_client_instance
+            mock_client.return_value = mock_client_instance
             
             result = await poster.post_to_linkedin(mock_db, 1)
             
@@ -136,10 +137,10 @@ class TestLinkedInPoster:
         poster.access_token = "test_token"
         poster.person_urn = "test_person_id"
         
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch.object(clients, 'http') as mock_client:
             mock_client_instance = AsyncMock()
             mock_client_instance.post.side_effect = Exception("Network error")
-            mock_client.return_value.__aenter__.return_value = mock_client_instance
+            mock_client.return_value = mock_client_instance
             
             result = await poster.post_to_linkedin(mock_db, 1)
             
@@ -159,8 +160,8 @@ class TestLinkedInPoster:
         assert "linkedin.com/feed/update" in url
         assert post_urn in url
     
-    @patch('httpx.Client')
-    def test_validate_credentials_success(self, mock_client):
+    @pytest.mark.asyncio
+    async def test_validate_credentials_success(self):
         poster = LinkedInPoster()
         poster.access_token = "test_token"
         poster.person_urn = "test_person_id"
@@ -169,16 +170,15 @@ class TestLinkedInPoster:
         mock_response = Mock()
         mock_response.status_code = 200
         
-        mock_client_instance = Mock()
-        mock_client_instance.get.return_value = mock_response
-        mock_client.return_value.__enter__.return_value = mock_client_instance
+        poster.http = AsyncMock()
+        poster.http.get.return_value = mock_response
         
-        result = poster.validate_credentials()
+        result = await poster.validate_credentials()
         
         assert result is True
     
-    @patch('httpx.Client')
-    def test_validate_credentials_failure(self, mock_client):
+    @pytest.mark.asyncio
+    async def test_validate_credentials_failure(self):
         poster = LinkedInPoster()
         poster.access_token = "test_token"
         poster.person_urn = "test_person_id"
@@ -187,19 +187,19 @@ class TestLinkedInPoster:
         mock_response = Mock()
         mock_response.status_code = 401
         
-        mock_client_instance = Mock()
-        mock_client_instance.get.return_value = mock_response
-        mock_client.return_value.__enter__.return_value = mock_client_instance
+        poster.http = AsyncMock()
+        poster.http.get.return_value = mock_response
         
-        result = poster.validate_credentials()
+        result = await poster.validate_credentials()
         
         assert result is False
     
-    def test_validate_credentials_no_credentials(self):
+    @pytest.mark.asyncio
+    async def test_validate_credentials_no_credentials(self):
         poster = LinkedInPoster()
         poster.access_token = None
         poster.person_urn = None
         
-        result = poster.validate_credentials()
+        result = await poster.validate_credentials()
         
         assert result is False
\ No newline at end of file
@@ -0,0 +1,114 @@
+import pytest
+from unittest.mock import Mock, patch
+from backend.llm_cache import ResponseCache
+from backend.post_generator import LinkedInPostGenerator
+from metrics import metrics
+
+
+class TestResponseCache:
+    
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return ResponseCache(path=str(tmp_path / "cache.db"), max_entries=3, max_bytes=10_000, ttl=3600)
+    
+    def test_key_depends_on_every_input(self):
+        messages = [{"role": "user", "content": "hello"}]
+        key = ResponseCache.make_key("model-a", messages, temperature=0.7, max_tokens=500)
+        
+        assert key == ResponseCache.make_key("model-a", messages, max_tokens=500, temperature=0.7)
+        assert key != ResponseCache.make_key("model-b", messages, temperature=0.7, max_tokens=500)
+        assert key != ResponseCache.make_key("model-a", messages, temperature=0.2, max_tokens=500)
+        assert key != ResponseCache.make_key("model-a", [{"role": "user", "content": "hi"}], temperature=0.7, max_tokens=500)
+    
+    def test_hit_and_miss_counters(self, cache):
+        metrics.reset()
+        
+        assert cache.get("k") is None
+        cache.put("k", {"content": "cached"})
+        assert cache.get("k") == {"content": "cached"}
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+        assert stats["hit_rate"] == 0.5
+    
+    def test_unserializable_value_is_not_stored(self, cache):
+        cache.put("k", {"content": object()})
+        
+        assert cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+    
+    def test_expired_entries_are_misses(self, cache):
+        cache.put("k", {"content": "old"})
+        
+        with patch("backend.llm_cache.time.time", return_value=10 ** 12):
+            assert cache.get("k") is None
+        
+        assert cache.stats()["entries"] == 0
+    
+    def test_least_recently_used_entry_is_evicted(self, tmp_path):
+        cache = ResponseCache(path=str(tmp_path / "cache.db"), max_entries=3, max_bytes=10_000, ttl=0)
+        
+        with patch("backend.llm_cache.time.time", side_effect=[1, 2, 3, 4, 5]):
+            cache.put("a", {"content": "a"})
+            cache.put("b", {"content": "b"})
+            cache.put("c", {"content": "c"})
+            cache.get("a")
+            cache.put("d", {"content": "d"})
+        
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["entries"] == 3
+    
+    def test_byte_budget_is_enforced(self, tmp_path):
+        cache = ResponseCache(path=str(tmp_path / "cache.db"), max_entries=100, max_bytes=100, ttl=0)
+        
+        cache.put("a", {"content": "x" * 60})
+        cache.put("b", {"content": "y" * 60})
+        
+        assert cache.stats()["entries"] == 1
+        assert cache.get("b") is not None
+    
+    def test_byte_budget_drops_only_the_oldest_needed(self, tmp_path):
+        cache = ResponseCache(path=str(tmp_path / "cache.db"), max_entries=100, max_bytes=200, ttl=0)
+        
+        with patch("backend.llm_cache.time.time", side_effect=[1, 2, 3, 4, 5]):
+            for key in "abcd":
+                cache.put(key, {"content": key * 20})
+            assert cache.stats()["entries"] == 4
+            cache.put("e", {"content": "e" * 100})
+        
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.stats()["entries"] == 3
+
+
+class TestGeneratorCaching:
+    
+    @pytest.fixture
+    def generator(self, tmp_path):
+        generator = LinkedInPostGenerator()
+        generator.client = Mock()
+        generator.client.chat.completions.create.return_value.choices = [Mock(message=Mock(content="draft"))]
+        return generator
+    
+    def test_identical_requests_hit_cache(self, generator, tmp_path):
+        messages = [{"role": "user", "content": "same context"}]
+        
+        with patch("backend.post_generator.response_cache", ResponseCache(path=str(tmp_path / "c.db"))):
+            first = generator._complete(messages, temperature=0.7)
+            second = generator._complete(messages, temperature=0.7)
+        
+        assert first == second == "draft"
+        assert generator.client.chat.completions.create.call_count == 1
+    
+    def test_fresh_bypasses_cache(self, generator, tmp_path):
+        messages = [{"role": "user", "content": "same context"}]
+        
+        with patch("backend.post_generator.response_cache", ResponseCache(path=str(tmp_path / "c.db"))):
+            generator._complete(messages, temperature=0.7)
+            generator._complete(messages, fresh=True, temperature=0.7)
+        
+        assert generator.client.chat.completions.create.call_count == 2
\ No newline at end of file
@@ -0,0 +1,115 @@
+import json
+import httpx
+import openai
+import pytest
+from unittest.mock import Mock, patch
+from fastapi.testclient import TestClient
+from backend.llm_stub import StubLLM, create_app
+from backend.post_schema import parse_sections
+from backend.post_generator import LinkedInPostGenerator
+from backend.llm_provider import get_provider
+from backend.database import Topic
+from backend import llm_provider
+
+MESSAGES = [
+    {"role": "system", "content": "Reply with JSON."},
+    {"role": "user", "content": "1. Compose 1.6 released\n   Source: reddit\n\n2. Baseline profiles\n"}
+]
+
+
+def stub_client(**options) -> TestClient:
+    return TestClient(create_app(StubLLM(latency_ms=0, ms_per_token=0, **options)))
+
+
+class TestStubServer:
+    
+    @pytest.fixture
+    def mock_stub_db(self):
+        db = Mock()
+        topic = Topic(id=1, title="Compose 1.6 released", content="Faster lists.", url="https://example.com/compose",
+                      source="reddit", score=10, engagement=2)
+        db.query.return_value.filter.return_value.all.return_value = [topic]
+        db.query.return_value.filter.return_value.first.return_value = None
+        return db
+    
+    def test_completion_is_valid_post_json_with_usage(self):
+        response = stub_client().post("/v1/chat/completions", json={"model": "stub", "messages": MESSAGES, "n": 2})
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["choices"]) == 2
+        sections, error = parse_sections(body["choices"][0]["message"]["content"])
+        assert error is None
+        assert "Compose 1.6 released" in sections["hook"]
+        assert body["usage"]["prompt_tokens"] > 0
+        assert body["usage"]["completion_tokens"] > 0
+    
+    def test_same_seed_gives_same_replies(self):
+        request = {"model": "stub", "messages": MESSAGES}
+        first = stub_client(seed=7).post("/v1/chat/completions", json=request).json()
+        second = stub_client(seed=7).post("/v1/chat/completions", json=request).json()
+        
+        assert first["choices"] == second["choices"]
+    
+    def test_rate_limit_and_malformed_rates(self):
+        limited = stub_client(rate_limit_rate=1.0).post("/v1/chat/completions", json={"messages": MESSAGES})
+        assert limited.status_code == 429
+        assert limited.json()["error"]["type"] == "rate_limit_error"
+        
+        client = stub_client(malformed_rate=1.0)
+        client.post("/v1/chat/completions", json={"messages": MESSAGES, "n": 3})
+        assert client.get("/stats").json()["malformed"] == 3
+    
+    def test_max_tokens_cuts_the_reply(self):
+        body = stub_client().post("/v1/chat/completions", json={"messages": MESSAGES, "max_tokens": 20}).json()
+        
+        assert body["choices"][0]["finish_reason"] == "length"
+        assert parse_sections(body["choices"][0]["message"]["content"])[0] is None
+    
+    def test_stream_deltas_add_up_to_the_reply(self):
+        client = stub_client(seed=3)
+        expected = stub_client(seed=3).post("/v1/chat/completions", json={"messages": MESSAGES}).json()
+        
+        response = client.post("/v1/chat/completions", json={"messages": MESSAGES, "stream": True})
+        lines = [line[6:] for line in response.text.splitlines() if line.startswith("data: ")]
+        
+        assert lines[-1] == "[DONE]"
+        deltas = [json.loads(line)["choices"][0]["delta"].get("content", "") for line in lines[:-1]]
+        assert "".join(deltas) == expected["choices"][0]["message"]["content"]
+    
+    @pytest.mark.asyncio
+    async def test_generator_runs_against_stub(self, mock_stub_db):
+        generator = LinkedInPostGenerator()
+        transport = httpx.ASGITransport(app=create_app(StubLLM(latency_ms=0, ms_per_token=0)))
+        generator.async_client = openai.AsyncOpenAI(
+            api_key="stub",
+            base_url="http://stub/v1",
+            http_client=httpx.AsyncClient(transport=transport, base_url="http://stub/v1")
+        )
+        
+        result = await generator.agenerate_post(mock_stub_db, [1], fresh=True, candidates=2)
+        
+        assert result is not None
+        assert 900 <= result["char_count"] <= 1500
+        assert result["completion_tokens"] > 0
+
+
+class TestProviders:
+    
+    def test_stub_provider_points_at_stub_url(self):
+        provider = get_provider("stub")
+        
+        assert provider.base_url == llm_provider.settings.llm_stub_url
+        assert provider.describe()["provider"] == "stub"
+    
+    def test_compatible_provider_needs_base_url(self):
+        with patch.object(llm_provider.settings, "llm_base_url", ""), pytest.raises(ValueError):
+            get_provider("compatible")
+        
+        provider = get_provider("compatible", base_url="http://localhost:8080/v1", model="llama3")
+        assert provider.client().base_url.host == "localhost"
+        assert provider.model == "llama3"
+    
+    def test_unknown_provider(self):
+        with pytest.raises(ValueError):
+            get_provider("bogus")
\ No newline at end of file
@@ -0,0 +1,115 @@
+import os
+import httpx
+import pytest
+from unittest.mock import patch
+from database import LinkedInPost, MediaAsset
+import media_upload as media_upload_module
+from media_upload import MediaUploader, MediaUploadError
+from linkedin_poster import LinkedInPoster
+from linkedin_stub import StubLinkedIn, create_app
+
+
+@pytest.fixture
+def stub():
+    return StubLinkedIn(part_size=1000)
+
+
+@pytest.fixture
+def http(stub):
+    # Requests go straight to the stub app, no sockets involved
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(stub)), base_url="http://linkedin.test")
+
+
+@pytest.fixture(autouse=True)
+def linkedin_settings():
+    settings = media_upload_module.settings
+    with patch.object(settings, "linkedin_api_url", "http://linkedin.test/v2"), \
+            patch.object(settings, "linkedin_access_token", "token"), \
+            patch.object(settings, "linkedin_person_urn", "person"), \
+            patch.object(settings, "media_upload_chunk_size", 256), \
+            patch.object(settings, "media_multipart_threshold", 2000):
+        yield
+
+
+def _image(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+class TestMediaUploader:
+    
+    @pytest.mark.asyncio
+    async def test_small_file_is_uploaded_in_one_request(self, sqlite_db, stub, http, tmp_path):
+        uploader = MediaUploader(http=http)
+        
+        urn = await uploader.upload(sqlite_db, _image(tmp_path, "small.png", 1500))
+        
+        assert urn.startswith("urn:li:digitalmediaAsset:")
+        assert stub.stats["uploads"] == 1
+        assert stub.stats["parts"] == 0
+        assert stub.stats["bytes"] == 1500
+        assert sqlite_db.query(MediaAsset).first().asset_urn == urn
+    
+    @pytest.mark.asyncio
+    async def test_large_file_is_uploaded_in_concurrent_parts(self, sqlite_db, stub, http, tmp_path):
+        uploader = MediaUploader(http=http)
+        
+        with patch.object(media_upload_module.settings, "media_upload_concurrency", 2):
+            urn = await uploader.upload(sqlite_db, _image(tmp_path, "large.png", 4500))
+        
+        asset = stub.assets[urn.split(":")[-1]]
+        assert stub.stats["parts"] == 5
+        assert stub.stats["bytes"] == 4500
+        assert asset["status"] == "AVAILABLE"
+    
+    @pytest.mark.asyncio
+    async def test_same_content_is_uploaded_once(self, sqlite_db, stub, http, tmp_path):
+        uploader = MediaUploader(http=http)
+        path = _image(tmp_path, "first.png", 800)
+        copy = tmp_path / "copy.png"
+        copy.write_bytes(open(path, "rb").read())
+        
+        first = await uploader.upload(sqlite_db, path)
+        second = await uploader.upload(sqlite_db, str(copy))
+        
+        assert first == second
+        assert stub.stats["registrations"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_missing_file_is_not_retryable(self, sqlite_db, http, tmp_path):
+        with pytest.raises(MediaUploadError) as error:
+            await MediaUploader(http=http).upload(sqlite_db, str(tmp_path / "gone.png"))
+        
+        assert error.value.retryable is False
+
+
+class TestImagePosts:
+    
+    @pytest.mark.asyncio
+    async def test_post_carries_uploaded_images(self, sqlite_db, stub, http, tmp_path):
+        post = LinkedInPost(content="Look at this", status="queued", media_paths=[_image(tmp_path, "chart.png", 1200)])
+        sqlite_db.add(post)
+        sqlite_db.commit()
+        poster = LinkedInPoster(http=http)
+        
+        result = await poster.post_to_linkedin(sqlite_db, post.id)
+        
+        assert result["success"] is True
+        share = stub.posts[0]["specificContent"]["com.linkedin.ugc.ShareContent"]
+        assert share["shareMediaCategory"] == "IMAGE"
+        assert share["media"] == [{"status": "READY", "media": sqlite_db.query(MediaAsset).first().asset_urn}]
+        assert post.status == "posted"
+    
+    @pytest.mark.asyncio
+    async def test_failed_upload_fails_the_post_without_publishing(self, sqlite_db, stub, http, tmp_path):
+        post = LinkedInPost(content="Look at this", status="queued", media_paths=[str(tmp_path / "gone.png")])
+        sqlite_db.add(post)
+        sqlite_db.commit()
+        
+        result = await LinkedInPoster(http=http).post_to_linkedin(sqlite_db, post.id)
+        
+        assert result["success"] is False
+        assert "not found" in result["message"]
+        assert stub.posts == []
+        assert post.status == "failed"
\ No newline at end of file
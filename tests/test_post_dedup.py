@@ -0,0 +1,79 @@
+import pytest
+from datetime import datetime, timedelta
+import database
+from post_dedup import PostDeduplicator
+from post_generator import LinkedInPostGenerator
+
+TOPICS = [
+    ("Jetpack Compose 1.6 released", "Compose 1.6 brings faster lazy lists and LazyColumn performance improvements."),
+    ("Kotlin 2.0 K2 compiler is stable", "The K2 compiler doubles compilation speed for large Kotlin projects."),
+    ("Gradle configuration cache goes stable", "Build times drop when the configuration cache is enabled with AGP 8."),
+    ("Compose 1.6 is out with faster LazyColumn", "The new Jetpack Compose release focuses on lazy list performance."),
+    ("Room 2.6 adds KSP support", "Room moves annotation processing from kapt to KSP."),
+]
+
+
+class TestPostDeduplicator:
+    
+    @pytest.fixture
+    def ids(self, sqlite_db):
+        sqlite_db.add_all([
+            database.Topic(source_id=f"t{i}", title=title, content=content, url=f"https://example.com/{i}", processed=True)
+            for i, (title, content) in enumerate(TOPICS)
+        ])
+        sqlite_db.commit()
+        return [t.id for t in sqlite_db.query(database.Topic).order_by(database.Topic.id).all()]
+    
+    def _post(self, db, topic_ids, days_ago=1, status="posted"):
+        db.add(database.LinkedInPost(
+            topic_ids=topic_ids,
+            content="Compose just got faster. LazyColumn scrolls smoother in 1.6. #AndroidDev",
+            created_at=datetime.utcnow() - timedelta(days=days_ago),
+            status=status
+        ))
+        db.commit()
+    
+    def test_same_topics_are_rejected(self, sqlite_db, ids):
+        self._post(sqlite_db, [ids[0], ids[1]])
+        
+        match = PostDeduplicator(threshold=0.6, window_days=14).check(sqlite_db, [ids[1], ids[0]])
+        
+        assert match["topic_overlap"] == 1.0
+        assert match["similarity"] == 1.0
+    
+    def test_rephrased_topic_is_rejected_and_unrelated_passes(self, sqlite_db, ids):
+        self._post(sqlite_db, [ids[0]])
+        dedup = PostDeduplicator(threshold=0.5, window_days=14)
+        
+        match = dedup.check(sqlite_db, [ids[3]])
+        assert match is not None
+        assert match["topic_overlap"] == 0.0
+        
+        assert dedup.check(sqlite_db, [ids[2], ids[4]]) is None
+    
+    def test_old_and_failed_posts_are_ignored(self, sqlite_db, ids):
+        self._post(sqlite_db, [ids[0]], days_ago=30)
+        self._post(sqlite_db, [ids[0]], status="failed")
+        
+        assert PostDeduplicator(threshold=0.6, window_days=14).check(sqlite_db, [ids[0]]) is None
+    
+    def test_history_is_rebuilt_when_posts_change(self, sqlite_db, ids):
+        dedup = PostDeduplicator(threshold=0.6, window_days=14)
+        assert dedup.check(sqlite_db, [ids[2]]) is None
+        
+        self._post(sqlite_db, [ids[2]])
+        
+        assert dedup.check(sqlite_db, [ids[2]]) is not None
+    
+    def test_zero_threshold_is_kept(self):
+        dedup = PostDeduplicator(threshold=0.0, window_days=0)
+        
+        assert dedup.threshold == 0.0
+        assert dedup.window_days == 0
+    
+    def test_explicit_topics_are_not_refused(self, sqlite_db, ids):
+        # A manual request names its topics on purpose, even ones a held draft used
+        self._post(sqlite_db, [ids[0], ids[1]], status="low_quality")
+        generator = LinkedInPostGenerator()
+        
+        assert generator._prepare_generation(sqlite_db, [ids[0], ids[1]]) is not None
\ No newline at end of file
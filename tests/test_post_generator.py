@@ -1,12 +1,25 @@
+import asyncio
+import json
+import time
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 from datetime import datetime
-from backend.post_generator import LinkedInPostGenerator
+from backend.post_generator import LinkedInPostGenerator, SectionStreamParser
 from backend.database import Topic, LinkedInPost
+from backend import post_generator
+from backend.post_schema import parse_sections
+from metrics import metrics
 
 
 class TestLinkedInPostGenerator:
     
+    @pytest.fixture(autouse=True)
+    def empty_response_cache(self):
+        # A reply cached by one test would answer another test's prompt
+        post_generator.response_cache.clear()
+        yield
+        post_generator.response_cache.clear()
+    
     @pytest.fixture
     def mock_db(self):
         db = Mock()
@@ -34,6 +47,8 @@ class TestLinkedInPostGenerator:
         ]
         
         db.query.return_value.filter.return_value.all.return_value = sample_topics
+        # No token usage recorded yet today
+        db.query.return_value.filter.return_value.first.return_value = None
         db.add = Mock()
         db.commit = Mock()
         db.rollback = Mock()
@@ -42,23 +57,16 @@ class TestLinkedInPostGenerator:
     
     @pytest.fixture
     def mock_openai_response(self):
-        return {
-            "choices": [{
-                "message": {
-                    "content": '{\n  "hook": "🚀 Android 14 just dropped some game-changing privacy features!",\n  "insight": "The new Privacy Sandbox is revolutionizing how apps handle user data. This shift toward privacy-first development isn\'t just a trend—it\'s the future of mobile development. Developers who adapt now will build more trustworthy apps.",\n  "takeaway": "Start integrating Privacy Sandbox APIs into your current projects. Your users (and their data) will thank you for being proactive about privacy.",\n  "cta": "How are you planning to implement these privacy changes in your Android apps? Share your approach below! 👇"\n}'
-                }
-            }]
-        }
-    
-    @patch('backend.post_generator.openai.OpenAI')
+        content = '{\n  "hook": "🚀 Android 14 just dropped some game-changing privacy features!",\n  "insight": "The new Privacy Sandbox is revolutionizing how apps handle user data. This shift toward privacy-first development isn\'t just a trend—it\'s the future of mobile development. Developers who adapt now will build more trustworthy apps. Ad SDKs lose access to the advertising ID, so attribution moves to on-device APIs that report aggregated, delayed results. Topics replaces interest cookies with a few coarse categories the user can see and reset. Teams that depend on third-party analytics should plan for less granular data.",\n  "takeaway": "Start integrating Privacy Sandbox APIs into your current projects. Your users (and their data) will thank you for being proactive about privacy.",\n  "cta": "How are you planning to implement these privacy changes in your Android apps? Share your approach below! 👇"\n}'
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))], usage=None)
+    
+    @patch('backend.llm_provider.openai.OpenAI')
     def test_generate_post_success(self, mock_openai_client, mock_db, mock_openai_response):
         # Setup
-        generator = LinkedInPostGenerator()
-        
         mock_client_instance = Mock()
-        mock_client_instance.chat.completions.create.return_value = Mock()
-        mock_client_instance.chat.completions.create.return_value.choices = mock_openai_response["choices"]
+        mock_client_instance.chat.completions.create.return_value = mock_openai_response
         mock_openai_client.return_value = mock_client_instance
+        generator = LinkedInPostGenerator()
         
         # Execute
         result = generator.generate_post(mock_db, [1, 2])
@@ -85,7 +93,7 @@ class TestLinkedInPostGenerator:
         
         assert result is None
     
-    @patch('backend.post_generator.openai.OpenAI')
+    @patch('backend.llm_provider.openai.OpenAI')
     def test_generate_post_openai_error(self, mock_openai_client, mock_db):
         # Setup OpenAI to raise an exception
         mock_client_instance = Mock()
@@ -97,31 +105,6 @@ class TestLinkedInPostGenerator:
         
         assert result is None
     
-    def test_parse_post_content_json(self):
-        generator = LinkedInPostGenerator()
-        
-        json_content = '{\n  "hook": "Test hook",\n  "insight": "Test insight",\n  "takeaway": "Test takeaway",\n  "cta": "Test CTA"\n}'
-        
-        result = generator._parse_post_content(json_content)
-        
-        assert result["hook"] == "Test hook"
-        assert result["insight"] == "Test insight"
-        assert result["takeaway"] == "Test takeaway"
-        assert result["cta"] == "Test CTA"
-    
-    def test_parse_post_content_fallback(self):
-        generator = LinkedInPostGenerator()
-        
-        text_content = "Test hook\nTest insight line 1\nTest insight line 2\nTest takeaway\nTest CTA"
-        
-        result = generator._parse_post_content(text_content)
-        
-        # Should fall back to text parsing
-        assert "Test hook" in result["hook"]
-        assert isinstance(result["insight"], str)
-        assert isinstance(result["takeaway"], str)
-        assert isinstance(result["cta"], str)
-    
     def test_prepare_context(self):
         generator = LinkedInPostGenerator()
         
@@ -155,4 +138,308 @@ class TestLinkedInPostGenerator:
         assert "ALWAYS write original insights" in prompt
         assert "900-1500 characters" in prompt
         assert "AndroidDev" in prompt
-        assert "JSON" in prompt
\ No newline at end of file
+        assert "JSON" in prompt
+    
+    @patch('backend.post_generator.related_index')
+    def test_select_companion_topics_orders_by_similarity(self, mock_index, mock_db):
+        mock_index.related.return_value = [(2, 0.9), (1, 0.4)]
+        
+        generator = LinkedInPostGenerator()
+        result = generator.select_companion_topics(mock_db, anchor_id=7, count=2)
+        
+        assert result == [2, 1]
+        mock_index.related.assert_called_once_with(7, k=10)
+    
+    @patch('backend.post_generator.related_index')
+    def test_select_companion_topics_without_neighbours(self, mock_index, mock_db):
+        mock_index.related.return_value = []
+        
+        generator = LinkedInPostGenerator()
+        
+        assert generator.select_companion_topics(mock_db, anchor_id=7) == []
+    
+    def _draft(self, sentences: int) -> str:
+        insight = " ".join(f"Sentence {i} explains one more detail about the new Android privacy APIs." for i in range(sentences))
+        return json.dumps({
+            "hook": "Android 14 changes how apps handle data.",
+            "insight": insight,
+            "takeaway": "Audit your SDKs before the next release. Start with analytics and ads.",
+            "cta": "What is your migration plan? #AndroidDev"
+        })
+    
+    def test_fit_length_trims_long_draft(self):
+        generator = LinkedInPostGenerator()
+        topics = [Topic(id=1, title="Privacy", url="https://www.reddit.com/r/androiddev/comments/abc123/a_very_long_title_slug/")]
+        
+        post_data, _ = parse_sections(self._draft(30))
+        content, fitted = generator._fit_length(post_data, topics)
+        
+        assert 900 <= len(content) <= 1500
+        assert fitted["sources"] == ["https://redd.it/abc123"]
+        assert "https://redd.it/abc123" in content
+        assert fitted["insight"].startswith("Sentence 0")
+    
+    def test_fit_length_expands_short_draft(self):
+        generator = LinkedInPostGenerator()
+        topics = [Topic(id=1, title="Android 14 Privacy Sandbox", url="https://example.com/android14")]
+        
+        post_data = {"hook": "Hook", "insight": "x" * 780, "takeaway": "Takeaway", "cta": "Thoughts?"}
+        content, fitted = generator._fit_length(post_data, topics)
+        
+        assert 900 <= len(content) <= 1500
+        assert "#AndroidDev" in fitted["cta"]
+        assert "• Android 14 Privacy Sandbox - https://example.com/android14" in content
+    
+    def test_generate_post_feeds_length_back(self, mock_db):
+        generator = LinkedInPostGenerator()
+        
+        with patch.object(generator, "_complete", side_effect=[self._draft(1), self._draft(14)]) as complete:
+            result = generator.generate_post(mock_db, [1, 2])
+        
+        assert result is not None
+        assert 900 <= result["char_count"] <= 1500
+        assert complete.call_count == 2
+        
+        retry_messages = complete.call_args_list[1].kwargs["messages"]
+        assert retry_messages[-2]["role"] == "assistant"
+        assert "Expand" in retry_messages[-1]["content"]
+        assert "between 900 and 1500 characters" in retry_messages[-1]["content"]
+        mock_db.commit.assert_called_once()
+    
+    def test_generate_post_attempts_are_capped(self, mock_db):
+        generator = LinkedInPostGenerator()
+        failures = metrics.get("generation.length_failures")
+        
+        with patch.object(post_generator.settings, "post_generation_max_attempts", 3), \
+             patch.object(generator, "_complete", return_value=self._draft(1)) as complete:
+            result = generator.generate_post(mock_db, [1, 2])
+        
+        assert result is None
+        assert complete.call_count == 3
+        assert metrics.get("generation.length_failures") == failures + 1
+        mock_db.add.assert_not_called()
+    
+    def test_generate_post_feeds_schema_error_back_once(self, mock_db):
+        generator = LinkedInPostGenerator()
+        retries = metrics.get("generation.parse_retries")
+        missing_cta = json.dumps({"hook": "Hook", "insight": "Insight", "takeaway": "Takeaway"})
+        
+        with patch.object(generator, "_complete", side_effect=[missing_cta, self._draft(14)]) as complete:
+            result = generator.generate_post(mock_db, [1, 2])
+        
+        assert result is not None
+        assert complete.call_args.kwargs["response_format"] == {"type": "json_object"}
+        retry_messages = complete.call_args_list[1].kwargs["messages"]
+        assert retry_messages[-2]["content"] == missing_cta
+        assert '"cta" is missing' in retry_messages[-1]["content"]
+        assert metrics.get("generation.parse_retries") == retries + 1
+    
+    def test_generate_post_gives_up_after_second_invalid_reply(self, mock_db):
+        generator = LinkedInPostGenerator()
+        
+        with patch.object(generator, "_complete", return_value="Sure! Here is your post.") as complete:
+            result = generator.generate_post(mock_db, [1, 2])
+        
+        assert result is None
+        assert complete.call_count == 2
+        mock_db.add.assert_not_called()
+    
+    def test_generate_post_stops_at_token_budget(self, mock_db):
+        generator = LinkedInPostGenerator()
+        generator.client = Mock()
+        response = self._choices(self._draft(1))
+        response.usage = Mock(prompt_tokens=400, completion_tokens=300)
+        generator.client.chat.completions.create.return_value = response
+        
+        with patch.object(post_generator.settings, "post_generation_token_budget", 1000):
+            result = generator.generate_post(mock_db, [1, 2], fresh=True)
+        
+        assert result is None
+        assert generator.client.chat.completions.create.call_count == 1
+        
+        usage = mock_db.add.call_args.args[0]
+        assert (usage.prompt_tokens, usage.completion_tokens, usage.generations) == (400, 300, 1)
+    
+    def test_generate_post_refused_when_daily_budget_spent(self, mock_db):
+        generator = LinkedInPostGenerator()
+        mock_db.query.return_value.filter.return_value.first.return_value = Mock(prompt_tokens=90_000, completion_tokens=9_900)
+        
+        with patch.object(post_generator.settings, "daily_token_budget", 100_000), \
+             patch.object(generator, "_complete") as complete:
+            result = generator.generate_post(mock_db, [1, 2])
+        
+        assert result is None
+        complete.assert_not_called()
+    
+    def test_compact_context_trims_lowest_ranked_topics_first(self):
+        generator = LinkedInPostGenerator()
+        topics = [
+            Topic(id=1, title="Compose stability", content="compose " * 150, score=10, engagement=1, source="reddit", rank_score=0.9),
+            Topic(id=2, title="Gradle caching", content="gradle " * 150, score=5, engagement=1, source="x", rank_score=0.2),
+        ]
+        full = generator._prepare_context(topics)
+        
+        with patch.object(post_generator.settings, "post_context_token_limit", post_generator.token_budget.count_tokens(full) - 10):
+            kept, context = generator._compact_context(topics)
+        
+        assert kept == topics
+        assert context.count("compose") > context.count("gradle")
+        
+        with patch.object(post_generator.settings, "post_context_token_limit", 10):
+            kept, context = generator._compact_context(topics)
+        
+        assert kept == [topics[0]]
+        assert "Gradle caching" not in context
+    
+    def _choices(self, *contents):
+        return Mock(choices=[Mock(message=Mock(content=content)) for content in contents])
+    
+    @pytest.mark.asyncio
+    async def test_agenerate_post_keeps_best_candidate(self, mock_db):
+        generator = LinkedInPostGenerator()
+        generator.async_client = Mock()
+        generator.async_client.chat.completions.create = AsyncMock(
+            return_value=self._choices(self._draft(1), self._draft(14), "not json at all")
+        )
+        
+        result = await generator.agenerate_post(mock_db, [1, 2], fresh=True, candidates=3)
+        
+        assert result is not None
+        assert 900 <= result["char_count"] <= 1500
+        assert "Sentence 13" in result["content"]
+        
+        call = generator.async_client.chat.completions.create.call_args
+        assert call.kwargs["n"] == 3
+        generator.async_client.chat.completions.create.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_parallel_candidates_run_concurrently(self, mock_db):
+        generator = LinkedInPostGenerator()
+        
+        async def slow_completion(**kwargs):
+            await asyncio.sleep(0.2)
+            return self._choices(self._draft(14))
+        
+        generator.async_client = Mock()
+        generator.async_client.chat.completions.create = AsyncMock(side_effect=slow_completion)
+        
+        with patch.object(post_generator.settings, "post_generation_candidate_mode", "parallel"):
+            start = time.perf_counter()
+            contents = await generator._acomplete_candidates(
+                messages=[{"role": "user", "content": "parallel"}], n=3, fresh=True
+            )
+            elapsed = time.perf_counter() - start
+        
+        assert len(contents) == 3
+        assert generator.async_client.chat.completions.create.await_count == 3
+        assert "n" not in generator.async_client.chat.completions.create.call_args.kwargs
+        assert elapsed < 0.5
+    
+    @pytest.mark.asyncio
+    async def test_agenerate_batch_bounds_posts_in_flight(self):
+        generator = LinkedInPostGenerator()
+        in_flight = 0
+        peak = 0
+        
+        sessions = []
+        
+        async def fake_generate(db, topic_ids, scheduled_at=None):
+            nonlocal in_flight, peak
+            sessions.append(db)
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"id": topic_ids[0], "scheduled_at": scheduled_at}
+        
+        slots = [datetime(2024, 1, 1, hour) for hour in range(6)]
+        with patch.object(post_generator.settings, "batch_generation_concurrency", 2), \
+             patch.object(generator, "agenerate_post", side_effect=fake_generate):
+            posts = await generator.agenerate_batch([[i] for i in range(6)], slots, session_factory=Mock)
+        
+        assert peak == 2
+        # One session per post, each closed when its post is done
+        assert len({id(db) for db in sessions}) == 6
+        assert all(db.close.called for db in sessions)
+        assert [p["id"] for p in posts] == list(range(6))
+        assert [p["scheduled_at"] for p in posts] == slots
+    
+    @pytest.mark.asyncio
+    async def test_agenerate_post_with_slot_is_scheduled(self, mock_db):
+        generator = LinkedInPostGenerator()
+        generator.async_client = Mock()
+        generator.async_client.chat.completions.create = AsyncMock(return_value=self._choices(self._draft(14)))
+        slot = datetime(2024, 1, 1, 9)
+        
+        result = await generator.agenerate_post(mock_db, [1, 2], fresh=True, candidates=1, scheduled_at=slot)
+        
+        saved = next(c.args[0] for c in mock_db.add.call_args_list if type(c.args[0]).__name__ == "LinkedInPost")
+        assert result["scheduled_at"] == slot
+        assert saved.status == "scheduled"
+        assert saved.scheduled_at == slot
+    
+    @pytest.mark.asyncio
+    async def test_agenerate_post_saves_requested_status(self, mock_db):
+        generator = LinkedInPostGenerator()
+        generator.async_client = Mock()
+        generator.async_client.chat.completions.create = AsyncMock(return_value=self._choices(self._draft(14)))
+        
+        result = await generator.agenerate_post(mock_db, [1, 2], fresh=True, candidates=1, status="ready")
+        
+        saved = next(c.args[0] for c in mock_db.add.call_args_list if type(c.args[0]).__name__ == "LinkedInPost")
+        assert result["status"] == "ready"
+        assert saved.status == "ready"
+    
+    @pytest.mark.asyncio
+    async def test_low_quality_draft_is_retried_once_then_held(self, mock_db):
+        generator = LinkedInPostGenerator()
+        generator.async_client = Mock()
+        generator.async_client.chat.completions.create = AsyncMock(return_value=self._choices(self._draft(14)))
+        slot = datetime(2024, 1, 1, 9)
+        
+        with patch.object(post_generator.quality_scorer, "min_score", 10):
+            result = await generator.agenerate_post(mock_db, [1, 2], fresh=True, candidates=1, scheduled_at=slot)
+        
+        assert generator.async_client.chat.completions.create.await_count == 2
+        retry_prompt = generator.async_client.chat.completions.create.call_args.kwargs["messages"][-1]["content"]
+        assert retry_prompt.startswith("Improve this post.")
+        saved = next(c.args[0] for c in mock_db.add.call_args_list if type(c.args[0]).__name__ == "LinkedInPost")
+        assert result["status"] == "low_quality"
+        assert saved.status == "low_quality"
+        assert saved.scheduled_at is None
+        assert saved.quality_score == result["quality_score"]
+    
+    def test_section_stream_parser_emits_completed_fields(self):
+        parser = SectionStreamParser()
+        
+        assert parser.feed('{"hook": "Compose is ') == []
+        assert parser.feed('here \\"finally\\"", "ins') == [("hook", 'Compose is here "finally"')]
+        assert parser.feed('ight": "Stable APIs.", "takeaway": "Upgrade.", ') == [
+            ("insight", "Stable APIs."),
+            ("takeaway", "Upgrade.")
+        ]
+        assert parser.feed('"cta": "Thoughts?"}') == [("cta", "Thoughts?")]
+    
+    @pytest.mark.asyncio
+    async def test_astream_post_streams_tokens_and_saves(self, mock_db):
+        generator = LinkedInPostGenerator()
+        draft = self._draft(14)
+        
+        async def chunks():
+            for i in range(0, len(draft), 40):
+                yield Mock(choices=[Mock(delta=Mock(content=draft[i:i + 40]))])
+        
+        generator.async_client = Mock()
+        generator.async_client.chat.completions.create = AsyncMock(return_value=chunks())
+        
+        events = [event async for event in generator.astream_post(mock_db, [1, 2], fresh=True)]
+        names = [event["event"] for event in events]
+        
+        assert "".join(e["data"]["delta"] for e in events if e["event"] == "token") == draft
+        assert [e["data"]["name"] for e in events if e["event"] == "section"] == ["hook", "insight", "takeaway", "cta"]
+        assert names[-1] == "done"
+        assert 900 <= events[-1]["data"]["char_count"] <= 1500
+        assert events[-1]["data"]["time_to_first_token_ms"] is not None
+        assert events[-1]["data"]["total_ms"] >= events[-1]["data"]["time_to_first_token_ms"]
+        assert generator.async_client.chat.completions.create.call_args.kwargs["stream"] is True
+        mock_db.commit.assert_called_once()
\ No newline at end of file
@@ -0,0 +1,49 @@
+from backend.post_schema import parse_sections
+from metrics import metrics
+
+
+class TestParseSections:
+    
+    def test_valid_reply(self):
+        ok = metrics.get("generation.parse_ok")
+        
+        sections, error = parse_sections('{"hook": "Hook", "insight": "Insight", "takeaway": "Takeaway", "cta": "CTA"}')
+        
+        assert error is None
+        assert sections == {"hook": "Hook", "insight": "Insight", "takeaway": "Takeaway", "cta": "CTA"}
+        assert metrics.get("generation.parse_ok") == ok + 1
+    
+    def test_repairs_fenced_reply_with_trailing_comma(self):
+        repaired = metrics.get("generation.parse_repaired")
+        content = 'Here you go:\n```json\n{"hook": "Hook", "insight": "Line one\nline two", "takeaway": "Takeaway", "cta": "CTA",}\n```'
+        
+        sections, error = parse_sections(content)
+        
+        assert error is None
+        assert sections["insight"] == "Line one\nline two"
+        assert metrics.get("generation.parse_repaired") == repaired + 1
+    
+    def test_repairs_key_variants_and_nesting(self):
+        content = '{"post": {"Hook": "Hook", "insights": ["One.", "Two."], "Takeaway": "Takeaway", "call_to_action": "CTA"}}'
+        
+        sections, error = parse_sections(content)
+        
+        assert error is None
+        assert sections["insight"] == "One.\nTwo."
+        assert sections["cta"] == "CTA"
+    
+    def test_reports_missing_and_blank_sections(self):
+        failures = metrics.get("generation.parse_failures")
+        
+        sections, error = parse_sections('{"hook": " ", "insight": "Insight", "takeaway": "Takeaway"}')
+        
+        assert sections is None
+        assert '"hook" value error, must not be empty' in error
+        assert '"cta" is missing' in error
+        assert metrics.get("generation.parse_failures") == failures + 1
+    
+    def test_rejects_plain_text(self):
+        sections, error = parse_sections("Hook line\nInsight\nTakeaway\nCTA")
+        
+        assert sections is None
+        assert error == "the reply was not a JSON object"
\ No newline at end of file
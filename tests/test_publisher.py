@@ -0,0 +1,221 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.orm import sessionmaker
+from database import LinkedInPost, PublishOutbox, Settings
+import publisher as publisher_module
+from publisher import OutboxPublisher
+
+
+def _result(success=False, status_code=None, post_id=None, retry_after=None, message=""):
+    return {"success": success, "status_code": status_code, "post_id": post_id, "retry_after": retry_after, "message": message}
+
+
+class TestOutboxPublisher:
+    
+    @pytest.fixture
+    def outbox(self, sqlite_db):
+        poster = AsyncMock()
+        poster.publish.return_value = _result(True, 201, "urn:li:share:1")
+        return OutboxPublisher(poster=poster, session_factory=sessionmaker(bind=sqlite_db.bind))
+    
+    def _posts(self, db, count):
+        posts = [LinkedInPost(content=f"post {i}", status="queued") for i in range(count)]
+        db.add_all(posts)
+        db.commit()
+        return [post.id for post in posts]
+    
+    def _entry(self, db, post_id):
+        db.expire_all()
+        return db.query(PublishOutbox).filter(PublishOutbox.post_id == post_id).first()
+    
+    def test_enqueue_is_idempotent(self, sqlite_db, outbox):
+        post_id = self._posts(sqlite_db, 1)[0]
+        
+        first = outbox.enqueue(sqlite_db, post_id)
+        second = outbox.enqueue(sqlite_db, post_id)
+        
+        assert first.id == second.id
+        assert sqlite_db.query(PublishOutbox).count() == 1
+        assert sqlite_db.get(LinkedInPost, post_id).status == "publishing"
+        assert outbox.enqueue(sqlite_db, 999) is None
+    
+    @pytest.mark.asyncio
+    async def test_publishes_and_marks_post(self, sqlite_db, outbox):
+        post_id = self._posts(sqlite_db, 1)[0]
+        outbox.enqueue(sqlite_db, post_id)
+        
+        assert await outbox.run_once() == 1
+        
+        entry = self._entry(sqlite_db, post_id)
+        post = sqlite_db.get(LinkedInPost, post_id)
+        assert entry.status == "done"
+        assert entry.lease_owner is None
+        assert post.status == "posted"
+        assert post.linkedin_post_id == "urn:li:share:1"
+        outbox.poster.publish.assert_awaited_once_with("post 0", entry.idempotency_key)
+        # Nothing left to do
+        assert await outbox.run_once() == 0
+    
+    @pytest.mark.asyncio
+    async def test_retries_with_backoff_and_same_key(self, sqlite_db, outbox):
+        post_id = self._posts(sqlite_db, 1)[0]
+        outbox.enqueue(sqlite_db, post_id)
+        outbox.poster.publish.return_value = _result(status_code=429, retry_after=600, message="Throttled")
+        
+        await outbox.run_once()
+        
+        entry = self._entry(sqlite_db, post_id)
+        assert entry.status == "pending"
+        assert entry.attempts == 1
+        assert entry.last_error == "Throttled"
+        # Retry-After wins over the shorter backoff
+        assert entry.next_attempt_at >= datetime.utcnow() + timedelta(seconds=590)
+        # Not due yet
+        assert await outbox.run_once() == 0
+        
+        entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        sqlite_db.commit()
+        outbox.poster.publish.return_value = _result(True, 201, "urn:li:share:2")
+        await outbox.run_once()
+        
+        keys = {call.args[1] for call in outbox.poster.publish.await_args_list}
+        assert len(keys) == 1
+        assert self._entry(sqlite_db, post_id).status == "done"
+    
+    def test_backoff_grows_and_is_capped(self, outbox):
+        with patch.object(publisher_module.settings, "publisher_backoff_base", 30), \
+                patch.object(publisher_module.settings, "publisher_backoff_max", 300):
+            first = outbox._backoff(1).total_seconds()
+            third = outbox._backoff(3).total_seconds()
+            tenth = outbox._backoff(10).total_seconds()
+        
+        assert 15 <= first <= 30
+        assert 60 <= third <= 120
+        assert 150 <= tenth <= 300
+    
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self, sqlite_db, outbox):
+        post_id = self._posts(sqlite_db, 1)[0]
+        outbox.enqueue(sqlite_db, post_id)
+        outbox.poster.publish.return_value = _result(status_code=503, message="Unavailable")
+        
+        with patch.object(publisher_module.settings, "publisher_max_attempts", 2):
+            await outbox.run_once()
+            entry = self._entry(sqlite_db, post_id)
+            entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+            sqlite_db.commit()
+            await outbox.run_once()
+        
+        assert self._entry(sqlite_db, post_id).status == "failed"
+        post = sqlite_db.get(LinkedInPost, post_id)
+        assert post.status == "failed"
+        assert post.error_message == "Unavailable"
+    
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, sqlite_db, outbox):
+        post_id = self._posts(sqlite_db, 1)[0]
+        outbox.enqueue(sqlite_db, post_id)
+        outbox.poster.publish.return_value = _result(status_code=401, message="Unauthorized")
+        
+        await outbox.run_once()
+        
+        entry = self._entry(sqlite_db, post_id)
+        assert entry.status == "failed"
+        assert entry.attempts == 1
+    
+    @pytest.mark.asyncio
+    async def test_missing_media_fails_without_publishing(self, sqlite_db, outbox):
+        post = LinkedInPost(content="with image", status="queued", media_paths=["/missing.png"])
+        sqlite_db.add(post)
+        sqlite_db.commit()
+        outbox.enqueue(sqlite_db, post.id)
+        outbox.poster.upload_media.return_value = {**_result(message="Media file not found"), "retryable": False}
+        
+        await outbox.run_once()
+        
+        assert self._entry(sqlite_db, post.id).status == "failed"
+        outbox.poster.publish.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_duplicate_on_retry_counts_as_published(self, sqlite_db, outbox):
+        post_id = self._posts(sqlite_db, 1)[0]
+        entry = outbox.enqueue(sqlite_db, post_id)
+        entry.attempts = 1
+        sqlite_db.commit()
+        outbox.poster.publish.return_value = _result(
+            status_code=422, message="Content is a duplicate of urn:li:share:77"
+        )
+        
+        await outbox.run_once()
+        
+        assert self._entry(sqlite_db, post_id).status == "done"
+        assert sqlite_db.get(LinkedInPost, post_id).linkedin_post_id == "urn:li:share:77"
+    
+    @pytest.mark.asyncio
+    async def test_lease_lost_during_upload_skips_publish(self, sqlite_db, outbox):
+        post = LinkedInPost(content="with image", status="queued", media_paths=["/slow.png"])
+        sqlite_db.add(post)
+        sqlite_db.commit()
+        outbox.enqueue(sqlite_db, post.id)
+        
+        async def slow_upload(db, paths):
+            # Another worker reclaims the entry while the upload runs
+            sqlite_db.query(PublishOutbox).update({PublishOutbox.lease_owner: "other-worker"})
+            sqlite_db.commit()
+            return {"success": True, "assets": ["urn:li:digitalmediaAsset:1"]}
+        
+        outbox.poster.upload_media.side_effect = slow_upload
+        
+        await outbox.run_once()
+        
+        outbox.poster.publish.assert_not_awaited()
+        assert self._entry(sqlite_db, post.id).lease_owner == "other-worker"
+    
+    def test_leased_entries_are_not_claimed_twice(self, sqlite_db, outbox):
+        post_ids = self._posts(sqlite_db, 2)
+        for post_id in post_ids:
+            outbox.enqueue(sqlite_db, post_id)
+        other = OutboxPublisher(poster=AsyncMock(), session_factory=outbox.session_factory)
+        
+        mine = outbox.claim(sqlite_db, 1)
+        theirs = other.claim(sqlite_db, 5)
+        
+        assert len(mine) == 1
+        assert len(theirs) == 1
+        assert set(mine).isdisjoint(theirs)
+        assert other.claim(sqlite_db, 5) == []
+    
+    def test_expired_lease_is_reclaimed(self, sqlite_db, outbox):
+        post_id = self._posts(sqlite_db, 1)[0]
+        outbox.enqueue(sqlite_db, post_id)
+        assert len(outbox.claim(sqlite_db, 1)) == 1
+        
+        # The worker holding it died
+        entry = self._entry(sqlite_db, post_id)
+        entry.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        sqlite_db.commit()
+        
+        other = OutboxPublisher(poster=AsyncMock(), session_factory=outbox.session_factory)
+        assert other.claim(sqlite_db, 1) == [entry.id]
+        assert self._entry(sqlite_db, post_id).lease_owner == other.worker_id
+    
+    @pytest.mark.asyncio
+    async def test_daily_cap_limits_publishing(self, sqlite_db, outbox):
+        sqlite_db.add(Settings(key="max_posts_per_day", value="2"))
+        sqlite_db.add(LinkedInPost(content="earlier", status="posted", posted_at=datetime.utcnow()))
+        sqlite_db.commit()
+        post_ids = self._posts(sqlite_db, 3)
+        for post_id in post_ids:
+            outbox.enqueue(sqlite_db, post_id)
+        
+        assert outbox.daily_cap(sqlite_db) == 2
+        assert outbox.remaining_today(sqlite_db) == 1
+        
+        assert await outbox.run_once() == 1
+        assert await outbox.run_once() == 0
+        assert outbox.stats(sqlite_db)["pending"] == 2
+        # Sleeps until the cap resets instead of polling the due rows
+        now = datetime.utcnow()
+        tomorrow = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        assert abs(outbox._idle_seconds() - (tomorrow - now).total_seconds()) < 5
\ No newline at end of file
@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import patch
+from database import Topic
+import quality as quality_module
+from quality import PostQualityScorer
+
+
+TOPICS = [Topic(
+    id=1,
+    title="Kotlin coroutines cancellation",
+    content="structured concurrency makes cancellation of child coroutines predictable across scopes",
+    url="https://example.com/kotlin"
+)]
+
+
+def _post(**sections):
+    post_data = {
+        "hook": "Kotlin coroutines cancellation trips up most teams.",
+        "insight": (
+            "Scopes decide when work stops, so tie them to lifecycle owners. "
+            "A job launched in the wrong scope keeps running after the screen is gone. "
+            "That leaks work and sometimes crashes when results arrive late."
+        ),
+        "takeaway": "Review where you launch work and which scope owns it.",
+        "cta": "How do you handle it? #Kotlin #AndroidDev",
+        "sources": ["https://example.com/kotlin"]
+    }
+    post_data.update(sections)
+    return post_data
+
+
+def _content(post_data, padding=0):
+    return "\n\n".join(post_data[name] for name in ("hook", "insight", "takeaway", "cta")) + " " * padding
+
+
+class TestPostQualityScorer:
+    
+    @pytest.fixture(autouse=True)
+    def bounds(self):
+        with patch.object(quality_module.settings, "min_post_length", 300), \
+                patch.object(quality_module.settings, "max_post_length", 600):
+            yield
+    
+    def test_copied_sources_score_lower(self):
+        scorer = PostQualityScorer()
+        original = _post()
+        copied = _post(insight="structured concurrency makes cancellation of child coroutines predictable across scopes")
+        
+        original_quality = scorer.score(_content(original), original, TOPICS)
+        copied_quality = scorer.score(_content(copied), copied, TOPICS)
+        
+        assert original_quality["score"] > copied_quality["score"]
+        assert copied_quality["components"]["originality"] < original_quality["components"]["originality"]
+    
+    def test_length_and_hashtags_affect_score(self):
+        scorer = PostQualityScorer()
+        post_data = _post()
+        bare = _post(cta="How do you handle it?")
+        
+        in_window = scorer.score(_content(post_data), post_data, TOPICS)
+        too_long = scorer.score(_content(post_data, padding=800), post_data, TOPICS)
+        no_tags = scorer.score(_content(bare), bare, TOPICS)
+        
+        assert in_window["components"]["length"] > too_long["components"]["length"]
+        assert in_window["score"] > too_long["score"]
+        assert no_tags["components"]["hashtags"] == 0
+    
+    def test_batch_matches_single_scores(self):
+        scorer = PostQualityScorer()
+        drafts = [_post(), _post(insight="Short."), _post(cta="")]
+        contents = [_content(post_data) for post_data in drafts]
+        
+        batch = scorer.score_batch(contents, drafts, [TOPICS] * len(drafts))
+        
+        assert batch == [scorer.score(content, post_data, TOPICS) for content, post_data in zip(contents, drafts)]
+        assert scorer.score_batch([], [], []) == []
+    
+    def test_threshold_and_feedback(self):
+        scorer = PostQualityScorer(min_score=7.0)
+        good = _post()
+        weak = _post(insight="Scopes.", takeaway="", cta="")
+        
+        assert scorer.score(_content(good), good, TOPICS)["passed"]
+        weak_quality = scorer.score(_content(weak), weak, TOPICS)
+        assert not weak_quality["passed"]
+        
+        feedback = scorer.feedback(weak_quality, TOPICS)
+        assert "between 300 and 600 characters" in feedback
+        assert "hashtags" in feedback
+        assert scorer.feedback(scorer.score(_content(good), good, TOPICS), TOPICS) == ""
\ No newline at end of file
@@ -0,0 +1,109 @@
+import pytest
+import numpy as np
+from backend.related_index import RelatedTopicIndex
+from database import Topic
+
+
+class TestRelatedTopicIndex:
+    
+    @pytest.fixture
+    def texts(self):
+        return [
+            "Jetpack Compose recomposition and state hoisting explained",
+            "Compose recomposition performance: avoiding unnecessary state reads",
+            "Gradle configuration cache cuts our build times in half",
+            "Kotlin coroutines cancellation and structured concurrency",
+            "Gradle version catalogs and convention plugins for build logic",
+        ]
+    
+    def test_related_returns_most_similar_topics(self, texts):
+        index = RelatedTopicIndex(path=None, n_tables=8, n_bits=4)
+        index.add(range(1, len(texts) + 1), index.embed(texts))
+        
+        related = index.related(1, k=2)
+        
+        assert related[0][0] == 2
+        assert all(topic_id != 1 for topic_id, _ in related)
+        assert related[0][1] >= related[-1][1]
+    
+    def test_unknown_topic_has_no_related(self, texts):
+        index = RelatedTopicIndex(path=None)
+        index.add([1], index.embed(texts[:1]))
+        
+        assert index.related(999) == []
+    
+    def test_adding_same_topic_twice_is_ignored(self, texts):
+        index = RelatedTopicIndex(path=None)
+        vectors = index.embed(texts)
+        
+        index.add([1, 2], vectors[:2])
+        index.add([2, 3], vectors[1:3])
+        
+        assert len(index) == 3
+    
+    def test_index_grows_past_initial_capacity(self):
+        index = RelatedTopicIndex(path=None)
+        vectors = np.random.default_rng(0).standard_normal((3000, 128)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        
+        index.add(range(1, 1501), vectors[:1500])
+        index.add(range(1501, 3001), vectors[1500:])
+        
+        assert len(index) == 3000
+        assert index.max_topic_id == 3000
+        assert index.related(2500, k=1)[0][0] != 2500
+    
+    def test_save_and_load_round_trip(self, tmp_path, texts):
+        path = str(tmp_path / "related.npz")
+        index = RelatedTopicIndex(path=path, n_tables=8, n_bits=4)
+        index.add(range(1, len(texts) + 1), index.embed(texts))
+        index.save()
+        
+        restored = RelatedTopicIndex(path=path, n_tables=8, n_bits=4)
+        restored.load()
+        
+        assert len(restored) == len(texts)
+        assert restored.related(3, k=2) == index.related(3, k=2)
+    
+    def test_sync_indexes_new_topics_incrementally(self, sqlite_db, tmp_path, texts):
+        index = RelatedTopicIndex(path=str(tmp_path / "related.npz"))
+        sqlite_db.add_all([Topic(source_id=f"t{i}", title=text) for i, text in enumerate(texts[:3])])
+        sqlite_db.commit()
+        
+        assert index.sync(sqlite_db) == 3
+        
+        sqlite_db.add_all([Topic(source_id=f"t{i}", title=text) for i, text in enumerate(texts[3:], 3)])
+        sqlite_db.commit()
+        
+        assert index.sync(sqlite_db) == 2
+        assert index.sync(sqlite_db) == 0
+        assert len(index) == 5
+        assert (tmp_path / "related.npz").exists()
+    
+    def test_remove_drops_topics_from_results(self, texts):
+        index = RelatedTopicIndex(path=None, n_tables=8, n_bits=4)
+        index.add(range(1, len(texts) + 1), index.embed(texts))
+        
+        assert index.remove([2, 99]) == 1
+        
+        assert len(index) == len(texts) - 1
+        assert index.related(2) == []
+        assert all(topic_id != 2 for topic_id, _ in index.related(1, k=4))
+        assert index.remove([2]) == 0
+    
+    def test_sync_drops_deleted_topics(self, sqlite_db, tmp_path, texts):
+        index = RelatedTopicIndex(path=str(tmp_path / "related.npz"))
+        sqlite_db.add_all([Topic(source_id=f"t{i}", title=text) for i, text in enumerate(texts)])
+        sqlite_db.commit()
+        index.sync(sqlite_db)
+        
+        sqlite_db.query(Topic).filter(Topic.id.in_([2, 5])).delete(synchronize_session=False)
+        sqlite_db.commit()
+        
+        assert index.sync(sqlite_db) == 0
+        assert len(index) == 3
+        assert index.max_topic_id == 4
+        
+        restored = RelatedTopicIndex(path=str(tmp_path / "related.npz"))
+        restored.load()
+        assert len(restored) == 3
\ No newline at end of file
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from singleflight import SingleFlight
+
+
+class TestTaskScheduler:
+    
+    @pytest.fixture
+    def scheduler_module(self):
+        # The module builds its scheduler and LLM clients on import
+        with patch("llm_provider.openai.OpenAI"), patch("llm_provider.openai.AsyncOpenAI"):
+            import scheduler
+        return scheduler
+    
+    @pytest.mark.asyncio
+    async def test_manual_and_scheduled_job_runs_do_not_overlap(self, scheduler_module):
+        scheduler = scheduler_module.scheduler
+        runs = 0
+        
+        async def fetch():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.05)
+        
+        with patch.object(scheduler, "fetch_topics_job", fetch), \
+                patch.object(scheduler_module, "flights", SingleFlight(ttl=0)):
+            assert scheduler.start_job("fetch_topics")
+            assert not scheduler.start_job("fetch_topics")
+            # The scheduled run waits for the manual one instead of starting its own
+            await scheduler.run_job("fetch_topics")
+        
+        assert runs == 1
+    
+    @pytest.mark.asyncio
+    async def test_empty_draft_buffer_falls_back_to_on_demand_generation(self, scheduler_module, sqlite_db):
+        scheduler = scheduler_module.scheduler
+        generate = AsyncMock(return_value={"id": 7, "status": "queued", "quality_score": None})
+        publish = AsyncMock()
+        
+        with patch.object(scheduler_module.settings, "draft_buffer_enabled", True), \
+                patch.object(scheduler_module, "get_db", lambda: iter([sqlite_db])), \
+                patch.object(scheduler.draft_buffer, "take", Mock(return_value=None)), \
+                patch.object(scheduler, "_generate_on_demand", generate), \
+                patch.object(scheduler, "_publish_post", publish), \
+                patch.object(scheduler_module.slot_planner, "assign", Mock(return_value=[])):
+            await scheduler.generate_and_post_job()
+        
+        generate.assert_awaited_once()
+        assert publish.await_args.args[1] == 7
\ No newline at end of file
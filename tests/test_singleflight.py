@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    
+    def test_key_ignores_keyword_order(self):
+        assert SingleFlight.make_key("generate", topic_ids=[1, 2], fresh=False) == \
+            SingleFlight.make_key("generate", fresh=False, topic_ids=[1, 2])
+        assert SingleFlight.make_key("generate", topic_ids=[1, 2]) != SingleFlight.make_key("generate", topic_ids=[1, 3])
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_operation(self):
+        flights = SingleFlight(ttl=0)
+        calls = 0
+        
+        async def operation():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"id": calls}
+        
+        results = await asyncio.gather(*[flights.do("key", operation) for _ in range(5)])
+        
+        assert calls == 1
+        assert all(result == {"id": 1} for result in results)
+        assert not flights.in_flight("key")
+        # Nothing is kept without a TTL
+        assert await flights.do("key", operation) == {"id": 2}
+    
+    @pytest.mark.asyncio
+    async def test_result_is_shared_within_ttl(self):
+        flights = SingleFlight(ttl=60)
+        calls = 0
+        
+        async def operation():
+            nonlocal calls
+            calls += 1
+            return calls
+        
+        assert await flights.do("key", operation) == 1
+        assert await flights.do("key", operation) == 1
+        assert await flights.do("other", operation) == 2
+    
+    @pytest.mark.asyncio
+    async def test_empty_results_are_not_shared(self):
+        flights = SingleFlight(ttl=60)
+        calls = 0
+        
+        async def failed_generation():
+            nonlocal calls
+            calls += 1
+            return None
+        
+        assert await flights.do("key", failed_generation) is None
+        assert await flights.do("key", failed_generation) is None
+        assert calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter_and_are_not_kept(self):
+        flights = SingleFlight(ttl=60)
+        calls = 0
+        
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+        
+        results = await asyncio.gather(*[flights.do("key", failing) for _ in range(3)], return_exceptions=True)
+        
+        assert calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await flights.do("key", failing)
+        assert calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        flights = SingleFlight(ttl=0)
+        
+        async def operation():
+            await asyncio.sleep(0.05)
+            return "done"
+        
+        first = asyncio.ensure_future(flights.do("key", operation))
+        second = asyncio.ensure_future(flights.do("key", operation))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        
+        assert await second == "done"
\ No newline at end of file
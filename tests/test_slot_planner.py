@@ -0,0 +1,145 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+from sqlalchemy.orm import sessionmaker
+from database import LinkedInPost, PublishOutbox, Settings
+from slot_planner import SlotPlanner, SlotDispatcher
+
+# A Friday, between the 09:00 and 14:00 default slots
+FRIDAY = datetime(2026, 10, 16, 10, 0)
+
+
+class TestSlotPlanner:
+    
+    def _configure(self, db, times="09:00,14:00,17:00", per_day=3, weekends=False):
+        db.add_all([
+            Settings(key="optimal_post_times", value=times),
+            Settings(key="max_posts_per_day", value=str(per_day)),
+            Settings(key="pause_on_weekends", value=str(weekends).lower())
+        ])
+        db.commit()
+    
+    def test_slots_follow_optimal_times(self, sqlite_db):
+        self._configure(sqlite_db)
+        
+        slots = SlotPlanner().free_slots(sqlite_db, 4, after=FRIDAY)
+        
+        assert slots == [
+            datetime(2026, 10, 16, 14, 0),
+            datetime(2026, 10, 16, 17, 0),
+            datetime(2026, 10, 17, 9, 0),
+            datetime(2026, 10, 17, 14, 0)
+        ]
+    
+    def test_daily_cap_counts_published_and_scheduled_posts(self, sqlite_db):
+        self._configure(sqlite_db, per_day=2)
+        sqlite_db.add_all([
+            LinkedInPost(content="earlier", status="posted", posted_at=FRIDAY - timedelta(hours=1)),
+            LinkedInPost(content="next", status="scheduled", scheduled_at=datetime(2026, 10, 17, 9, 0))
+        ])
+        sqlite_db.commit()
+        
+        slots = SlotPlanner().free_slots(sqlite_db, 3, after=FRIDAY)
+        
+        # One left on Friday, Saturday 09:00 is taken and Saturday allows one more
+        assert slots == [
+            datetime(2026, 10, 16, 14, 0),
+            datetime(2026, 10, 17, 14, 0),
+            datetime(2026, 10, 18, 9, 0)
+        ]
+    
+    def test_daily_cap_counts_posts_in_the_outbox(self, sqlite_db):
+        self._configure(sqlite_db, per_day=2)
+        publishing = LinkedInPost(content="going out", status="publishing")
+        retrying = LinkedInPost(content="retrying", status="publishing")
+        sqlite_db.add_all([publishing, retrying])
+        sqlite_db.flush()
+        sqlite_db.add_all([
+            PublishOutbox(post_id=publishing.id, idempotency_key="a", status="publishing", next_attempt_at=FRIDAY - timedelta(minutes=5)),
+            PublishOutbox(post_id=retrying.id, idempotency_key="b", status="pending", next_attempt_at=datetime(2026, 10, 17, 8, 0))
+        ])
+        sqlite_db.commit()
+        
+        slots = SlotPlanner().free_slots(sqlite_db, 3, after=FRIDAY)
+        
+        # Friday and Saturday each already have one post going out
+        assert slots == [
+            datetime(2026, 10, 16, 14, 0),
+            datetime(2026, 10, 17, 9, 0),
+            datetime(2026, 10, 18, 9, 0)
+        ]
+    
+    def test_weekends_are_skipped_when_paused(self, sqlite_db):
+        self._configure(sqlite_db, times="09:00", weekends=True)
+        
+        slots = SlotPlanner().free_slots(sqlite_db, 2, after=FRIDAY)
+        
+        assert slots == [datetime(2026, 10, 19, 9, 0), datetime(2026, 10, 20, 9, 0)]
+    
+    def test_defaults_come_from_schedule_config(self, sqlite_db):
+        config = SlotPlanner().config(sqlite_db)
+        
+        assert config["optimal_post_times"] == ["09:00", "14:00", "17:00"]
+        assert config["max_posts_per_day"] == 3
+        assert config["pause_on_weekends"] is False
+    
+    def test_assign_schedules_queued_posts_oldest_first(self, sqlite_db):
+        self._configure(sqlite_db)
+        sqlite_db.add_all([
+            LinkedInPost(content="old", status="queued", created_at=FRIDAY - timedelta(days=1)),
+            LinkedInPost(content="new", status="queued", created_at=FRIDAY),
+            LinkedInPost(content="done", status="posted", created_at=FRIDAY - timedelta(days=2))
+        ])
+        sqlite_db.commit()
+        
+        assigned = SlotPlanner().assign(sqlite_db)
+        
+        assert len(assigned) == 2
+        old = sqlite_db.query(LinkedInPost).filter(LinkedInPost.content == "old").first()
+        new = sqlite_db.query(LinkedInPost).filter(LinkedInPost.content == "new").first()
+        assert old.status == new.status == "scheduled"
+        assert old.scheduled_at < new.scheduled_at
+
+
+class TestSlotDispatcher:
+    
+    @pytest.fixture
+    def dispatcher(self, sqlite_db):
+        return SlotDispatcher(AsyncMock(), session_factory=sessionmaker(bind=sqlite_db.bind))
+    
+    def _scheduled(self, db, *offsets):
+        now = datetime.utcnow()
+        posts = [
+            LinkedInPost(content=f"post {i}", status="scheduled", scheduled_at=now + timedelta(seconds=offset))
+            for i, offset in enumerate(offsets)
+        ]
+        db.add_all(posts)
+        db.commit()
+        return posts
+    
+    @pytest.mark.asyncio
+    async def test_fires_only_due_posts_in_slot_order(self, sqlite_db, dispatcher):
+        later, due, earlier = self._scheduled(sqlite_db, 3600, -5, -60)
+        dispatcher.refresh(sqlite_db)
+        
+        assert await dispatcher.fire_due() == 2
+        
+        fired = [call.args[1] for call in dispatcher.publish.await_args_list]
+        assert fired == [earlier.id, due.id]
+        assert [entry["post_id"] for entry in dispatcher.pending()] == [later.id]
+        assert 0 < dispatcher._seconds_until_next() <= 3600
+    
+    @pytest.mark.asyncio
+    async def test_rescheduled_and_deleted_posts_are_skipped(self, sqlite_db, dispatcher):
+        moved, deleted = self._scheduled(sqlite_db, -10, -10)
+        dispatcher.refresh(sqlite_db)
+        
+        # Moved to later: the old heap entry goes stale
+        moved.scheduled_at = datetime.utcnow() + timedelta(hours=1)
+        sqlite_db.delete(deleted)
+        sqlite_db.commit()
+        dispatcher.schedule(moved.id, moved.scheduled_at)
+        
+        assert await dispatcher.fire_due() == 0
+        dispatcher.publish.assert_not_awaited()
+        assert [entry["post_id"] for entry in dispatcher.pending()] == [moved.id]
\ No newline at end of file
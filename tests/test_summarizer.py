@@ -0,0 +1,57 @@
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from backend.summarizer import ExtractiveSummarizer
+
+
+class TestExtractiveSummarizer:
+    
+    @pytest.fixture
+    def content(self):
+        return (
+            "Hey everyone, long time lurker here. "
+            "Baseline profiles cut our cold start time by 30% on low-end devices. "
+            "We generated the baseline profiles with Macrobenchmark and shipped them through profileinstaller. "
+            "Thanks for reading and have a great weekend! "
+            "Cold start with baseline profiles stays fast even after app updates."
+        )
+    
+    def test_short_content_is_kept_as_is(self):
+        summarizer = ExtractiveSummarizer(max_chars=300)
+        
+        assert summarizer.summarize("Compose 1.6 is out.") == "Compose 1.6 is out."
+        assert summarizer.summarize(None) is None
+    
+    def test_keeps_informative_sentences_within_budget(self, content):
+        summarizer = ExtractiveSummarizer(max_chars=160)
+        
+        summary = summarizer.summarize(content)
+        
+        assert len(summary) <= 160
+        assert "baseline profiles" in summary.lower()
+        assert "lurker" not in summary
+        assert "weekend" not in summary
+    
+    def test_preserves_reading_order(self, content):
+        summarizer = ExtractiveSummarizer(max_chars=200)
+        
+        summary = summarizer.summarize(content)
+        sentences = [s for s in content.split(". ") if s.rstrip(".") in summary]
+        
+        assert [summary.index(s.rstrip(".")) for s in sentences] == sorted(summary.index(s.rstrip(".")) for s in sentences)
+    
+    def test_uses_shared_vectorizer_and_falls_back_when_vocabulary_misses(self, content):
+        summarizer = ExtractiveSummarizer(max_chars=160)
+        corpus = ["baseline profiles cold start", "macrobenchmark profileinstaller startup"]
+        shared = TfidfVectorizer().fit(corpus)
+        unrelated = TfidfVectorizer().fit(["gradle kapt ksp", "compose modifier"])
+        
+        assert "baseline profiles" in summarizer.summarize(content, shared).lower()
+        assert "baseline profiles" in summarizer.summarize(content, unrelated).lower()
+    
+    def test_single_long_sentence_is_truncated_at_a_word(self):
+        summarizer = ExtractiveSummarizer(max_chars=50)
+        
+        summary = summarizer.summarize("word " * 40)
+        
+        assert len(summary) <= 50
+        assert summary.endswith("word...")
\ No newline at end of file
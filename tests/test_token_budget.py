@@ -0,0 +1,70 @@
+import pytest
+from unittest.mock import Mock, patch
+from backend import token_budget
+from backend.token_budget import PostBudget
+
+
+class TestTokenBudget:
+    
+    def test_count_tokens_falls_back_to_estimate(self):
+        with patch.object(token_budget, "_get_encoding", return_value=None):
+            assert token_budget.count_tokens("") == 0
+            assert token_budget.count_tokens("a" * 40) == 11
+    
+    def test_record_prefers_reported_usage(self):
+        budget = PostBudget(limit=1000)
+        messages = [{"role": "user", "content": "hello"}]
+        
+        budget.record(messages, ["reply"], Mock(prompt_tokens=120, completion_tokens=80))
+        assert (budget.prompt_tokens, budget.completion_tokens) == (120, 80)
+        
+        # Mocked or missing usage falls back to local counts
+        budget.record(messages, ["reply"], None)
+        assert budget.prompt_tokens > 120
+        assert budget.completion_tokens > 80
+    
+    def test_allows_checks_worst_case_of_next_call(self):
+        budget = PostBudget(limit=1000)
+        budget.prompt_tokens, budget.completion_tokens = 300, 200
+        
+        assert budget.allows(200, 300)
+        assert not budget.allows(201, 300)
+    
+    def test_default_budget_pays_for_every_attempt(self, caplog):
+        with patch.object(token_budget.settings, "post_generation_token_budget", 0), \
+                patch.object(token_budget.settings, "post_generation_candidates", 3), \
+                patch.object(token_budget.settings, "post_completion_max_tokens", 500), \
+                patch.object(token_budget.settings, "post_generation_max_attempts", 3):
+            # Length re-prompts plus the quality retry
+            assert token_budget.per_post_limit() == 4 * token_budget.attempt_tokens()
+            token_budget.check_post_budget()
+            assert "re-prompts will be skipped" not in caplog.text
+            
+            with patch.object(token_budget.settings, "post_generation_token_budget", 4000):
+                assert token_budget.per_post_limit() == 4000
+                token_budget.check_post_budget()
+        
+        assert "re-prompts will be skipped" in caplog.text
+    
+    def test_daily_totals_accumulate(self, sqlite_db):
+        for prompt, completion in [(400, 300), (100, 50)]:
+            budget = PostBudget(limit=5000)
+            budget.prompt_tokens, budget.completion_tokens = prompt, completion
+            token_budget.record_usage(sqlite_db, budget)
+            sqlite_db.commit()
+        
+        with patch.object(token_budget.settings, "daily_token_budget", 2000):
+            usage = token_budget.daily_usage(sqlite_db)
+            remaining = token_budget.post_budget(sqlite_db).limit
+        
+        assert len(usage["days"]) == 1
+        assert usage["days"][0]["total_tokens"] == 850
+        assert usage["days"][0]["generations"] == 2
+        assert usage["remaining_today"] == 1150
+        assert remaining == 1150
+    
+    def test_unused_budget_is_not_recorded(self, sqlite_db):
+        token_budget.record_usage(sqlite_db, PostBudget(limit=100))
+        sqlite_db.commit()
+        
+        assert token_budget.daily_usage(sqlite_db)["days"] == []
\ No newline at end of file